@@ -0,0 +1,47 @@
+import time
+from threading import Lock
+from typing import Optional
+
+__all__ = [
+    "MetadataCache"
+]
+
+
+class MetadataCache:
+    """
+    Thread safe table metadata cache by (catalog, database, table), entries expire after ttl seconds
+    """
+
+    def __init__(self, ttl: Optional[float] = 300):
+        self.ttl = ttl
+        self.entries: dict[tuple[str, str, str], tuple[float, dict]] = {}
+        self.lock = Lock()
+
+    def get(self, catalog: str, database: str, name: str) -> Optional[dict]:
+        key = (catalog, database, name.lower())
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            return entry[1]
+
+    def put(self, catalog: str, database: str, meta: dict):
+        expiry = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self.lock:
+            self.entries[(catalog, database, meta["Name"].lower())] = (expiry, meta)
+
+    def invalidate(self, catalog: Optional[str] = None, database: Optional[str] = None, name: Optional[str] = None):
+        """
+        Drop matching entries, None matches all
+        """
+        with self.lock:
+            for key in [
+                key for key in self.entries
+                if (catalog is None or key[0] == catalog)
+                and (database is None or key[1] == database)
+                and (name is None or key[2] == name.lower())
+            ]:
+                del self.entries[key]
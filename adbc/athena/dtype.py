@@ -1,35 +1,23 @@
+from functools import lru_cache
 from typing import Optional
 
 import pyarrow as pa
 from pyarrow import field, DataType, Field, Schema
 
-from adbc.dtype import TIMETYPES, STRING
+from adbc.dialect import Dialect, register_dialect
+from adbc.dtype import TIMETYPES, STRING, fine_decimal, int_to_timeunit
 
 __all__ = [
     "dict_table_metadata_to_pyarrow_schema",
     "dict_to_pyarrow_field",
     "sqltype_to_datatype",
-    "query_result_column_to_pyarrow_field"
+    "parse_sqltype",
+    "query_result_column_to_pyarrow_field",
+    "is_primitive_sqltype",
+    "ATHENA_DIALECT"
 ]
 
 
-def fine_decimal(precision: int, scale: int):
-    if precision > 38:
-        return pa.decimal256(precision, scale)
-    else:
-        return pa.decimal128(precision, scale)
-
-
-def int_to_timeunit(i: int) -> str:
-    if i == 0:
-        return "s"
-    elif i <= 3:
-        return "ms"
-    elif i <= 6:
-        return "us"
-    return "ns"
-
-
 DATATYPES = {
     "string": lambda precision=None, *args, **kwargs:
         pa.large_string() if precision is not None and precision > 42000 else pa.string(),
@@ -42,7 +30,8 @@ DATATYPES = {
     "smallint": lambda *args, **kwargs: pa.int16(),
     "bigint": lambda *args, **kwargs: pa.int64(),
     "boolean": lambda *args, **kwargs: pa.bool_(),
-    "decimal": lambda precision, scale, **kwargs: fine_decimal(precision, scale),
+    # hive decimal defaults to decimal(10,0)
+    "decimal": lambda precision=None, scale=None, **kwargs: fine_decimal(precision or 10, scale or 0),
     "double": lambda *args, **kwargs: pa.float64(),
     "float": lambda *args, **kwargs: pa.float32(),
     "binary": lambda precision=None, **kwargs:
@@ -51,26 +40,134 @@ DATATYPES = {
         pa.large_string() if precision is not None and precision > 42000 else pa.string(),
     "varchar": lambda precision=None, *args, **kwargs:
         pa.large_string() if precision is not None and precision > 42000 else pa.string(),
-    "time": lambda precision=9, *args, **kwargs: TIMETYPES[int_to_timeunit(precision)],
+    "time": lambda precision=None, *args, **kwargs: TIMETYPES[int_to_timeunit(9 if precision is None else precision)],
     "timestamp with time zone": lambda **kwargs: pa.string()
 }
 
 
-def sqltype_to_datatype(
+def split_arguments(text: str, sep: str = ",") -> list[str]:
+    """
+    Split on sep outside of <> and () nesting
+    """
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(text):
+        if char in "<(":
+            depth += 1
+        elif char in ">)":
+            depth -= 1
+        elif char == sep and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+    parts.append(text[start:].strip())
+    return [_ for _ in parts if _]
+
+
+def unquote_name(name: str) -> str:
+    name = name.strip()
+    return name[1:-1] if len(name) > 1 and name[0] in "`\"" and name[-1] == name[0] else name
+
+
+def struct_field(text: str) -> Field:
+    # hive name:type or trino name type
+    text = text.strip()
+    if text[:1] in "`\"":
+        end = text.index(text[0], 1)
+        name, rest = text[1:end], text[end + 1:].lstrip(" :")
+    elif ":" in text.split("<", 1)[0].split("(", 1)[0]:
+        name, rest = text.split(":", 1)
+    else:
+        name, rest = text.split(None, 1)
+    return field(name.strip(), parse_sqltype(rest.strip()), True)
+
+
+@lru_cache(maxsize=None)
+def parse_sqltype(
     sqltype: str,
     unit: str = "us",
     tz: Optional[str] = "UTC",
-    **kwargs
+    precision: Optional[int] = None,
+    scale: Optional[int] = None
 ) -> DataType:
+    """
+    Recursive Hive / Athena type parser, memoized
+    - array<T> or array(T)
+    - map<K,V> or map(K, V)
+    - struct<name:T,...> or row(name T, ...)
+    - parameterized types: decimal(38,6), varchar(255), timestamp(3)
+    Unknown types are STRING
+    """
+    sqltype = sqltype.strip()
+    lowered = sqltype.lower()
+    for opening, closing in (("<", ">"), ("(", ")")):
+        if opening in sqltype and sqltype.endswith(closing):
+            key, args = sqltype.split(opening, 1)
+            key, args = key.strip().lower(), args[:-1]
+            break
+    else:
+        key, args = lowered, None
+
+    if key == "array" and args is not None:
+        return pa.list_(parse_sqltype(args))
+    if key == "map" and args is not None:
+        key_type, item_type = split_arguments(args)
+        return pa.map_(parse_sqltype(key_type), parse_sqltype(item_type))
+    if key in ("struct", "row") and args is not None:
+        return pa.struct([struct_field(_) for _ in split_arguments(args)])
+
+    if args is not None:
+        values = [int(_) for _ in split_arguments(args)]
+        precision = values[0]
+        scale = values[1] if len(values) > 1 else scale
     try:
-        if '(' in sqltype:
-            key, args = sqltype.split("(", 1)
-            return DATATYPES[key](*(int(_) for _ in args[:-1].split(",")))
-        else:
-            return DATATYPES[sqltype](unit=unit, tz=tz, **kwargs)
-    except KeyError as e:
-        print(e)
+        builder = DATATYPES[key]
+    except KeyError:
         return STRING
+    return builder(unit=unit, tz=tz, precision=precision, scale=scale)
+
+
+def sqltype_to_datatype(
+    sqltype: str,
+    unit: str = "us",
+    tz: Optional[str] = "UTC",
+    precision: Optional[int] = None,
+    scale: Optional[int] = None,
+    **kwargs
+) -> DataType:
+    return parse_sqltype(sqltype, unit, tz, precision, scale)
+
+
+def hive_sqltype(dialect: Dialect, dtype: DataType) -> Optional[str]:
+    if pa.types.is_decimal(dtype):
+        return "decimal(%s,%s)" % (dtype.precision, dtype.scale)
+    if pa.types.is_timestamp(dtype):
+        return "timestamp"
+    if pa.types.is_list(dtype) or pa.types.is_large_list(dtype) or pa.types.is_fixed_size_list(dtype):
+        return "array<%s>" % dialect.to_sql(dtype.value_type)
+    if pa.types.is_map(dtype):
+        return "map<%s,%s>" % (dialect.to_sql(dtype.key_type), dialect.to_sql(dtype.item_type))
+    if pa.types.is_struct(dtype):
+        return "struct<%s>" % ",".join(
+            "%s:%s" % (dtype.field(i).name, dialect.to_sql(dtype.field(i).type)) for i in range(dtype.num_fields)
+        )
+    return None
+
+
+ATHENA_DIALECT = register_dialect(Dialect(
+    "athena",
+    DATATYPES,
+    {
+        pa.bool_(): "boolean", pa.int8(): "tinyint", pa.int16(): "smallint", pa.int32(): "int", pa.int64(): "bigint",
+        pa.uint8(): "smallint", pa.uint16(): "int", pa.uint32(): "bigint", pa.uint64(): "decimal(20,0)",
+        pa.float16(): "float", pa.float32(): "float", pa.float64(): "double",
+        pa.string(): "string", pa.large_string(): "string", pa.binary(): "binary", pa.large_binary(): "binary",
+        pa.date32(): "date", pa.date64(): "date"
+    },
+    hive_sqltype,
+    parse=lambda sqltype, precision, scale, unit, tz: parse_sqltype(sqltype, unit, tz, precision, scale),
+    unit="us",
+    tz="UTC",
+    quote="`%s`"
+))
 
 
 def dict_to_pyarrow_field(meta: dict, nullable: bool = True):
@@ -107,6 +204,14 @@ def dict_table_metadata_to_pyarrow_schema(
     )
 
 
+def is_primitive_sqltype(sqltype: str) -> bool:
+    """
+    Known scalar type: query result columns report nested types as bare array, map or row
+    """
+    key = sqltype.strip().lower().split("(", 1)[0].split("<", 1)[0].strip()
+    return key in DATATYPES and key not in ("array", "map", "struct", "row")
+
+
 def query_result_column_to_pyarrow_field(meta: dict) -> Field:
     return field(
         meta["Name"],
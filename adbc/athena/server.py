@@ -1,13 +1,22 @@
-from typing import Callable, Any, Optional
+import os
+import time
+from threading import Lock
+from typing import Callable, Any, Optional, Generator, Union
 from urllib.parse import quote_plus
 
-from boto3 import Session
-from pyarrow import Schema, schema as schema_builder
+import pyarrow as pa
+from pyarrow import Schema, RecordBatch, schema as schema_builder
+from pyarrow.compute import Expression
 from pyarrow.fs import FileSystem
 
-from adbc.athena.dtype import dict_table_metadata_to_pyarrow_schema
-from adbc.exception import TableNotFound
+from adbc.athena.cache import MetadataCache
+from adbc.athena.dtype import dict_table_metadata_to_pyarrow_schema, query_result_column_to_pyarrow_field, \
+    is_primitive_sqltype, ATHENA_DIALECT
+from adbc.athena.writer import AthenaWriter
+from adbc.enums import FileFormat
+from adbc.exception import TableNotFound, QueryFailed
 from adbc.filesystem import DataFileSystem
+from adbc.filesystem.dataset import files_dataset, is_hidden
 from adbc.reader import BatchReader
 from adbc.server import Connection
 
@@ -15,6 +24,42 @@ __all__ = [
     "Athena"
 ]
 
+DEFAULT_CATALOG = "AwsDataCatalog"
+# table formats read directly from S3 files, others need SerDe properties only the query engine applies
+DIRECT_FORMATS = {FileFormat.parquet, FileFormat.orc}
+# partition types compared to plain string literals
+STRING_TYPES = {"string", "varchar", "char"}
+
+
+def quote_identifier(name: str) -> str:
+    return '"%s"' % name.replace('"', '""')
+
+
+def partition_literal(value: str, sqltype: str) -> str:
+    literal = "'%s'" % value.replace("'", "''")
+    if sqltype.split("(", 1)[0].lower() in STRING_TYPES:
+        return literal
+    return "CAST(%s AS %s)" % (literal, sqltype)
+
+
+def partition_predicates(partition_filter: dict, partition_keys: list[dict]) -> list[str]:
+    """
+    SQL predicates of partition filter dict {key: value or list of values}
+    """
+    types = {d["Name"]: d["Type"] for d in partition_keys}
+    predicates = []
+    for key, expected in partition_filter.items():
+        if key not in types:
+            continue
+        if not isinstance(expected, (list, tuple, set, frozenset)):
+            expected = (expected,)
+        values = [partition_literal(str(_), types[key]) for _ in expected if _ is not None]
+        checks = ["%s IN (%s)" % (quote_identifier(key), ", ".join(values))] if values else []
+        if len(values) < len(expected):
+            checks.append("%s IS NULL" % quote_identifier(key))
+        predicates.append("(%s)" % " OR ".join(checks))
+    return predicates
+
 
 class AthenaConnection(Connection):
 
@@ -24,28 +69,227 @@ class AthenaConnection(Connection):
 
 
 class Athena(DataFileSystem):
+    DIALECT = ATHENA_DIALECT.name
 
     def __init__(
         self,
         region_name: str,
         profile_name: Optional[str] = None,
-        fs_builder: Callable[[Any], FileSystem] = DataFileSystem.get_s3
+        fs_builder: Callable[[Any], FileSystem] = DataFileSystem.get_s3_expiring,
+        fs_ttl: Optional[float] = None,
+        output_location: Optional[str] = None,
+        workgroup: Optional[str] = None,
+        metadata_ttl: Optional[float] = 300
     ):
+        """
+        :param region_name: AWS region
+        :param profile_name: AWS profile
+        :param fs_builder: S3 FileSystem builder
+        :param fs_ttl: rebuild S3 FileSystem after this number of seconds
+        :param output_location: s3://bucket/prefix for query results and UNLOAD scratch files,
+            default workgroup output location
+        :param workgroup: Athena workgroup
+        :param metadata_ttl: cache table metadata for this number of seconds, None forever, 0 disabled
+        """
         super().__init__(
             fs_builder,
             path_sep="/",
+            fs_ttl=fs_ttl,
             region_name=region_name,
             profile_name=profile_name
         )
-        self.session = Session(profile_name=profile_name, region_name=region_name)
+        self.region_name = region_name
+        self.profile_name = profile_name
+        # boto3.Session, built with the first client: boto3 is only imported when Athena is queried
+        self.session = None
+        self.output_location = output_location
+        self.workgroup = workgroup
+        self.metadata_cache = MetadataCache(metadata_ttl) if metadata_ttl != 0 else None
+        # partition values registered by add_partitions, by (catalog, database, table)
+        self.registered_partitions: dict[tuple[str, str, str], set[tuple]] = {}
+
+        # boto3 clients are thread safe, sessions are not
+        self.client_lock = Lock()
+        self.shared_client = None
+
+    def client(self):
+        """
+        Shared thread safe athena client
+        """
+        with self.client_lock:
+            if self.shared_client is None:
+                if self.session is None:
+                    from boto3 import Session
+                    self.session = Session(profile_name=self.profile_name, region_name=self.region_name)
+                self.shared_client = self.session.client("athena")
+            return self.shared_client
 
     def connect(self) -> AthenaConnection:
-        return AthenaConnection(self, self.session.client("athena"))
+        return AthenaConnection(self, self.client())
+
+    def wait_query(
+        self,
+        client,
+        query_id: str,
+        poll_interval: float = 0.1,
+        max_poll_interval: float = 5,
+        timeout: Optional[float] = None
+    ) -> dict:
+        """
+        Poll query state with exponential backoff
+        :return: QueryExecution dict
+        """
+        start = time.monotonic()
+        while True:
+            execution = client.get_query_execution(QueryExecutionId=query_id)["QueryExecution"]
+            status = execution["Status"]
+            if status["State"] == "SUCCEEDED":
+                return execution
+            if status["State"] in ("FAILED", "CANCELLED"):
+                raise QueryFailed("%s: Query '%s' %s: %s" % (
+                    repr(self), query_id, status["State"], status.get("StateChangeReason", "")
+                ))
+            if timeout is not None and time.monotonic() - start + poll_interval > timeout:
+                client.stop_query_execution(QueryExecutionId=query_id)
+                raise TimeoutError("%s: Query '%s' still %s after %ss" % (
+                    repr(self), query_id, status["State"], timeout
+                ))
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, max_poll_interval)
+
+    def execute(
+        self,
+        query: str,
+        database: Optional[str] = None,
+        catalog: Optional[str] = None,
+        poll_interval: float = 0.1,
+        max_poll_interval: float = 5,
+        timeout: Optional[float] = None,
+        client=None
+    ) -> dict:
+        """
+        Run query and wait its completion
+        :return: QueryExecution dict
+        """
+        if client is None:
+            with self.connect() as connection:
+                return self.execute(
+                    query, database, catalog, poll_interval, max_poll_interval, timeout, connection.client
+                )
+
+        options = {"QueryString": query}
+        context = {k: v for k, v in (("Database", database), ("Catalog", catalog)) if v}
+        if context:
+            options["QueryExecutionContext"] = context
+        if self.workgroup:
+            options["WorkGroup"] = self.workgroup
+        if self.output_location:
+            options["ResultConfiguration"] = {"OutputLocation": self.output_location}
+        query_id = client.start_query_execution(**options)["QueryExecutionId"]
+        return self.wait_query(client, query_id, poll_interval, max_poll_interval, timeout)
+
+    def arrow_batches(
+        self,
+        query: str,
+        batch_size: int = 65536,
+        database: Optional[str] = None,
+        catalog: Optional[str] = None,
+        schema: Optional[Schema] = None,
+        use_threads: bool = True,
+        cleanup: bool = True,
+        poll_interval: float = 0.1,
+        max_poll_interval: float = 5,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> BatchReader:
+        """
+        Run query as UNLOAD to parquet in output_location scratch prefix, scan result files in parallel
+        :param query: SELECT statement
+        :param batch_size: max rows per batch
+        :param database: default query database
+        :param catalog: default query catalog
+        :param schema: result schema, default from query result columns metadata or parquet files
+        :param use_threads: read files and row groups in parallel
+        :param cleanup: delete result files when batches are consumed
+        :param poll_interval: first query state poll interval, doubled up to max_poll_interval
+        :param max_poll_interval: max query state poll interval
+        :param timeout: cancel query after this number of seconds
+        :param kwargs: pyarrow.dataset.Scanner options, like fragment_readahead
+        :rtype: BatchReader
+        """
+        if not self.output_location:
+            raise ValueError("%s: output_location is required to UNLOAD query results" % repr(self))
+        location = "%s/adbc-unload/%s/" % (self.output_location.rstrip("/"), os.urandom(16).hex())
+        folder = location[5:].rstrip("/")
+
+        with self.connect() as connection:
+            execution = self.execute(
+                "UNLOAD (%s) TO '%s' WITH (format = 'PARQUET', compression = 'SNAPPY')" % (query, location),
+                database, catalog, poll_interval, max_poll_interval, timeout, connection.client
+            )
+            # nested or unknown result column types keep the parquet file type
+            primitive = None
+            if schema is None:
+                columns = connection.client.get_query_results(
+                    QueryExecutionId=execution["QueryExecutionId"], MaxResults=1
+                )["ResultSet"].get("ResultSetMetadata", {}).get("ColumnInfo", [])
+                if columns:
+                    schema = schema_builder([query_result_column_to_pyarrow_field(_) for _ in columns])
+                    primitive = {_["Name"] for _ in columns if is_primitive_sqltype(_["Type"])}
+
+        fs = self.fs()
+        paths = [
+            info.path for info in self.list_files(folder, allow_not_found=True)
+            if info.size and not is_hidden(info.base_name)
+        ]
+        if not paths:
+            self.invalidate_listing(folder)
+            return BatchReader(schema if schema is not None else schema_builder([]), [], persisted=True)
+
+        scanner = files_dataset(fs, paths, [{} for _ in paths], FileFormat.parquet).scanner(
+            batch_size=batch_size,
+            use_threads=use_threads,
+            **kwargs
+        )
+
+        def batches() -> Generator[RecordBatch, None, None]:
+            try:
+                for batch in scanner.to_batches():
+                    yield batch
+            finally:
+                if cleanup:
+                    fs.delete_dir(folder)
+                self.invalidate_listing(folder)
 
-    def arrow_batches(self, query: str, batch_size: int = 65536, **kwargs) -> BatchReader:
-        raise NotImplementedError()
+        reader = BatchReader(scanner.projected_schema, batches(), persisted=False)
+        if primitive is not None:
+            schema = schema_builder([
+                schema.field(f.name) if f.name in primitive and not pa.types.is_nested(f.type) else f
+                for f in reader.schema
+            ], schema.metadata)
+        if schema is not None and schema != reader.schema:
+            # athena types: varchar(n), timestamp precision
+            reader = reader.cast(schema, safe=False)
+        return reader
 
-    def table_metadata(self, name: str, schema: Optional[str] = None, catalog: Optional[str] = None) -> dict:
+    def table_metadata(
+        self,
+        name: str,
+        schema: Optional[str] = None,
+        catalog: Optional[str] = None,
+        refresh: bool = False
+    ) -> dict:
+        """
+        :param name: table name
+        :param schema: database name
+        :param catalog: catalog name, default AwsDataCatalog
+        :param refresh: bypass metadata cache
+        """
+        catalog = catalog or DEFAULT_CATALOG
+        if self.metadata_cache is not None and not refresh:
+            meta = self.metadata_cache.get(catalog, schema, name)
+            if meta is not None:
+                return meta
         try:
             with self.connect() as connection:
                 meta = connection.client.get_table_metadata(
@@ -53,19 +297,143 @@ class Athena(DataFileSystem):
                     DatabaseName=schema,
                     TableName=name
                 )["TableMetadata"]
-                meta["catalog"] = catalog
-                meta["database"] = schema
-                return meta
         except Exception as e:
             if "EntityNotFoundException" in str(e):
                 raise TableNotFound("%s: Table '%s'" % (repr(self), name))
             else:
                 raise e
+        return self.cache_metadata(catalog, schema, meta)
+
+    def cache_metadata(self, catalog: str, schema: str, meta: dict) -> dict:
+        meta["catalog"] = catalog
+        meta["database"] = schema
+        if self.metadata_cache is not None:
+            self.metadata_cache.put(catalog, schema, meta)
+        return meta
+
+    def prefetch_metadata(self, schema: str, catalog: Optional[str] = None, expression: Optional[str] = None) -> int:
+        """
+        Cache metadata of all tables in database, with paginated listing
+        :param schema: database name
+        :param catalog: catalog name, default AwsDataCatalog
+        :param expression: table name regex filter
+        :return: number of cached tables
+        """
+        catalog = catalog or DEFAULT_CATALOG
+        options = {"CatalogName": catalog, "DatabaseName": schema}
+        if expression:
+            options["Expression"] = expression
+        count = 0
+        with self.connect() as connection:
+            for page in connection.client.get_paginator("list_table_metadata").paginate(**options):
+                for meta in page["TableMetadataList"]:
+                    self.cache_metadata(catalog, schema, meta)
+                    count += 1
+        return count
+
+    def invalidate_metadata(
+        self,
+        name: Optional[str] = None,
+        schema: Optional[str] = None,
+        catalog: Optional[str] = None
+    ):
+        """
+        Drop cached metadata, all tables if name is None
+        """
+        if self.metadata_cache is not None:
+            self.metadata_cache.invalidate(catalog, schema, name)
 
     def table_schema(self, name: str, schema: Optional[str] = None, catalog: Optional[str] = None) -> Schema:
         meta = self.table_metadata(name, schema, catalog)
         return dict_table_metadata_to_pyarrow_schema(meta["catalog"], meta["database"], meta)
 
+    def read_table(
+        self,
+        name: str,
+        schema: Optional[str] = None,
+        catalog: Optional[str] = None,
+        columns: Optional[list[str]] = None,
+        partition_filter: Optional[Union[dict, Callable[[dict], bool]]] = None,
+        filter: Optional[Expression] = None,
+        where: Optional[str] = None,
+        batch_size: int = 65536,
+        use_threads: bool = True,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> BatchReader:
+        """
+        Scan table files straight from its S3 location, without query engine
+
+        Partition folders are pruned with partition_filter, columns projected and files read in parallel.
+        Tables in formats needing SerDe properties (csv, json ...) or where SQL predicates fall back to
+        an UNLOAD query, see arrow_batches
+
+        :param name: table name
+        :param schema: database name
+        :param catalog: catalog name
+        :param columns: projected columns
+        :param partition_filter: dict {key: value or list of values} or callable(dict[str, str]) -> bool,
+            callables are not supported by query fallback
+        :param filter: pyarrow.compute.Expression, prune partitions and row groups, applied on fallback results
+        :param where: SQL predicate, forces query fallback
+        :param batch_size: max rows per batch
+        :param use_threads: read files and row groups in parallel
+        :param timeout: cancel fallback query after this number of seconds
+        :param kwargs: pyarrow.dataset.Scanner options, like fragment_readahead
+        :rtype: BatchReader
+        """
+        meta = self.table_metadata(name, schema, catalog)
+        parameters = meta["Parameters"]
+        file_format = parameters.get("classification")
+        schema_arrow = dict_table_metadata_to_pyarrow_schema(meta["catalog"], meta["database"], meta)
+
+        if where is None and file_format in DIRECT_FORMATS:
+            # files listed, partitions registered elsewhere than location key=value folders are not read
+            return DataFileSystem.arrow_batches(
+                self,
+                parameters["location"][5:].rstrip("/"),
+                batch_size=batch_size,
+                file_format=file_format,
+                columns=columns,
+                filter=filter,
+                partition_filter=partition_filter,
+                schema=schema_arrow,
+                use_threads=use_threads,
+                manifest=False,
+                # files written by athena have no extension
+                extensionless=True,
+                **kwargs
+            )
+
+        if callable(partition_filter):
+            raise ValueError("%s: callable partition_filter cannot be evaluated by Athena, use a dict" % repr(self))
+        predicates = partition_predicates(partition_filter or {}, meta.get("PartitionKeys", []))
+        if where:
+            predicates.append("(%s)" % where)
+        # filter columns are projected after filtering
+        selected = columns if columns and filter is None else [f.name for f in schema_arrow]
+        query = "SELECT %s FROM %s.%s" % (
+            ", ".join(quote_identifier(_) for _ in selected),
+            quote_identifier(meta["database"]), quote_identifier(name)
+        )
+        if predicates:
+            query += " WHERE " + " AND ".join(predicates)
+
+        reader = self.arrow_batches(
+            query, batch_size, meta["database"], meta["catalog"],
+            schema=schema_builder([schema_arrow.field(_) for _ in selected], schema_arrow.metadata),
+            use_threads=use_threads,
+            timeout=timeout,
+            **kwargs
+        )
+        if filter is None:
+            return reader
+        import pyarrow.dataset as ds
+        scanner = ds.Scanner.from_batches(
+            reader.to_reader(), columns=columns, filter=filter, batch_size=batch_size
+        )
+        return BatchReader(scanner.projected_schema, scanner.to_batches(), persisted=False)
+
     def write(
         self,
         table: str,
@@ -77,8 +445,8 @@ class Athena(DataFileSystem):
         meta = self.table_metadata(table, schema, catalog)
         parameters = meta["Parameters"]
         file_format = parameters["classification"]
-        base_dir = parameters["location"][5:]
-        partition_by = [d["Name"] for d in meta.get("PartitionKeys", [])]
+        location = base_dir = parameters["location"][5:].rstrip("/")
+        partition_keys = partition_by = [d["Name"] for d in meta.get("PartitionKeys", [])]
         schema_arrow = dict_table_metadata_to_pyarrow_schema(meta["catalog"], meta["database"], meta)
 
         if partition_values:
@@ -92,13 +460,65 @@ class Athena(DataFileSystem):
                 schema_arrow.metadata
             )
 
-        return super(Athena, self).write(
-            table,
+        if kwargs.get("compression") is None and file_format == FileFormat.parquet:
+            kwargs["compression"] = "snappy"
+
+        return AthenaWriter(
+            self,
             base_dir,
             file_format,
-            None,
-            partition_by,
-            schema,
-            catalog,
-            schema_arrow
+            table,
+            location=location,
+            partition_keys=partition_keys,
+            partition_by=partition_by,
+            schema=schema,
+            catalog=catalog,
+            schema_arrow=schema_arrow,
+            **kwargs
         )
+
+    def add_partitions(
+        self,
+        table: str,
+        partitions: list[dict[str, str]],
+        schema: Optional[str] = None,
+        catalog: Optional[str] = None,
+        chunk_size: int = 100
+    ) -> int:
+        """
+        Register partitions with multi partition ALTER TABLE ADD IF NOT EXISTS statements,
+        partitions already registered by this instance are skipped
+        :param table: table name
+        :param partitions: partition values as strings, for all table partition keys
+        :param schema: database name
+        :param catalog: catalog name
+        :param chunk_size: partitions per statement
+        :return: number of partitions sent
+        """
+        meta = self.table_metadata(table, schema, catalog)
+        location = meta["Parameters"]["location"].rstrip("/")
+        keys = [d["Name"] for d in meta.get("PartitionKeys", [])]
+        registered = self.registered_partitions.setdefault((meta["catalog"], schema, table.lower()), set())
+
+        new, specs, seen = [], [], set()
+        for values in partitions:
+            key = tuple(values[_] for _ in keys)
+            if key in registered or key in seen:
+                continue
+            seen.add(key)
+            new.append(key)
+            specs.append("PARTITION (%s) LOCATION '%s/%s/'" % (
+                ", ".join("`%s` = '%s'" % (k, values[k].replace("'", "''")) for k in keys),
+                location,
+                "/".join("%s=%s" % (k, quote_plus(values[k])) for k in keys)
+            ))
+
+        for i in range(0, len(specs), chunk_size):
+            self.execute(
+                "ALTER TABLE `%s`.`%s` ADD IF NOT EXISTS\n%s" % (
+                    schema, table, "\n".join(specs[i:i + chunk_size])
+                ),
+                schema, meta["catalog"]
+            )
+            registered.update(new[i:i + chunk_size])
+        return len(specs)
@@ -0,0 +1,61 @@
+from typing import Generator, Optional
+
+from adbc.filesystem import DFSWriter
+from adbc.filesystem.dataset import path_partition_values
+from adbc.reader import BatchReader
+
+__all__ = [
+    "AthenaWriter"
+]
+
+
+class AthenaWriter(DFSWriter):
+    """
+    DFSWriter registering partitions of written files in the Athena table
+    """
+
+    def __init__(
+        self,
+        server: "Athena",
+        base_dir: str,
+        file_format: str,
+        table: str = "",
+        location: Optional[str] = None,
+        partition_keys: list[str] = (),
+        **kwargs
+    ):
+        """
+        :param location: table location folder, without s3://
+        :param partition_keys: table partition keys, in table order
+        :param kwargs: DFSWriter options
+        """
+        super().__init__(server, base_dir, file_format, table, **kwargs)
+        self.location = location if location is not None else base_dir
+        self.partition_keys = list(partition_keys)
+
+    def write_batches(
+        self,
+        batches: BatchReader,
+        chunk_size: int = 65536,
+        cast: bool = True,
+        safe: bool = True,
+        append: bool = True,
+        register_partitions: bool = True,
+        **kwargs
+    ) -> Generator[str, None, None]:
+        """
+        :param register_partitions: add new partitions to the table once all files are written
+        :param kwargs: DFSWriter.write_batches options
+        """
+        partitions: dict[tuple, dict[str, str]] = {}
+        for filepath in super().write_batches(batches, chunk_size, cast, safe, append, **kwargs):
+            if register_partitions and self.partition_keys:
+                values = path_partition_values(filepath, self.location, self.path_sep) or {}
+                key = tuple(values.get(_) for _ in self.partition_keys)
+                # null partition values are not registered
+                if None not in key:
+                    partitions[key] = {_: values[_] for _ in self.partition_keys}
+            yield filepath
+
+        if partitions:
+            self.server.add_partitions(self.table, list(partitions.values()), self.schema, self.catalog)
@@ -0,0 +1,165 @@
+from typing import Callable, Optional, Any, Hashable
+
+import pyarrow as pa
+from pyarrow import DataType, Field, Schema
+
+__all__ = [
+    "Dialect",
+    "register_dialect",
+    "get_dialect",
+    "split_sqltype",
+    "time_precision"
+]
+
+DIALECTS: dict[str, "Dialect"] = {}
+
+
+def split_sqltype(sqltype: str) -> tuple[str, Optional[tuple]]:
+    """
+    'decimal(18, 4)' -> ('decimal', (18, 4)), 'int' -> ('int', None)
+    """
+    sqltype = sqltype.strip()
+    if "(" not in sqltype or not sqltype.endswith(")"):
+        return sqltype.lower(), None
+    key, args = sqltype.split("(", 1)
+    return key.strip().lower(), tuple(
+        int(_) if _.strip().isnumeric() else _.strip() for _ in args[:-1].split(",") if _.strip()
+    )
+
+
+def time_precision(dtype: DataType) -> int:
+    """
+    Fractional second digits of time and timestamp units
+    """
+    return {"s": 0, "ms": 3, "us": 6, "ns": 9}[dtype.unit]
+
+
+class Dialect:
+    """
+    Type mapping of a SQL dialect: type names to Arrow types, Arrow types to DDL type names
+
+    Parsed types and DDL names are memoized: resolving a known type costs a dict lookup
+    """
+
+    def __init__(
+        self,
+        name: str,
+        datatypes: dict[Hashable, Callable[..., DataType]],
+        sqltypes: Optional[dict[DataType, str]] = None,
+        to_sql: Optional[Callable[["Dialect", DataType], str]] = None,
+        parse: Optional[Callable[..., DataType]] = None,
+        unit: str = "ns",
+        tz: Optional[str] = None,
+        quote: str = '"%s"'
+    ):
+        """
+        :param name: dialect name
+        :param datatypes: builders(precision=None, scale=None, unit=, tz=) -> DataType by lower case type name,
+            or python type for driver descriptions
+        :param sqltypes: precomputed DDL names of Arrow types
+        :param to_sql: callable(dialect, dtype) -> DDL name of types missing in sqltypes
+        :param parse: callable(sqltype, precision, scale, unit, tz) -> DataType replacing datatypes name parsing,
+            for nested types
+        :param unit: default timestamp unit
+        :param tz: default timestamp timezone
+        :param quote: identifier quoting
+        """
+        self.name = name
+        self.datatypes = datatypes
+        self.sqltypes = dict(sqltypes or {})
+        self.sql_builder = to_sql
+        self.parse = parse
+        self.unit = unit
+        self.tz = tz
+        self.quote = quote
+        self.cache: dict[tuple, DataType] = {}
+
+    def __repr__(self):
+        return "Dialect(%s)" % self.name
+
+    def to_arrow(
+        self,
+        sqltype: Any,
+        precision: Optional[int] = None,
+        scale: Optional[int] = None,
+        unit: Optional[str] = None,
+        tz: Optional[str] = None
+    ) -> DataType:
+        """
+        :param sqltype: type name, with parameters like 'decimal(18,4)', or python type
+        :param precision: precision, overridden by type name parameters
+        :param scale: scale, overridden by type name parameters
+        :param unit: timestamp unit, default dialect unit
+        :param tz: timestamp timezone, default dialect timezone
+        :raise KeyError: unknown type
+        """
+        key = (sqltype, precision, scale, unit, tz)
+        dtype = self.cache.get(key)
+        if dtype is None:
+            dtype = self.cache[key] = self.build(sqltype, precision, scale, unit or self.unit, tz or self.tz)
+        return dtype
+
+    def build(self, sqltype: Any, precision: Optional[int], scale: Optional[int], unit: str, tz: Optional[str]):
+        if isinstance(sqltype, str):
+            if self.parse is not None:
+                return self.parse(sqltype, precision, scale, unit, tz)
+            key, args = split_sqltype(sqltype)
+            if args:
+                precision = args[0]
+                scale = args[1] if len(args) > 1 else scale
+        else:
+            key = sqltype
+        if key not in self.datatypes:
+            raise KeyError("%s: unknown type '%s', known types are %s" % (repr(self), sqltype, list(self.datatypes)))
+        # builders keep their own defaults for missing parameters
+        kwargs = {"unit": unit, "tz": tz}
+        if precision is not None:
+            kwargs["precision"] = precision
+        if scale is not None:
+            kwargs["scale"] = scale
+        return self.datatypes[key](**kwargs)
+
+    def to_sql(self, dtype: DataType) -> str:
+        """
+        DDL type name of Arrow type
+        :raise NotImplementedError: type without mapping
+        """
+        sqltype = self.sqltypes.get(dtype)
+        if sqltype is None:
+            if pa.types.is_dictionary(dtype):
+                sqltype = self.to_sql(dtype.value_type)
+            elif self.sql_builder is not None:
+                sqltype = self.sql_builder(self, dtype)
+            if sqltype is None:
+                raise NotImplementedError("%s: no SQL type for %s" % (repr(self), dtype))
+            self.sqltypes[dtype] = sqltype
+        return sqltype
+
+    def quote_identifier(self, name: str) -> str:
+        return self.quote % name
+
+    def column_ddl(self, field: Field) -> str:
+        return "%s %s%s" % (
+            self.quote_identifier(field.name), self.to_sql(field.type), "" if field.nullable else " NOT NULL"
+        )
+
+    def create_table(self, table: str, schema: Schema, database: Optional[str] = None) -> str:
+        """
+        CREATE TABLE statement of Arrow schema
+        """
+        name = self.quote_identifier(table)
+        if database:
+            name = self.quote_identifier(database) + "." + name
+        return "CREATE TABLE %s (\n  %s\n)" % (name, ",\n  ".join(self.column_ddl(_) for _ in schema))
+
+
+def register_dialect(dialect: Dialect) -> Dialect:
+    DIALECTS[dialect.name] = dialect
+    return dialect
+
+
+def get_dialect(name: str) -> Dialect:
+    try:
+        return DIALECTS[name]
+    except KeyError:
+        raise KeyError("Unknown dialect '%s', registered dialects are %s" % (name, list(DIALECTS)))
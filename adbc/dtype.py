@@ -8,6 +8,8 @@ import pyarrow.compute as pc
 from pyarrow import RecordBatch, Schema, schema as schema_builder, Field, field as field_builder, Array, Decimal128Type, \
     Decimal256Type, TimestampType, ArrowInvalid, Table, array, Time32Type, DataType
 
+from adbc.dialect import Dialect, register_dialect, time_precision
+
 STRING = UTF8 = pa.string()
 LARGE_STRING = pa.large_string()
 BOOL = BOOLEAN = pa.bool_()
@@ -119,6 +121,32 @@ ALL_DATATYPES = {
 }
 
 
+def ansi_sqltype(dialect: Dialect, dtype: DataType) -> Optional[str]:
+    if pa.types.is_decimal(dtype):
+        return "decimal(%s,%s)" % (dtype.precision, dtype.scale)
+    if pa.types.is_timestamp(dtype):
+        return "timestamp(%s)%s" % (time_precision(dtype), " with time zone" if dtype.tz else "")
+    if pa.types.is_time(dtype):
+        return "time(%s)" % time_precision(dtype)
+    if pa.types.is_fixed_size_binary(dtype):
+        return "binary(%s)" % dtype.byte_width
+    return None
+
+
+ANSI = register_dialect(Dialect(
+    "ansi",
+    ALL_DATATYPES,
+    {
+        BOOL: "boolean", INT8: "tinyint", INT16: "smallint", INT32: "int", INT64: "bigint",
+        UINT8: "smallint", UINT16: "int", UINT32: "bigint", UINT64: "decimal(20,0)",
+        FLOAT16: "real", FLOAT32: "real", FLOAT64: "double",
+        STRING: "varchar", LARGE_STRING: "varchar", BINARY: "varbinary", LARGE_BINARY: "varbinary",
+        DATE32: "date", DATE64: "date"
+    },
+    ansi_sqltype
+))
+
+
 def get_field(
     schema: Schema,
     name: str,
@@ -326,16 +354,11 @@ def cast_batch(
 
 
 def safe_datatype(dtype: Union[DataType, Field, Any]) -> DataType:
+    """
+    DataType from DataType, Field, type name like 'decimal(18,4)' or python type, memoized in ANSI dialect
+    """
     if isinstance(dtype, DataType):
         return dtype
-    if isinstance(dtype, str):
-        if dtype in STRING_DATATYPES:
-            return STRING_DATATYPES[dtype]()
-        elif '(' in dtype:
-            key, args = dtype.split("(", 1)
-            return STRING_DATATYPES[key](*(
-                int(_) if _.strip().isnumeric() else _.strip() for _ in args[:-1].split(",")
-            ))
-    elif isinstance(dtype, Field):
+    if isinstance(dtype, Field):
         return dtype.type
-    return ALL_DATATYPES[dtype]()
+    return ANSI.to_arrow(dtype)
@@ -6,4 +6,10 @@ class Protocol:
 class FileFormat:
     parquet = "parquet"
     csv = "csv"
+    # arrow ipc file, readable as feather v2
+    arrow = "arrow"
+    feather = "feather"
+    # arrow ipc stream
+    arrows = "arrows"
+    orc = "orc"
 
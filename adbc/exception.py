@@ -4,3 +4,11 @@ class ResourceNotFound(ValueError):
 
 class TableNotFound(ResourceNotFound):
     pass
+
+
+class QueryFailed(RuntimeError):
+    pass
+
+
+class MemoryBudgetExceeded(MemoryError):
+    pass
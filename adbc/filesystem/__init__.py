@@ -1,13 +1,31 @@
 import os
-from typing import Callable, Optional, Any, Generator
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Optional, Any, Generator, Union
 from urllib.parse import quote_plus
 
-from pyarrow import Schema, NativeFile
-from pyarrow.fs import FileInfo, FileSelector, FileSystem, FileType, LocalFileSystem
+from pyarrow import Schema, NativeFile, RecordBatch, Table, Buffer, BufferOutputStream, CompressedOutputStream, \
+    schema as schema_builder
+from pyarrow.compute import Expression
+from pyarrow.fs import FileInfo, FileSelector, FileSystem, LocalFileSystem
 
+from adbc import instrumentation
 from adbc.arrow import partitions
 from adbc.enums import Protocol, FileFormat
 from adbc.exception import TableNotFound
+from adbc.filesystem.dataset import path_partition_values, file_format_of, files_dataset, is_hidden, \
+    match_partition
+from adbc.filesystem.manifest import STAGING_NAME, ColumnStatistics, manifest_entry, update_manifest, \
+    read_manifest
+from adbc.filesystem.listing import ListingCache, iter_files
+from adbc.filesystem.compaction import COMPACTION_RELIST, is_compaction_marker, compaction_excluded, \
+    recover_folder, compact_folder
+from adbc.filesystem.upload import MultipartUploader
+from adbc.filesystem.tuning import sample_batches, parquet_options
+from adbc.filesystem.sort import sort_keys, external_sort
+from adbc.memory import MemoryBudget, resolve_budget
 from adbc.reader import BatchReader
 from adbc.server import Server, Connection
 from adbc.writer.batchwriter import BatchWriter
@@ -16,6 +34,9 @@ __all__ = [
     "DataFileSystem", "DFSWriter"
 ]
 
+# botocore refreshes temporary credentials expiring within 10 minutes before freezing them
+CREDENTIALS_VALIDITY = 600
+
 
 class DataFileSystem(Server):
 
@@ -27,17 +48,23 @@ class DataFileSystem(Server):
         fs: FileSystem,
         path: str,
         allow_not_found: bool = False,
+        recursive: Optional[bool] = None,
+        partition_filter: Optional[Union[dict, Callable[[dict], bool]]] = None,
+        prefix: Optional[str] = None,
+        skip_hidden: bool = False,
+        max_workers: int = 16,
+        cache: Optional[ListingCache] = None
     ) -> Generator[FileInfo, None, None]:
-        for ofs in fs.get_file_info(
-            FileSelector(path, allow_not_found=allow_not_found, recursive=False)
-        ):
-            # <FileInfo for 'path': type=FileType.Directory>
-            # or <FileInfo for 'path': type=FileType.File, size=0>
-            if ofs.is_file:
-                yield ofs
-            elif ofs.type == FileType.Directory:
-                for file in DataFileSystem.iter_dir_files(fs, ofs.path, allow_not_found):
-                    yield file
+        # <FileInfo for 'path': type=FileType.File, size=0>
+        return iter_files(
+            fs, path, allow_not_found,
+            recursive=recursive,
+            partition_filter=partition_filter,
+            prefix=prefix,
+            skip_hidden=skip_hidden,
+            max_workers=max_workers,
+            cache=cache
+        )
 
     @staticmethod
     def get_local():
@@ -45,28 +72,108 @@ class DataFileSystem(Server):
 
     @staticmethod
     def get_s3(region_name: str, profile_name: Optional[str] = None, **kwargs) -> "S3FileSystem":
+        """
+        Build S3FileSystem with profile credentials, DataFileSystem rebuilds it as get_s3_expiring
+        """
+        return DataFileSystem.get_s3_expiring(region_name, profile_name, **kwargs)[0]
+
+    @staticmethod
+    def get_s3_expiring(
+        region_name: str,
+        profile_name: Optional[str] = None,
+        **kwargs
+    ) -> tuple["S3FileSystem", Optional[float]]:
+        """
+        Build S3FileSystem with profile credentials
+        :return: S3FileSystem, timestamp until which temporary credentials are valid or None
+        """
         from pyarrow.fs import S3FileSystem
+        expiry = None
         if profile_name:
             from boto3 import Session
+            from botocore.credentials import RefreshableCredentials
             credentials = Session(profile_name=profile_name).get_credentials()
+            # temporary credentials: assumed role, sso
+            if isinstance(credentials, RefreshableCredentials):
+                expiry = time.time() + CREDENTIALS_VALIDITY
+            # refreshed first if expiring within CREDENTIALS_VALIDITY
+            credentials = credentials.get_frozen_credentials()
             kwargs["secret_key"] = credentials.secret_key
             kwargs["access_key"] = credentials.access_key
             kwargs["session_token"] = credentials.token
-        return S3FileSystem(region=region_name, **kwargs)
+        return S3FileSystem(region=region_name, **kwargs), expiry
 
     def __init__(
         self,
         fs_builder: Callable[[Any], FileSystem],
         path_sep: str = "/",
+        listing_ttl: Optional[float] = None,
+        fs_ttl: Optional[float] = None,
+        refresh_margin: float = 300,
         **fs_options
     ):
+        """
+        :param fs_builder: callable(**fs_options) -> FileSystem or (FileSystem, expiry timestamp)
+        :param path_sep: path separator
+        :param listing_ttl: cache directory listings for this number of seconds
+        :param fs_ttl: rebuild shared FileSystem after this number of seconds, default never
+        :param refresh_margin: rebuild shared FileSystem this number of seconds before credentials expiry
+        :param fs_options: fs_builder options
+        """
         super(DataFileSystem, self).__init__(protocol=Protocol.dfs)
+        if fs_builder is DataFileSystem.get_s3:
+            # rebuilt before temporary credentials expire
+            fs_builder = DataFileSystem.get_s3_expiring
         self.fs_builder = fs_builder
         self.fs_options = fs_options
         self.path_sep = path_sep
+        self.listing_cache = ListingCache(listing_ttl) if listing_ttl else None
+
+        self.fs_ttl = fs_ttl
+        self.refresh_margin = refresh_margin
+        self.fs_lock = Lock()
+        self.shared_fs: Optional[FileSystem] = None
+        self.shared_fs_expiry: Optional[float] = None
+
+    def fs(self) -> FileSystem:
+        """
+        Shared thread safe FileSystem, rebuilt before its credentials expire
+        """
+        with self.fs_lock:
+            if self.shared_fs is None or (
+                self.shared_fs_expiry is not None and self.shared_fs_expiry <= time.time()
+            ):
+                self.shared_fs, self.shared_fs_expiry = self.build_fs()
+            return self.shared_fs
 
-    def fs(self):
-        return self.fs_builder(**self.fs_options)
+    def build_fs(self) -> tuple[FileSystem, Optional[float]]:
+        built = self.fs_builder(**self.fs_options)
+        fs, expiry = built if isinstance(built, tuple) else (built, None)
+        if expiry is not None:
+            expiry -= self.refresh_margin
+        if self.fs_ttl is not None:
+            expiry = min(expiry, time.time() + self.fs_ttl) if expiry is not None else time.time() + self.fs_ttl
+        return fs, expiry
+
+    def reset_fs(self):
+        """
+        Drop shared FileSystem, next fs() call builds a new one with fresh credentials
+        """
+        with self.fs_lock:
+            self.shared_fs, self.shared_fs_expiry = None, None
+
+    def list_files(self, path: str, allow_not_found: bool = False, **kwargs) -> Generator[FileInfo, None, None]:
+        """
+        List files in folder tree, with listing cache
+        :param path: base folder
+        :param allow_not_found: no error if path does not exist
+        :param kwargs: DataFileSystem.iter_dir_files options
+        """
+        return self.iter_dir_files(self.fs(), path, allow_not_found, cache=self.listing_cache, **kwargs)
+
+    def invalidate_listing(self, path: Optional[str] = None):
+        if self.listing_cache is not None:
+            self.listing_cache.invalidate(path if self.path_sep == "/" else path.replace(self.path_sep, "/"))
 
     def table_schema(self, name: str, schema: Optional[str] = None, catalog: Optional[str] = None) -> Schema:
         raise TableNotFound("%s: Table '%s'" % (repr(self), name))
@@ -75,9 +182,172 @@ class DataFileSystem(Server):
         self,
         query: str,
         batch_size: int = 65536,
+        file_format: Optional[str] = None,
+        columns: Optional[list[str]] = None,
+        filter: Optional[Expression] = None,
+        partition_filter: Optional[Union[dict, Callable[[dict], bool]]] = None,
+        schema: Optional[Schema] = None,
+        use_threads: bool = True,
+        manifest: Optional[bool] = None,
+        extensionless: bool = False,
         **kwargs
     ) -> BatchReader:
-        raise NotImplementedError()
+        """
+        Scan files written by DFSWriter in base directory
+        :param query: base directory
+        :param batch_size: max rows per batch
+        :param file_format: adbc.enums.FileFormat, default from first file extension
+        :param columns: projected columns
+        :param filter: pyarrow.compute.Expression, prune partitions and parquet row groups with statistics
+        :param partition_filter: dict {key: value or list of values} or callable(dict[str, str]) -> bool,
+            pruned before opening files
+        :param schema: expected schema, default first file schema with partition columns
+        :param use_threads: read files and row groups in parallel
+        :param manifest: plan files from committed manifest without listing, default if base directory has one
+        :param extensionless: read files without extension as file_format, like written by query engines,
+            else they are skipped
+        :param kwargs: pyarrow.dataset.Scanner options, like fragment_readahead
+        :rtype: BatchReader
+        """
+        fs = self.fs()
+        paths, partitions, markers, statistics = [], [], [], None
+
+        content = read_manifest(fs, query) if manifest is not False else None
+        if content is not None:
+            file_format = file_format or content["format"]
+            schema = schema if schema is not None else content["schema"]
+            statistics = []
+            for entry in content["files"]:
+                if match_partition(entry["partition"], partition_filter):
+                    paths.append(query + self.path_sep + entry["path"].replace("/", self.path_sep))
+                    partitions.append(entry["partition"])
+                    statistics.append(entry["columns"])
+        elif manifest:
+            raise FileNotFoundError("%s: no manifest in '%s'" % (repr(self), query))
+
+        for attempt in range(COMPACTION_RELIST + 1 if content is None else 0):
+            paths, partitions, markers = [], [], []
+            for info in self.list_files(query, True, partition_filter=partition_filter, skip_hidden=True):
+                if is_compaction_marker(info.base_name):
+                    markers.append(info.path)
+                    continue
+                values = path_partition_values(info.path, query, self.path_sep)
+                if values is None:
+                    continue
+                if file_format is None:
+                    file_format = file_format_of(info.path)
+                elif file_format_of(info.path) != file_format and not (
+                    extensionless and "." not in info.base_name
+                ):
+                    continue
+                paths.append(info.path)
+                partitions.append(values)
+
+            if not markers:
+                break
+            # hide files replaced by running compactions
+            excluded, stale = compaction_excluded(fs, markers, set(paths))
+            if not stale:
+                kept = [i for i, path in enumerate(paths) if path not in excluded]
+                paths, partitions = [paths[i] for i in kept], [partitions[i] for i in kept]
+                break
+            if attempt == COMPACTION_RELIST:
+                raise OSError("%s: '%s' listing changed by compactions %d times" % (repr(self), query, attempt + 1))
+            for folder in stale:
+                self.invalidate_listing(folder)
+
+        if not paths:
+            if schema is None:
+                raise FileNotFoundError("%s: no %s files in '%s'" % (repr(self), file_format or "data", query))
+            if columns:
+                schema = schema_builder([schema.field(_) for _ in columns], schema.metadata)
+            return BatchReader(schema, [], persisted=True)
+
+        scanner = files_dataset(fs, paths, partitions, file_format, schema, statistics).scanner(
+            columns=columns,
+            filter=filter,
+            batch_size=batch_size,
+            use_threads=use_threads,
+            **kwargs
+        )
+        return BatchReader(scanner.projected_schema, scanner.to_batches(), persisted=False)
+
+    def compact(
+        self,
+        base_dir: str,
+        file_format: Optional[str] = None,
+        min_file_bytes: int = 32 * 1024 * 1024,
+        target_file_bytes: int = 256 * 1024 * 1024,
+        partition_filter: Optional[Union[dict, Callable[[dict], bool]]] = None,
+        compression: Optional[str] = None,
+        schema: Optional[Schema] = None,
+        max_workers: Optional[int] = 8
+    ) -> list[str]:
+        """
+        Merge small files of each partition folder into target sized files
+
+        Merged files are streamed in a hidden staging folder, then published with a hidden
+        compaction marker so arrow_batches never returns both merged and source files
+
+        :param base_dir: base directory written by DFSWriter
+        :param file_format: adbc.enums.FileFormat, default from files extension
+        :param min_file_bytes: compact files smaller than this
+        :param target_file_bytes: merged files max_file_bytes
+        :param partition_filter: compact matching partitions only
+        :param compression: merged files compression, default parquet snappy or csv file extension
+        :param schema: merged files schema, default first file schema
+        :param max_workers: partitions compacted in parallel
+        :return: merged file paths
+        """
+        manifest = read_manifest(self.fs(), base_dir)
+        committed = {
+            base_dir + self.path_sep + _["path"].replace("/", self.path_sep) for _ in manifest["files"]
+        } if manifest is not None else None
+
+        def list_folders() -> tuple[dict[str, list[FileInfo]], dict[str, list[str]]]:
+            files, markers = {}, {}
+            for info in self.list_files(base_dir, True, partition_filter=partition_filter, skip_hidden=True):
+                folder = info.path.rsplit("/", 1)[0]
+                if is_compaction_marker(info.base_name):
+                    markers.setdefault(folder, []).append(info.path)
+                elif committed is not None and info.path not in committed:
+                    # not published in manifest
+                    continue
+                elif path_partition_values(info.path, base_dir, self.path_sep) is not None:
+                    files.setdefault(folder, []).append(info)
+            return files, markers
+
+        folders, markers = list_folders()
+        if markers:
+            # interrupted compactions
+            fs = self.fs()
+            for folder, folder_markers in markers.items():
+                recover_folder(fs, folder_markers, {_.path for _ in folders.get(folder, [])})
+                self.invalidate_listing(folder)
+            folders, _ = list_folders()
+
+        jobs = []
+        for folder, infos in folders.items():
+            folder_format = file_format or file_format_of(infos[0].path)
+            small = [
+                _ for _ in infos
+                if _.size < min_file_bytes and file_format_of(_.path) == folder_format
+            ]
+            if len(small) > 1:
+                folder_compression = compression
+                if folder_compression is None:
+                    folder_compression = file_compression_of(small[0].path, folder_format)
+                jobs.append((folder, small, folder_format, folder_compression))
+
+        with ThreadPoolExecutor(max_workers) as executor:
+            futures = [
+                executor.submit(
+                    compact_folder, self, folder, small, folder_format, target_file_bytes,
+                    folder_compression, schema, base_dir=base_dir
+                )
+                for folder, small, folder_format, folder_compression in jobs
+            ]
+            return [path for future in futures for path in future.result()]
 
     def write(
         self,
@@ -111,6 +381,127 @@ class DataFileSystem(Server):
 
 # ---------------------------------------------- WRITER ----------------------------------------------
 
+# formats compressing their own buffers, named .<compression>.<format>
+BUFFER_COMPRESSION_FORMATS = {
+    FileFormat.parquet, FileFormat.arrow, FileFormat.feather, FileFormat.arrows, FileFormat.orc
+}
+
+# extensions of compressed streams detected by pyarrow readers
+COMPRESSION_EXTENSIONS = {
+    "gzip": "gz",
+    "bz2": "bz2",
+    "zstd": "zst",
+    "lz4": "lz4"
+}
+
+# parquet files are rolled over rather than ending with a row group under this ratio of the row group target
+MIN_ROW_GROUP_RATIO = 0.25
+
+
+def file_compression_of(path: str, file_format: str) -> Optional[str]:
+    """
+    Compression from DFSWriter file extension: name.<compression>.<format> or name.<format>.<extension>
+    """
+    extensions = path.rsplit("/", 1)[-1].split(".")[1:]
+    if file_format in BUFFER_COMPRESSION_FORMATS:
+        return extensions[-2] if len(extensions) > 1 and extensions[-1] == file_format else None
+    return {v: k for k, v in COMPRESSION_EXTENSIONS.items()}.get(extensions[-1]) if extensions else None
+
+
+class StreamClosingWriter:
+    """
+    Record batch writer closing its output stream on close
+    """
+
+    def __init__(self, writer, stream: NativeFile):
+        self.writer = writer
+        self.stream = stream
+
+    def write_batch(self, batch: RecordBatch):
+        self.writer.write_batch(batch)
+
+    def write_table(self, table: Table):
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+        self.stream.close()
+
+
+class ParallelCSVWriter:
+    """
+    Format and compress CSV chunks on a thread pool, written in order as concatenated
+    gzip members or zstd frames, both read as one stream by standard decompressors.
+    At most max_pending chunks are buffered, executor is shared by the files of one write
+    """
+
+    def __init__(
+        self,
+        stream: NativeFile,
+        schema: Schema,
+        write_options: "WriteOptions",
+        chunk_options: "WriteOptions",
+        compression: str,
+        threads: int,
+        chunk_rows: int = 65536,
+        max_pending: int = 8,
+        executor: Optional[ThreadPoolExecutor] = None
+    ):
+        self.stream = stream
+        self.schema = schema
+        # header in first chunk only
+        self.write_options = write_options
+        self.chunk_options = chunk_options
+        self.compression = compression
+        self.chunk_rows = chunk_rows
+        self.max_pending = max_pending
+        # own pool shut down on close
+        self.own_executor = executor is None
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="csv") if executor is None else executor
+        self.pending: deque[Future] = deque()
+        self.chunks = 0
+
+    def compress(self, table: Table, write_options: "WriteOptions") -> Buffer:
+        from pyarrow.csv import write_csv
+
+        buffer = BufferOutputStream()
+        compressed = CompressedOutputStream(buffer, self.compression)
+        write_csv(table, compressed, write_options)
+        compressed.close()
+        return buffer.getvalue()
+
+    def drain(self, max_pending: int):
+        while len(self.pending) > max_pending:
+            self.stream.write(self.pending.popleft().result())
+
+    def write_table(self, table: Table):
+        for offset in range(0, table.num_rows, self.chunk_rows):
+            self.drain(self.max_pending - 1)
+            self.pending.append(self.executor.submit(
+                self.compress,
+                table.slice(offset, self.chunk_rows),
+                self.write_options if self.chunks == 0 else self.chunk_options
+            ))
+            self.chunks += 1
+
+    def write_batch(self, batch: RecordBatch):
+        self.write_table(Table.from_batches([batch]))
+
+    def close(self):
+        try:
+            if self.chunks == 0:
+                # header only file
+                self.pending.append(self.executor.submit(
+                    self.compress, self.schema.empty_table(), self.write_options
+                ))
+                self.chunks += 1
+            self.drain(0)
+        finally:
+            for future in self.pending:
+                future.cancel()
+            if self.own_executor:
+                self.executor.shutdown(wait=True)
+
 
 def parquet_file_writer(
     fs: FileSystem,
@@ -127,10 +518,11 @@ def parquet_file_writer(
         fs.delete_dir_contents(folder, missing_dir_ok=True)
     fs.create_dir(folder)
     filepath = folder + path_sep + filename
-    return (filepath, None, ParquetWriter(
-        filepath,
+    # keep the stream to track output position
+    stream: NativeFile = fs.open_output_stream(filepath)
+    return (filepath, stream, ParquetWriter(
+        stream,
         schema,
-        filesystem=fs,
         **kwargs
     ))
 
@@ -147,8 +539,19 @@ def csv_file_writer(
     include_header: bool = True,
     batch_size: int = 1024,
     delimiter: str = ",",
+    threads: Optional[int] = None,
+    chunk_rows: int = 65536,
+    max_pending_chunks: Optional[int] = None,
+    chunk_executor: Optional[ThreadPoolExecutor] = None,
     **kwargs
 ):
+    """
+    CSV file, compressed as one stream or in parallel chunks if threads is set
+    :param threads: format and compress chunks on this number of threads, gzip members or zstd frames
+    :param chunk_rows: rows per parallel chunk
+    :param max_pending_chunks: chunks buffered in memory, default 2 * threads
+    :param chunk_executor: thread pool of threads workers shared with other files, default one per file
+    """
     from pyarrow.csv import CSVWriter, WriteOptions
 
     if not append:
@@ -157,29 +560,365 @@ def csv_file_writer(
     filepath = folder + path_sep + filename
     stream: NativeFile = fs.open_output_stream(
         filepath,
-        compression=compression,
+        compression=None,
         buffer_size=buffer_size,
         metadata={
             "Content-Type": "application/csv"
         }
     )
-    return (filepath, stream, CSVWriter(
-        stream,
-        schema,
-        write_options=WriteOptions(
-            include_header=include_header,
-            batch_size=batch_size,
-            delimiter=delimiter,
-            **kwargs
+    write_options = WriteOptions(
+        include_header=include_header,
+        batch_size=batch_size,
+        delimiter=delimiter,
+        **kwargs
+    )
+    if compression and threads:
+        return filepath, stream, ParallelCSVWriter(
+            stream, schema, write_options, WriteOptions(
+                include_header=False,
+                batch_size=batch_size,
+                delimiter=delimiter,
+                **kwargs
+            ),
+            compression, threads, chunk_rows, max_pending_chunks or 2 * threads, chunk_executor
         )
-    ))
+    if compression:
+        # stream position stays the compressed output position
+        compressed = CompressedOutputStream(stream, compression)
+        return filepath, stream, StreamClosingWriter(
+            CSVWriter(compressed, schema, write_options=write_options),
+            compressed
+        )
+    return filepath, stream, CSVWriter(stream, schema, write_options=write_options)
+
+
+def ipc_file_writer(
+    fs: FileSystem,
+    folder: str,
+    filename: str,
+    schema: Schema,
+    append: bool = True,
+    path_sep: str = "/",
+    compression: Optional[str] = None,
+    stream_format: bool = False,
+    **kwargs
+):
+    """
+    Arrow IPC file, or stream if stream_format, with lz4 or zstd buffer compression
+    """
+    from pyarrow.ipc import IpcWriteOptions, new_file, new_stream
+
+    if not append:
+        fs.delete_dir_contents(folder, missing_dir_ok=True)
+    fs.create_dir(folder)
+    filepath = folder + path_sep + filename
+    stream: NativeFile = fs.open_output_stream(filepath)
+    options = IpcWriteOptions(compression=compression, **kwargs)
+    return filepath, stream, (new_stream if stream_format else new_file)(stream, schema, options=options)
+
+
+def ipc_stream_writer(*args, **kwargs):
+    return ipc_file_writer(*args, stream_format=True, **kwargs)
+
+
+class ORCTableWriter:
+    """
+    pyarrow.orc.ORCWriter with BatchWriter methods
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write_table(self, table: Table):
+        self.writer.write(table)
+
+    def write_batch(self, batch: RecordBatch):
+        self.writer.write(Table.from_batches([batch]))
+
+    def close(self):
+        self.writer.close()
+
+
+def orc_file_writer(
+    fs: FileSystem,
+    folder: str,
+    filename: str,
+    schema: Schema,
+    append: bool = True,
+    path_sep: str = "/",
+    compression: Optional[str] = None,
+    **kwargs
+):
+    """
+    ORC file, stripes are buffered: output position moves by stripe_size
+    """
+    from pyarrow.orc import ORCWriter
+
+    if not append:
+        fs.delete_dir_contents(folder, missing_dir_ok=True)
+    fs.create_dir(folder)
+    filepath = folder + path_sep + filename
+    stream: NativeFile = fs.open_output_stream(filepath)
+    return filepath, stream, ORCTableWriter(
+        ORCWriter(stream, compression=compression or "uncompressed", **kwargs)
+    )
+
+
+class PartitionWriter:
+    """
+    Write batches of one partition folder, one file at a time
+
+    Batches are accumulated or split in row groups of row_group_rows / row_group_bytes,
+    files are rolled over max_file_rows / max_file_bytes, bytes measured on the output stream position
+    and estimated from the in memory size until the first write.
+    Calls are serialized by DFSWriter: at most one pending future per PartitionWriter
+    """
+
+    def __init__(
+        self,
+        dfs_writer: "DFSWriter",
+        schema: Schema,
+        partition_values: Optional[dict] = None,
+        append: bool = True,
+        max_file_rows: int = 4 * 1024 * 1024,
+        max_file_bytes: Optional[int] = None,
+        row_group_rows: Optional[int] = None,
+        row_group_bytes: Optional[int] = None,
+        base_dir: Optional[str] = None,
+        entries: Optional[list[dict]] = None,
+        uploader: Optional[MultipartUploader] = None,
+        memory_budget: Optional[MemoryBudget] = None,
+        **kwargs
+    ):
+        self.dfs_writer = dfs_writer
+        self.schema = schema
+        self.partition_values = partition_values
+        self.append = append
+        self.max_file_rows = max_file_rows
+        self.max_file_bytes = max_file_bytes
+        self.row_group_rows = row_group_rows
+        self.row_group_bytes = row_group_bytes
+        self.base_dir = base_dir if base_dir is not None else dfs_writer.base_dir
+        self.uploader = uploader
+        self.kwargs = kwargs
+
+        # manifest entries of closed files
+        self.entries = entries
+        self.statistics = ColumnStatistics(schema) if entries is not None else None
+
+        self.filepath: Optional[str] = None
+        self.stream: Optional[NativeFile] = None
+        self.writer = None
+        self.nrows = 0
+        self.future: Optional[Future] = None
+
+        self.buffer: list[RecordBatch] = []
+        self.buffered_rows = 0
+        # buffer bytes reserved in memory_budget
+        self.memory_budget = memory_budget
+        self.reserved = 0
+        # in memory and written bytes per row estimates
+        self.row_nbytes = 0.
+        self.file_row_nbytes = 0.
+        # file has row groups, small ones are avoided
+        self.row_groups = dfs_writer.file_format == FileFormat.parquet
+
+    def open(self):
+        start = time.perf_counter()
+        self.filepath, self.stream, self.writer = self.dfs_writer.writer_builder(
+            self.schema, self.partition_values, self.append,
+            base_dir=self.base_dir, uploader=self.uploader, **self.kwargs
+        )
+        instrumentation.emit("write", "file_open", wall=time.perf_counter() - start, path=self.filepath)
+        # only the first file may clear the folder
+        self.append = True
+        self.nrows = 0
+
+    def position(self) -> int:
+        return self.stream.tell() if self.stream is not None else 0
+
+    def close(self) -> Optional[str]:
+        """
+        Close current file, delete it if empty
+        :return: written file path or None
+        """
+        if self.writer is None:
+            return None
+        filepath, nrows = self.filepath, self.nrows
+        start = time.perf_counter()
+        position = self.position()
+        self.writer.close()
+        if self.stream:
+            if not self.stream.closed:
+                position = self.stream.tell()
+                self.stream.close()
+            if nrows:
+                self.file_row_nbytes = position / nrows
+        instrumentation.emit(
+            "write", "file_close", nrows, position, wall=time.perf_counter() - start, path=filepath
+        )
+        self.filepath, self.stream, self.writer = None, None, None
+        if nrows == 0:
+            self.delete_file(filepath)
+            filepath = None
+        elif self.statistics is not None:
+            self.entries.append(manifest_entry(
+                filepath[len(self.base_dir) + 1:].replace(self.dfs_writer.path_sep, "/"),
+                nrows, position, self.partition_values, self.statistics
+            ))
+            self.statistics.reset()
+        self.dfs_writer.server.invalidate_listing(
+            filepath or self.dfs_writer.folder(self.partition_values, self.base_dir)
+        )
+        return filepath
+
+    def account(self):
+        """
+        Reserve buffered bytes in memory budget
+        """
+        if self.memory_budget is None:
+            return
+        nbytes = sum(_.nbytes for _ in self.buffer)
+        if nbytes > self.reserved:
+            self.memory_budget.force(nbytes - self.reserved)
+        elif nbytes < self.reserved:
+            self.memory_budget.release(self.reserved - nbytes)
+        self.reserved = nbytes
+
+    def abort(self):
+        self.buffer, self.buffered_rows = [], 0
+        self.account()
+        if self.statistics is not None:
+            self.statistics.reset()
+        if self.writer is not None:
+            filepath = self.filepath
+            self.nrows = 0
+            # spooled file is dropped without upload
+            spooled = self.uploader is not None and self.uploader.abort(filepath)
+            try:
+                self.writer.close()
+                if self.stream:
+                    self.stream.close()
+            finally:
+                self.filepath, self.stream, self.writer = None, None, None
+                if spooled:
+                    self.dfs_writer.server.invalidate_listing(filepath)
+                else:
+                    self.delete_file(filepath)
+
+    def delete_file(self, filepath: str):
+        if self.uploader is not None:
+            self.uploader.discard(filepath)
+        else:
+            self.dfs_writer.server.fs().delete_file(filepath)
+        self.dfs_writer.server.invalidate_listing(filepath)
+
+    def wait(self) -> list[str]:
+        """
+        Wait pending write
+        :return: file paths closed by rollover
+        """
+        if self.future is None:
+            return []
+        future, self.future = self.future, None
+        return future.result()
+
+    def full(self) -> bool:
+        return self.nrows >= self.max_file_rows or bool(
+            self.max_file_bytes and self.position() >= self.max_file_bytes
+        )
+
+    def group_rows(self) -> int:
+        """
+        Number of rows for the next write, bounded by file and row group targets
+        :return: 0 to roll over the file instead of writing a row group smaller than MIN_ROW_GROUP_RATIO
+            of the row group target
+        """
+        rows = self.max_file_rows - self.nrows
+        if self.row_group_rows:
+            rows = min(rows, self.row_group_rows)
+        if self.row_group_bytes and self.row_nbytes:
+            rows = min(rows, int(self.row_group_bytes / self.row_nbytes))
+        if self.max_file_bytes:
+            position = self.position()
+            # first file: in memory size, larger than encoded one
+            file_row_nbytes = (
+                position / self.nrows if self.nrows and position else self.file_row_nbytes or self.row_nbytes
+            )
+            if file_row_nbytes:
+                available = int((self.max_file_bytes - position) / file_row_nbytes)
+                # next row group: target size, else buffered batches
+                group = rows if self.row_group_rows or self.row_group_bytes else min(rows, self.buffered_rows)
+                if self.row_groups and self.nrows and available < MIN_ROW_GROUP_RATIO * group:
+                    return 0
+                rows = min(rows, available)
+        return max(rows, 1)
+
+    def write_rows(self, rows: int):
+        table = Table.from_batches(self.buffer, self.schema)
+        if rows < table.num_rows:
+            self.buffer = table.slice(rows).to_batches()
+            table = table.slice(0, rows)
+        else:
+            self.buffer = []
+        self.buffered_rows -= table.num_rows
+        if instrumentation.enabled():
+            start = time.perf_counter()
+            self.writer.write_table(table)
+            instrumentation.emit(
+                "write", "batch", table.num_rows, table.nbytes, wall=time.perf_counter() - start,
+                path=self.filepath
+            )
+        else:
+            self.writer.write_table(table)
+        self.nrows += table.num_rows
+        if self.statistics is not None:
+            self.statistics.update(table)
+
+    def write_batch(self, batch: RecordBatch, flush: bool = False) -> list[str]:
+        """
+        Buffer batch and write full row groups
+        :param batch: RecordBatch
+        :param flush: write all buffered rows
+        :return: file paths closed by rollover
+        """
+        if batch is not None and batch.num_rows > 0:
+            self.buffer.append(batch)
+            self.buffered_rows += batch.num_rows
+            self.row_nbytes = batch.nbytes / batch.num_rows
+
+        written = []
+        accumulate = bool(self.row_group_rows or self.row_group_bytes) and not flush
+        while self.buffered_rows > 0:
+            if self.writer is None:
+                self.open()
+            rows = self.group_rows()
+            if not rows:
+                written.append(self.close())
+                continue
+            if self.buffered_rows < rows:
+                if accumulate:
+                    break
+                rows = self.buffered_rows
+            self.write_rows(rows)
+            if self.full():
+                written.append(self.close())
+        self.account()
+        return written
+
+    def flush(self) -> list[str]:
+        return self.write_batch(None, flush=True)
 
 
 class DFSWriter(BatchWriter):
 
     file_writers = {
         FileFormat.parquet: parquet_file_writer,
-        FileFormat.csv: csv_file_writer
+        FileFormat.csv: csv_file_writer,
+        FileFormat.arrow: ipc_file_writer,
+        FileFormat.feather: ipc_file_writer,
+        FileFormat.arrows: ipc_stream_writer,
+        FileFormat.orc: orc_file_writer
     }
 
     def __init__(
@@ -210,10 +949,12 @@ class DFSWriter(BatchWriter):
 
         if file_extension is None:
             if compression:
-                if self.file_format == FileFormat.parquet:
+                if self.file_format in BUFFER_COMPRESSION_FORMATS:
                     file_extension = ".%s.%s" % (compression, self.file_format)
                 else:
-                    file_extension = ".%s.%s" % (self.file_format, compression)
+                    file_extension = ".%s.%s" % (
+                        self.file_format, COMPRESSION_EXTENSIONS.get(compression, compression)
+                    )
             else:
                 file_extension = "." + self.file_format
         self.file_extension = file_extension
@@ -222,14 +963,15 @@ class DFSWriter(BatchWriter):
     def path_sep(self):
         return self.server.path_sep
 
-    def folder(self, partition_values: Optional[dict] = None):
+    def folder(self, partition_values: Optional[dict] = None, base_dir: Optional[str] = None):
+        base_dir = self.base_dir if base_dir is None else base_dir
         if partition_values:
-            return self.base_dir + self.path_sep + self.path_sep.join((
+            return base_dir + self.path_sep + self.path_sep.join((
                 "%s=%s" % (k, quote_plus(v.decode() if isinstance(v, bytes) else str(v)))
                 for k, v in partition_values.items()
             ))
         else:
-            return self.base_dir
+            return base_dir
 
     def filename(self, seed: int = 16):
         return os.urandom(seed).hex() + self.file_extension
@@ -239,11 +981,15 @@ class DFSWriter(BatchWriter):
         schema: Schema,
         partition_values: Optional[dict] = None,
         append: bool = True,
+        base_dir: Optional[str] = None,
+        uploader: Optional[MultipartUploader] = None,
         **kwargs
     ):
-        return self.file_writer(
-            fs=self.server.fs(),
-            folder=self.folder(partition_values),
+        folder = self.folder(partition_values, base_dir)
+        fs = self.server.fs()
+        writer = self.file_writer(
+            fs=uploader.spool_fs(fs) if uploader is not None else fs,
+            folder=folder,
             filename=self.filename(),
             schema=schema,
             append=append,
@@ -251,6 +997,8 @@ class DFSWriter(BatchWriter):
             compression=self.compression,
             **kwargs
         )
+        self.server.invalidate_listing(folder)
+        return writer
 
     def write_batches(
         self,
@@ -260,8 +1008,51 @@ class DFSWriter(BatchWriter):
         safe: bool = True,
         append: bool = True,
         max_file_rows: int = 4 * 1024 * 1024,
+        max_file_bytes: Optional[int] = None,
+        row_group_rows: Optional[int] = None,
+        row_group_bytes: Optional[int] = None,
+        max_open_files: Optional[int] = 256,
+        max_workers: Optional[int] = None,
+        commit: bool = False,
+        entries: Optional[list[dict]] = None,
+        uploader: Optional[MultipartUploader] = None,
+        auto_tune: bool = False,
+        tune_rows: int = 65536,
+        sort_by: Optional[list[Union[str, tuple[str, str]]]] = None,
+        sort_memory_bytes: int = 256 * 1024 * 1024,
+        spill_dir: Optional[str] = None,
+        memory_budget: Optional[MemoryBudget] = None,
         **kwargs
     ) -> Generator[str, None, None]:
+        """
+        Write batches in base_dir partition folders
+        :param batches: BatchReader
+        :param chunk_size: unused
+        :param cast: cast batches to table schema
+        :param safe: safe cast
+        :param append: False to delete partition folders contents
+        :param max_file_rows: roll files over this number of rows
+        :param max_file_bytes: roll files over this output size
+        :param row_group_rows: accumulate or split batches in row groups of this number of rows
+        :param row_group_bytes: accumulate or split batches in row groups of this in memory size
+        :param max_open_files: close least recently used partition files over this number
+        :param max_workers: threads writing partitions concurrently
+        :param commit: write files in a hidden staging folder, publish them with base_dir manifest on success
+        :param entries: list collecting written files manifest entries
+        :param uploader: adbc.filesystem.upload.MultipartUploader, upload object store files from a local spool
+        :param auto_tune: parquet dictionary, encodings, page size, statistics and bloom filters per column,
+            from tune_rows first rows, see adbc.filesystem.tuning.parquet_options. kwargs take precedence
+        :param tune_rows: sampled rows
+        :param sort_by: cluster rows in files by these columns or (name, 'ascending' | 'descending'),
+            external merge sort spilling runs of sort_memory_bytes in spill_dir
+        :param sort_memory_bytes: sort memory budget
+        :param spill_dir: local folder for sorted runs, default system temp folder
+        :param memory_budget: adbc.memory.MemoryBudget of batches in flight and buffered in partition writers,
+            default process budget. Writers with largest buffers are flushed and sorted runs spilled over limit
+        :param kwargs: file writer options
+        :return: written file paths, when committed if commit=True
+        """
+        memory_budget = resolve_budget(memory_budget)
         if self.schema_arrow is None:
             try:
                 table_schema = self.server.table_schema(self.table, self.schema, self.catalog)
@@ -273,95 +1064,280 @@ class DFSWriter(BatchWriter):
         if cast:
             batches = batches.cast(table_schema, safe, True, False)
 
-        if self.partition_by:
-            writers: dict[tuple[Any], tuple[int, Any]] = dict()
+        if sort_by:
+            batches = external_sort(batches, sort_by, sort_memory_bytes, spill_dir, memory_budget=memory_budget)
+            if self.file_format == FileFormat.parquet and "sorting_columns" not in kwargs:
+                from pyarrow.parquet import SortingColumn
+
+                kwargs["sorting_columns"] = list(SortingColumn.from_ordering(table_schema, sort_keys(sort_by)))
+
+        if auto_tune and self.file_format == FileFormat.parquet:
+            batches, sample = sample_batches(batches, tune_rows)
+            kwargs = {**parquet_options(sample, max_file_rows), **kwargs}
 
+        options = dict(
+            max_file_rows=max_file_rows,
+            max_file_bytes=max_file_bytes,
+            row_group_rows=row_group_rows,
+            row_group_bytes=row_group_bytes,
+            max_open_files=max_open_files,
+            max_workers=max_workers,
+            uploader=uploader,
+            memory_budget=memory_budget,
+            **kwargs
+        )
+
+        if not commit:
+            for filepath in self.write_files(batches, table_schema, append, entries=entries, **options):
+                yield filepath
+            return
+
+        staging = self.base_dir + self.path_sep + STAGING_NAME + self.path_sep + os.urandom(8).hex()
+        staged_entries = []
+        try:
+            for _ in self.write_files(batches, table_schema, True, staging, staged_entries, **options):
+                pass
+        except BaseException as e:
             try:
+                self.server.fs().delete_dir(staging)
+            except BaseException:
+                pass
+            raise e
+
+        if entries is not None:
+            entries.extend(staged_entries)
+        for filepath in self.commit(staging, staged_entries, table_schema, append):
+            yield filepath
+
+    def commit(
+        self,
+        staging: str,
+        entries: list[dict],
+        schema: Schema,
+        append: bool = True
+    ) -> Generator[str, None, None]:
+        """
+        Move staged files in base_dir and publish them in base_dir manifest
+
+        Replaced files are deleted once the manifest lists the new ones: manifest readers see either the old or
+        the new files, a failed commit leaves extra files but no missing ones.
+        Single writer: the manifest is read, modified and written back, serialized in this process only,
+        concurrent commits of other processes on the same base_dir may lose each other's entries
+        :param staging: staging folder
+        :param entries: staged files manifest entries, paths relative to staging
+        :param schema: written schema
+        :param append: False to replace written partitions files
+        :return: published file paths
+        """
+        fs = self.server.fs()
+        partition_values = {tuple(_["partition"].items()): _["partition"] for _ in entries}
+        if not self.partition_by:
+            partition_values = {(): {}}
+
+        replaced = []
+        if not append:
+            for values in partition_values.values():
+                replaced.extend(
+                    info for info in fs.get_file_info(FileSelector(self.folder(values), allow_not_found=True))
+                    if not is_hidden(info.base_name)
+                )
+
+        published = []
+        for entry in entries:
+            folder = self.folder(entry["partition"])
+            fs.create_dir(folder)
+            filepath = folder + self.path_sep + entry["path"].rsplit("/", 1)[-1]
+            fs.move(staging + self.path_sep + entry["path"].replace("/", self.path_sep), filepath)
+            published.append(filepath)
+
+        update_manifest(
+            fs, self.base_dir, self.file_format, schema,
+            add=entries,
+            remove_partitions=() if append else partition_values.values()
+        )
+
+        for info in replaced:
+            if info.path in published:
+                continue
+            if info.is_file:
+                fs.delete_file(info.path)
+            else:
+                fs.delete_dir(info.path)
+        for values in partition_values.values():
+            self.server.invalidate_listing(self.folder(values))
+        fs.delete_dir(staging)
+        self.server.invalidate_listing(self.base_dir)
+        for filepath in published:
+            yield filepath
+
+    def write_files(
+        self,
+        batches: BatchReader,
+        table_schema: Schema,
+        append: bool = True,
+        base_dir: Optional[str] = None,
+        entries: Optional[list[dict]] = None,
+        max_file_rows: int = 4 * 1024 * 1024,
+        max_file_bytes: Optional[int] = None,
+        row_group_rows: Optional[int] = None,
+        row_group_bytes: Optional[int] = None,
+        max_open_files: Optional[int] = 256,
+        max_workers: Optional[int] = None,
+        uploader: Optional[MultipartUploader] = None,
+        **kwargs
+    ) -> Generator[str, None, None]:
+        files = self.write_partitions(
+            batches, table_schema, append, base_dir, entries,
+            max_file_rows=max_file_rows,
+            max_file_bytes=max_file_bytes,
+            row_group_rows=row_group_rows,
+            row_group_bytes=row_group_bytes,
+            max_open_files=max_open_files,
+            max_workers=max_workers,
+            uploader=uploader,
+            **kwargs
+        )
+        # paths yielded once uploaded, next files encoded meanwhile
+        return uploader.uploaded(files) if uploader is not None else files
+
+    def write_partitions(
+        self,
+        batches: BatchReader,
+        table_schema: Schema,
+        append: bool = True,
+        base_dir: Optional[str] = None,
+        entries: Optional[list[dict]] = None,
+        max_file_rows: int = 4 * 1024 * 1024,
+        max_file_bytes: Optional[int] = None,
+        row_group_rows: Optional[int] = None,
+        row_group_bytes: Optional[int] = None,
+        max_open_files: Optional[int] = 256,
+        max_workers: Optional[int] = None,
+        uploader: Optional[MultipartUploader] = None,
+        memory_budget: Optional[MemoryBudget] = None,
+        **kwargs
+    ) -> Generator[str, None, None]:
+        # least recently used writer first
+        writers: OrderedDict[tuple, PartitionWriter] = OrderedDict()
+        opened: set[tuple] = set()
+
+        def partition_writer(pvalues: Optional[dict]) -> PartitionWriter:
+            phash = tuple(pvalues.items()) if pvalues else ()
+            writer = PartitionWriter(
+                self, table_schema, pvalues,
+                append=append or phash in opened,
+                max_file_rows=max_file_rows,
+                max_file_bytes=max_file_bytes,
+                row_group_rows=row_group_rows,
+                row_group_bytes=row_group_bytes,
+                base_dir=base_dir,
+                entries=entries,
+                uploader=uploader,
+                memory_budget=memory_budget,
+                **kwargs
+            )
+            opened.add(phash)
+            writers[phash] = writer
+            return writer
+
+        def wait(writer: PartitionWriter) -> list[str]:
+            if writer.future is None or not instrumentation.enabled():
+                return writer.wait()
+            # backpressure: writer still busy with its previous batch
+            start = time.perf_counter()
+            written = writer.wait()
+            instrumentation.emit("write", "wait", wait=time.perf_counter() - start)
+            return written
+
+        partition_stage = instrumentation.Stage("partition") if instrumentation.enabled() else None
+
+        chunk_executor = None
+        if self.file_format == FileFormat.csv and kwargs.get("threads") and "chunk_executor" not in kwargs:
+            # one pool for the chunks of all open csv files
+            chunk_executor = kwargs["chunk_executor"] = ThreadPoolExecutor(
+                kwargs["threads"], thread_name_prefix="csv"
+            )
+
+        with ThreadPoolExecutor(max_workers) as executor:
+            try:
+                if not self.partition_by:
+                    # open eagerly, append=False must clear base_dir even without batches
+                    partition_writer(None).open()
+
                 for batch in batches:
-                    for pvalues, pbatch in partitions(batch, self.partition_by):
+                    parts = partitions(batch, self.partition_by or None)
+                    if partition_stage is not None:
+                        parts = partition_stage.iterate(parts, source=True, batch_of=lambda _: _[1], close=False)
+                    for pvalues, pbatch in parts:
                         phash = tuple(pvalues.items())
-                        if phash not in writers:
-                            nrows, (filepath, stream, writer) = writers[phash] = (
-                                0,
-                                self.writer_builder(table_schema, pvalues, append, **kwargs)
-                            )
+                        writer = writers.get(phash)
+
+                        if writer is None:
+                            while max_open_files and len(writers) >= max_open_files:
+                                lru_hash, lru = next(iter(writers.items()))
+                                for filepath in lru.wait() + lru.flush():
+                                    yield filepath
+                                filepath = lru.close()
+                                del writers[lru_hash]
+                                if filepath:
+                                    yield filepath
+                            writer = partition_writer(dict(pvalues) if pvalues else None)
                         else:
-                            nrows, (filepath, stream, writer) = writers[phash]
+                            writers.move_to_end(phash)
 
-                        while nrows + pbatch.num_rows >= max_file_rows:
-                            # write the first dif
-                            writer.write_batch(pbatch.slice(0, max_file_rows - nrows))
-                            writer.close()
+                        # keep at most one pending batch per writer
+                        for filepath in wait(writer):
                             yield filepath
-                            pbatch = pbatch.slice(max_file_rows - nrows, None)
-                            nrows = 0
-                            (filepath, stream, writer) = self.writer_builder(table_schema, pvalues, True, **kwargs)
-
-                        if pbatch.num_rows > 0:
-                            writer.write_batch(pbatch)
-                            nrows += pbatch.num_rows
-                        writers[phash] = (nrows, (filepath, stream, writer))
+                        if memory_budget is not None:
+                            # flush largest buffers until the batch fits, then wait pending writes
+                            while not memory_budget.try_reserve(pbatch.nbytes):
+                                largest = max(writers.values(), key=lambda _: _.reserved)
+                                pending = [_ for _ in writers.values() if _.future is not None]
+                                if largest.reserved:
+                                    for filepath in wait(largest) + largest.flush():
+                                        yield filepath
+                                elif pending:
+                                    for filepath in wait(pending[0]):
+                                        yield filepath
+                                else:
+                                    # held by other components
+                                    memory_budget.force(pbatch.nbytes)
+                                    break
+                        writer.future = executor.submit(writer.write_batch, pbatch)
+                        if memory_budget is not None:
+                            writer.future.add_done_callback(
+                                lambda _, nbytes=pbatch.nbytes: memory_budget.release(nbytes)
+                            )
+
+                if partition_stage is not None:
+                    partition_stage.close()
+                for writer in writers.values():
+                    for filepath in wait(writer):
+                        yield filepath
+                    writer.future = executor.submit(writer.flush)
+                for writer in writers.values():
+                    for filepath in wait(writer):
+                        yield filepath
             except BaseException as e:
-                if writers:
-                    fs = self.server.fs()
+                for writer in writers.values():
                     try:
-                        for k, v in writers.items():
-                            _, (filepath, stream, writer) = v
-                            writer.close()
-                            if stream:
-                                stream.close()
-                            fs.delete_file(filepath)
-                        writers = dict()
+                        # files rolled in background were never yielded
+                        for filepath in writer.wait():
+                            writer.delete_file(filepath)
                     except BaseException:
                         pass
+                    try:
+                        writer.abort()
+                    except BaseException:
+                        pass
+                writers = OrderedDict()
                 raise e
             finally:
-                if writers:
-                    fs = self.server.fs()
-                    for k, v in writers.items():
-                        nrows, (filepath, stream, writer) = v
-                        writer.close()
-                        if stream:
-                            stream.close()
-                        if nrows == 0:
-                            fs.delete_file(filepath)
-                        else:
-                            yield filepath
-        else:
-            nrows = 0
-            (filepath, stream, writer) = self.writer_builder(table_schema, append=append, **kwargs)
-
-            try:
-                for batch in batches:
-                    while nrows + batch.num_rows >= max_file_rows:
-                        # write the first dif
-                        writer.write_batch(batch.slice(0, max_file_rows - nrows))
-                        writer.close()
-                        yield writer.where
-                        batch = batch.slice(max_file_rows - nrows, None)
-                        nrows = 0
-                        (filepath, stream, writer) = self.writer_builder(table_schema, None, True, **kwargs)
-
-                    if batch.num_rows > 0:
-                        writer.write_batch(batch)
-                        nrows += batch.num_rows
-            except BaseException as e:
                 try:
-                    writer.close()
-                    if stream:
-                        stream.close()
-                    self.server.fs().delete_file(filepath)
-                    writer = None
-                    stream = None
-                except BaseException:
-                    pass
-                raise e
-            finally:
-                if writer is not None:
-                    writer.close()
-                    if stream:
-                        stream.close()
-                    if nrows == 0:
-                        self.server.fs().delete_file(filepath)
-                    else:
-                        yield writer.where
+                    for writer in writers.values():
+                        filepath = writer.close()
+                        if filepath:
+                            yield filepath
+                finally:
+                    if chunk_executor is not None:
+                        chunk_executor.shutdown(wait=True)
@@ -0,0 +1,186 @@
+import json
+import os
+from typing import Optional, Iterable
+
+from pyarrow import Schema
+from pyarrow.fs import FileInfo, FileSystem, FileType
+
+from adbc.filesystem.dataset import files_dataset, path_partition_values
+from adbc.filesystem.manifest import update_manifest
+from adbc.reader import BatchReader
+
+__all__ = [
+    "COMPACTION_PREFIX",
+    "is_compaction_marker",
+    "compaction_excluded",
+    "recover_folder",
+    "compact_folder"
+]
+
+# staging folder and marker file names, hidden to readers
+COMPACTION_PREFIX = "_compaction-"
+# listings retried when compactions finish while listing
+COMPACTION_RELIST = 3
+
+
+def is_compaction_marker(name: str) -> bool:
+    return name.startswith(COMPACTION_PREFIX) and name.endswith(".json")
+
+
+def read_marker(fs: FileSystem, path: str) -> dict:
+    with fs.open_input_stream(path) as stream:
+        return json.loads(stream.read().decode())
+
+
+def write_marker(fs: FileSystem, path: str, sources: list[str], targets: list[str]):
+    with fs.open_output_stream(path) as stream:
+        stream.write(json.dumps({"sources": sources, "targets": targets}).encode())
+
+
+def marker_paths(folder: str, names: Iterable[str]) -> list[str]:
+    return [folder + "/" + name for name in names]
+
+
+def delete_dir(fs: FileSystem, path: str):
+    if fs.get_file_info(path).type != FileType.NotFound:
+        fs.delete_dir(path)
+
+
+def compaction_excluded(
+    fs: FileSystem,
+    markers: list[str],
+    paths: set[str]
+) -> tuple[set[str], set[str]]:
+    """
+    Files to hide from a listing while compactions are running
+    All targets visible: sources are replaced, else targets are not complete yet
+
+    :param fs: pyarrow.fs.FileSystem
+    :param markers: compaction marker paths in listing
+    :param paths: listed file paths
+    :return: excluded file paths, folders to list again: their marker vanished, compaction finished
+        after the listing, which may miss targets or hold deleted sources
+    """
+    excluded, stale = set(), set()
+    for marker in markers:
+        folder = marker.rsplit("/", 1)[0]
+        try:
+            content = read_marker(fs, marker)
+        except FileNotFoundError:
+            stale.add(folder)
+            continue
+        targets = marker_paths(folder, content["targets"])
+        if all(_ in paths for _ in targets):
+            excluded.update(marker_paths(folder, content["sources"]))
+        else:
+            excluded.update(targets)
+    return excluded, stale
+
+
+def recover_folder(
+    fs: FileSystem,
+    markers: list[str],
+    paths: set[str]
+):
+    """
+    Finish or rollback interrupted compactions
+    :param fs: pyarrow.fs.FileSystem
+    :param markers: compaction marker paths in listing
+    :param paths: listed file paths
+    """
+    for marker in markers:
+        folder = marker.rsplit("/", 1)[0]
+        content = read_marker(fs, marker)
+        sources = marker_paths(folder, content["sources"])
+        targets = marker_paths(folder, content["targets"])
+        for path in (sources if all(_ in paths for _ in targets) else targets):
+            if path in paths:
+                fs.delete_file(path)
+        delete_dir(fs, marker[:-len(".json")])
+        fs.delete_file(marker)
+
+
+def compact_folder(
+    server: "DataFileSystem",
+    folder: str,
+    files: list[FileInfo],
+    file_format: str,
+    target_file_bytes: int,
+    compression: Optional[str] = None,
+    schema: Optional[Schema] = None,
+    batch_size: int = 65536,
+    base_dir: Optional[str] = None
+) -> list[str]:
+    """
+    Merge files of one folder into target sized files
+
+    Files are streamed into a hidden staging folder, a marker listing sources and targets is written,
+    then targets are moved in the folder and sources deleted
+
+    :param base_dir: replace sources with targets in base_dir manifest, if it has one
+    :return: compacted file paths
+    """
+    from adbc.filesystem import DataFileSystem
+
+    fs = server.fs()
+    name = COMPACTION_PREFIX + os.urandom(8).hex()
+    staging, marker = folder + "/" + name, folder + "/" + name + ".json"
+
+    entries = []
+    dataset = files_dataset(fs, [_.path for _ in files], [{} for _ in files], file_format, schema)
+    scanner = dataset.scanner(batch_size=batch_size, use_threads=True)
+    try:
+        staged = list(
+            # plain DFSWriter: subclasses like Athena write catalog tables
+            DataFileSystem.write(server, "", staging, file_format=file_format, compression=compression)
+            .write_batches(
+                BatchReader(scanner.projected_schema, scanner.to_batches()),
+                cast=False,
+                max_file_bytes=target_file_bytes,
+                max_workers=1,
+                entries=entries if base_dir is not None else None
+            )
+        )
+    except BaseException as e:
+        delete_dir(fs, staging)
+        raise e
+
+    if not staged:
+        # nothing to merge
+        delete_dir(fs, staging)
+        return []
+
+    targets = [_.rsplit(server.path_sep, 1)[-1] for _ in staged]
+    write_marker(fs, marker, [_.base_name for _ in files], targets)
+    server.invalidate_listing(folder)
+
+    moved = set()
+    try:
+        for source, target in zip(staged, marker_paths(folder, targets)):
+            fs.move(source, target)
+            moved.add(target)
+    except BaseException as e:
+        # rollback, sources are still complete
+        recover_folder(fs, [marker], moved)
+        server.invalidate_listing(folder)
+        raise e
+
+    if base_dir is not None:
+        relative = folder[len(base_dir) + 1:].replace(server.path_sep, "/")
+        prefix = relative + "/" if relative else ""
+        partition = path_partition_values(folder + server.path_sep + targets[0], base_dir, server.path_sep)
+        for entry in entries:
+            entry["path"], entry["partition"] = prefix + entry["path"].rsplit("/", 1)[-1], partition
+        update_manifest(
+            fs, base_dir,
+            add=entries,
+            remove=[prefix + _.base_name for _ in files],
+            create=False
+        )
+
+    for info in files:
+        fs.delete_file(info.path)
+    delete_dir(fs, staging)
+    fs.delete_file(marker)
+    server.invalidate_listing(folder)
+    return marker_paths(folder, targets)
@@ -0,0 +1,314 @@
+from typing import Callable, Optional, Union, Iterable
+from urllib.parse import unquote_plus
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import Schema, DataType, field as field_builder, schema as schema_builder
+
+from adbc.dtype import cast_array, INT64, STRING
+from adbc.enums import FileFormat
+
+__all__ = [
+    "path_partition_values",
+    "folder_partition",
+    "match_partition",
+    "partition_expression",
+    "dataset_format",
+    "file_format_of",
+    "files_dataset"
+]
+
+# DFSWriter.folder writes str(None) for null partition values
+NULL_PARTITION_VALUES = {"None", "__HIVE_DEFAULT_PARTITION__"}
+
+
+def is_hidden(name: str) -> bool:
+    return name.startswith("_") or name.startswith(".")
+
+
+def path_partition_values(path: str, base_dir: str, path_sep: str = "/") -> Optional[dict[str, Optional[str]]]:
+    """
+    Parse key=value folders between base_dir and file name, written by DFSWriter.folder
+    :return: partition values as strings, None if path is hidden (_staging, .tmp files)
+    """
+    relative = path[len(base_dir):] if path.startswith(base_dir) else path
+    parts = [_ for _ in relative.replace(path_sep, "/").split("/") if _]
+    values = {}
+    for part in parts:
+        if is_hidden(part):
+            return None
+    for part in parts[:-1]:
+        partition = folder_partition(part)
+        if partition is not None:
+            values[partition[0]] = partition[1]
+    return values
+
+
+def folder_partition(name: str) -> Optional[tuple[str, Optional[str]]]:
+    """
+    Parse folder name key=value
+    :return: (key, value) or None
+    """
+    if "=" not in name:
+        return None
+    key, value = name.split("=", 1)
+    value = unquote_plus(value)
+    return key, None if value in NULL_PARTITION_VALUES else value
+
+
+def infer_partition_type(values: Iterable[Optional[str]]) -> DataType:
+    values = [_ for _ in values if _ is not None]
+    if values and all(_.lstrip("-").isdigit() for _ in values):
+        return INT64
+    return STRING
+
+
+def typed_partition_values(
+    values: Iterable[Optional[str]],
+    dtype: DataType
+) -> list:
+    return cast_array(pa.array(list(values), STRING), dtype, safe=False).to_pylist()
+
+
+def match_partition(
+    values: dict,
+    partition_filter: Optional[Union[dict, Callable[[dict], bool]]] = None
+) -> bool:
+    """
+    Check partition values against filter
+    :param values: partition values
+    :param partition_filter: callable(values) -> bool or dict {key: value or list of values},
+        dict values compared as DFSWriter.folder formats them
+    """
+    if partition_filter is None:
+        return True
+    if callable(partition_filter):
+        return bool(partition_filter(values))
+    for key, expected in partition_filter.items():
+        if key not in values:
+            continue
+        if not isinstance(expected, (list, tuple, set, frozenset)):
+            expected = (expected,)
+        if str(values[key]) not in {str(_) for _ in expected}:
+            return False
+    return True
+
+
+def partition_expression(values: dict, schema: Schema) -> pc.Expression:
+    expression = pc.scalar(True)
+    for key, value in values.items():
+        if value is None:
+            expression = expression & pc.field(key).is_null()
+        else:
+            expression = expression & (pc.field(key) == pa.scalar(value, schema.field(key).type))
+    return expression
+
+
+def statistics_expression(columns: dict[str, dict], schema: Schema) -> pc.Expression:
+    """
+    Guarantee built from manifest column statistics: min <= column <= max, for columns without nulls
+    """
+    expression = pc.scalar(True)
+    for name, statistics in columns.items():
+        if statistics.get("null_count") or "min" not in statistics or name not in schema.names:
+            continue
+        dtype = schema.field(name).type
+        low, high = typed_partition_values([statistics["min"], statistics["max"]], dtype)
+        expression = expression & (pc.field(name) >= pa.scalar(low, dtype)) & (pc.field(name) <= pa.scalar(high, dtype))
+    return expression
+
+
+def file_format_of(path: str) -> Optional[str]:
+    # name.<compression>.<format> or name.<format>.<compression>
+    for extension in path.rsplit("/", 1)[-1].split(".")[1:]:
+        if extension in DATASET_FORMATS:
+            return extension
+    return None
+
+
+def dataset_format(file_format: str, schema: Optional[Schema] = None) -> "ds.FileFormat":
+    return DATASET_FORMATS[file_format](schema)
+
+
+def csv_dataset_format(schema: Optional[Schema] = None) -> "ds.FileFormat":
+    import pyarrow.dataset as ds
+    from pyarrow.csv import ConvertOptions
+
+    if schema is None:
+        return ds.CsvFileFormat()
+    return ds.CsvFileFormat(convert_options=ConvertOptions(column_types=schema))
+
+
+def parquet_dataset_format(schema: Optional[Schema] = None) -> "ds.FileFormat":
+    import pyarrow.dataset as ds
+
+    return ds.ParquetFileFormat(default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True))
+
+
+def ipc_dataset_format(schema: Optional[Schema] = None) -> "ds.FileFormat":
+    import pyarrow.dataset as ds
+
+    return ds.IpcFileFormat()
+
+
+def orc_dataset_format(schema: Optional[Schema] = None) -> "ds.FileFormat":
+    import pyarrow.dataset as ds
+
+    return ds.OrcFileFormat()
+
+
+# pyarrow.dataset imported on first scan, it loads pandas
+DATASET_FORMATS = {
+    FileFormat.parquet: parquet_dataset_format,
+    FileFormat.csv: csv_dataset_format,
+    FileFormat.arrow: ipc_dataset_format,
+    FileFormat.feather: ipc_dataset_format,
+    FileFormat.orc: orc_dataset_format
+}
+
+
+# stream codecs pyarrow.dataset does not infer from file extension
+DECOMPRESSED_EXTENSIONS = {
+    "zst": "zstd"
+}
+
+
+def decompressed_codec(path: str) -> Optional[str]:
+    return DECOMPRESSED_EXTENSIONS.get(path.rsplit("/", 1)[-1].rsplit(".", 1)[-1])
+
+
+def decompressing_filesystem(fs) -> "pa.fs.FileSystem":
+    """
+    Wrap fs to open .zst files decompressed, csv dataset fragments need random access files:
+    each file is decompressed in memory when its fragment is scanned
+    """
+    from pyarrow.fs import FileSystemHandler, PyFileSystem
+
+    class DecompressingHandler(FileSystemHandler):
+
+        def __init__(self):
+            self.fs = fs
+
+        def __eq__(self, other):
+            return isinstance(other, DecompressingHandler) and fs.equals(other.fs)
+
+        def __ne__(self, other):
+            return not self == other
+
+        def get_type_name(self):
+            return "decompressing+" + fs.type_name
+
+        def normalize_path(self, path):
+            return fs.normalize_path(path)
+
+        def get_file_info(self, paths):
+            return fs.get_file_info(paths)
+
+        def get_file_info_selector(self, selector):
+            return fs.get_file_info(selector)
+
+        def create_dir(self, path, recursive):
+            fs.create_dir(path, recursive=recursive)
+
+        def delete_dir(self, path):
+            fs.delete_dir(path)
+
+        def delete_dir_contents(self, path, missing_dir_ok=False):
+            fs.delete_dir_contents(path, missing_dir_ok=missing_dir_ok)
+
+        def delete_root_dir_contents(self):
+            fs.delete_dir_contents("/", accept_root_dir=True)
+
+        def delete_file(self, path):
+            fs.delete_file(path)
+
+        def move(self, src, dest):
+            fs.move(src, dest)
+
+        def copy_file(self, src, dest):
+            fs.copy_file(src, dest)
+
+        def open_input_stream(self, path):
+            return fs.open_input_stream(path)
+
+        def open_input_file(self, path):
+            codec = decompressed_codec(path)
+            if codec is None:
+                return fs.open_input_file(path)
+            with fs.open_input_stream(path, compression=codec) as stream:
+                return pa.BufferReader(stream.read_buffer())
+
+        def open_output_stream(self, path, metadata):
+            return fs.open_output_stream(path, metadata=metadata)
+
+        def open_append_stream(self, path, metadata):
+            return fs.open_append_stream(path, metadata=metadata)
+
+    return PyFileSystem(DecompressingHandler())
+
+
+def partitioned_schema(
+    file_schema: Schema,
+    partitions: list[dict],
+    schema: Optional[Schema] = None
+) -> Schema:
+    """
+    Append partition fields missing in file_schema, typed from schema or inferred from values
+    """
+    fields = list(schema if schema is not None else file_schema)
+    names = {f.name for f in fields}
+    keys = []
+    for values in partitions:
+        for key in values:
+            if key not in keys:
+                keys.append(key)
+    for key in keys:
+        if key not in names:
+            fields.append(field_builder(key, infer_partition_type(_.get(key) for _ in partitions)))
+    return schema_builder(fields, (schema if schema is not None else file_schema).metadata)
+
+
+def files_dataset(
+    fs,
+    paths: list[str],
+    partitions: list[dict],
+    file_format: str,
+    schema: Optional[Schema] = None,
+    statistics: Optional[list[dict]] = None
+) -> "ds.FileSystemDataset":
+    """
+    Build dataset from file paths and their partition values
+    :param fs: pyarrow.fs.FileSystem
+    :param paths: file paths
+    :param partitions: string partition values for each path
+    :param file_format: adbc.enums.FileFormat
+    :param schema: expected schema, default inspect first file
+    :param statistics: manifest column statistics for each path, prune files without reading them
+    """
+    import pyarrow.dataset as ds
+
+    if file_format == FileFormat.csv and any(decompressed_codec(_) for _ in paths):
+        fs = decompressing_filesystem(fs)
+    file_schema = schema if schema is not None else dataset_format(file_format).inspect(paths[0], filesystem=fs)
+    full_schema = partitioned_schema(file_schema, partitions, schema)
+
+    expressions = {}
+    for values in partitions:
+        phash = tuple(values.items())
+        if phash not in expressions:
+            expressions[phash] = partition_expression({
+                k: None if v is None else typed_partition_values([v], full_schema.field(k).type)[0]
+                for k, v in values.items()
+            }, full_schema)
+
+    return ds.FileSystemDataset.from_paths(
+        paths,
+        schema=full_schema,
+        format=dataset_format(file_format, schema),
+        filesystem=fs,
+        partitions=[
+            expressions[tuple(values.items())] & statistics_expression(statistics[i], full_schema)
+            if statistics else expressions[tuple(values.items())]
+            for i, values in enumerate(partitions)
+        ]
+    )
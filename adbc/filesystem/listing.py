@@ -0,0 +1,152 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from threading import Lock
+from typing import Callable, Optional, Union, Generator
+
+from pyarrow.fs import FileInfo, FileSelector, FileSystem, FileType
+
+from adbc.filesystem.dataset import is_hidden, match_partition, folder_partition
+
+__all__ = [
+    "ListingCache",
+    "iter_files"
+]
+
+# filesystems listing a whole tree in one flat request
+RECURSIVE_LISTING_FILESYSTEMS = {"s3", "gcs", "local"}
+
+
+class ListingCache:
+    """
+    Thread safe directory listings cache, entries expire after ttl seconds
+    """
+
+    def __init__(self, ttl: float = 60):
+        self.ttl = ttl
+        self.entries: dict[tuple[str, bool], tuple[float, list[FileInfo]]] = {}
+        self.lock = Lock()
+
+    def get(self, path: str, recursive: bool) -> Optional[list[FileInfo]]:
+        key = (path.rstrip("/"), recursive)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            return entry[1]
+
+    def put(self, path: str, recursive: bool, infos: list[FileInfo]):
+        with self.lock:
+            self.entries[(path.rstrip("/"), recursive)] = (time.monotonic() + self.ttl, infos)
+
+    def invalidate(self, path: Optional[str] = None):
+        """
+        Drop listings of path, its parent folders and its sub folders
+        :param path: file or folder path, None to clear all
+        """
+        with self.lock:
+            if path is None:
+                self.entries.clear()
+                return
+            path = path.rstrip("/")
+            for key in [
+                key for key in self.entries
+                if key[0] == path or path.startswith(key[0] + "/") or key[0].startswith(path + "/")
+            ]:
+                del self.entries[key]
+
+
+def list_dir(
+    fs: FileSystem,
+    path: str,
+    allow_not_found: bool = False,
+    recursive: bool = False,
+    cache: Optional[ListingCache] = None
+) -> list[FileInfo]:
+    infos = cache.get(path, recursive) if cache is not None else None
+    if infos is None:
+        infos = fs.get_file_info(FileSelector(path, allow_not_found=allow_not_found, recursive=recursive))
+        if cache is not None:
+            cache.put(path, recursive, infos)
+    return infos
+
+
+def match_prefix(relative: str, prefix: Optional[str]) -> bool:
+    # folders leading to prefix, or inside it
+    return not prefix or prefix.startswith(relative) or relative.startswith(prefix)
+
+
+def iter_files(
+    fs: FileSystem,
+    path: str,
+    allow_not_found: bool = False,
+    recursive: Optional[bool] = None,
+    partition_filter: Optional[Union[dict, Callable[[dict], bool]]] = None,
+    prefix: Optional[str] = None,
+    skip_hidden: bool = False,
+    max_workers: int = 16,
+    cache: Optional[ListingCache] = None
+) -> Generator[FileInfo, None, None]:
+    """
+    List files in folder tree
+    :param fs: pyarrow.fs.FileSystem
+    :param path: base folder
+    :param allow_not_found: no error if path does not exist
+    :param recursive: one recursive listing, default when filesystem lists trees natively and no partition_filter
+    :param partition_filter: prune key=value folders, see adbc.filesystem.dataset.match_partition
+    :param prefix: relative path prefix, like 'key=value/'
+    :param skip_hidden: skip _ or . prefixed folders, like staging folders, hidden files are listed
+    :param max_workers: concurrent folder listings when not recursive
+    :param cache: ListingCache
+    """
+    path = path.rstrip("/")
+    base_length = len(path) + 1
+    if recursive is None:
+        recursive = partition_filter is None and fs.type_name in RECURSIVE_LISTING_FILESYSTEMS
+
+    if recursive:
+        for info in list_dir(fs, path, allow_not_found, True, cache):
+            if not info.is_file:
+                continue
+            relative = info.path[base_length:]
+            parts = relative.split("/")
+            if skip_hidden and any(is_hidden(_) for _ in parts[:-1]):
+                continue
+            if not match_prefix(relative, prefix):
+                continue
+            if partition_filter is not None and not match_partition(
+                dict(_ for _ in (folder_partition(part) for part in parts[:-1]) if _), partition_filter
+            ):
+                continue
+            yield info
+        return
+
+    def list_folder(folder: str, values: dict):
+        return list_dir(fs, folder, allow_not_found, False, cache), values
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        pending = {executor.submit(list_folder, path, {})}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    infos, values = future.result()
+                    for info in infos:
+                        name = info.base_name
+                        if skip_hidden and not info.is_file and is_hidden(name):
+                            continue
+                        relative = info.path[base_length:]
+                        if not match_prefix(relative if info.is_file else relative + "/", prefix):
+                            continue
+                        if info.is_file:
+                            yield info
+                        elif info.type == FileType.Directory:
+                            partition = folder_partition(name)
+                            folder_values = {**values, partition[0]: partition[1]} if partition else values
+                            if partition is None or match_partition(folder_values, partition_filter):
+                                pending.add(executor.submit(list_folder, info.path, folder_values))
+        finally:
+            for future in pending:
+                future.cancel()
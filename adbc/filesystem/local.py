@@ -1,7 +1,7 @@
 import os.path
-from typing import Callable, Any
+from typing import Callable, Any, Optional
 
-from pyarrow.filesystem import FileSystem
+from pyarrow.fs import FileSystem
 
 from adbc.filesystem import DataFileSystem
 
@@ -13,5 +13,9 @@ __all__ = [
 
 class LocalDataFileSystem(DataFileSystem):
 
-    def __init__(self, fs_builder: Callable[[Any], FileSystem] = DataFileSystem.get_local):
-        super().__init__(fs_builder, os.path.sep)
+    def __init__(
+        self,
+        fs_builder: Callable[[Any], FileSystem] = DataFileSystem.get_local,
+        listing_ttl: Optional[float] = None
+    ):
+        super().__init__(fs_builder, os.path.sep, listing_ttl)
@@ -0,0 +1,189 @@
+import base64
+import json
+import os
+from threading import Lock
+from typing import Optional, Any, Iterable
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import Schema, Table, DataType
+from pyarrow.fs import FileSystem
+
+__all__ = [
+    "MANIFEST_NAME",
+    "STAGING_NAME",
+    "ColumnStatistics",
+    "read_manifest",
+    "write_manifest",
+    "update_manifest",
+    "manifest_entry"
+]
+
+MANIFEST_NAME = "_manifest.json"
+STAGING_NAME = "_staging"
+MANIFEST_VERSION = 1
+
+# serialize manifest updates of this process
+MANIFEST_LOCK = Lock()
+
+
+def has_statistics(dtype: DataType) -> bool:
+    if pa.types.is_dictionary(dtype):
+        return has_statistics(dtype.value_type)
+    return (
+        pa.types.is_integer(dtype) or pa.types.is_floating(dtype) or pa.types.is_decimal(dtype)
+        or pa.types.is_string(dtype) or pa.types.is_large_string(dtype) or pa.types.is_boolean(dtype)
+        or pa.types.is_temporal(dtype)
+    ) and not pa.types.is_duration(dtype) and not pa.types.is_interval(dtype)
+
+
+class ColumnStatistics:
+    """
+    Running min, max and null count of written columns
+    """
+
+    def __init__(self, schema: Schema):
+        self.schema = schema
+        self.names = [f.name for f in schema if has_statistics(f.type)]
+        self.reset()
+
+    def reset(self):
+        self.min: dict[str, Any] = {}
+        self.max: dict[str, Any] = {}
+        self.null_count: dict[str, int] = {name: 0 for name in self.names}
+
+    def update(self, table: Table):
+        for name in self.names:
+            column = table[name]
+            self.null_count[name] += column.null_count
+            if column.null_count == len(column):
+                continue
+            if pa.types.is_dictionary(column.type):
+                # dictionary values bound used values, min and max stay valid guarantees
+                column = pa.chunked_array([_.dictionary for _ in column.chunks], column.type.value_type)
+            min_max = pc.min_max(column)
+            low, high = min_max["min"].as_py(), min_max["max"].as_py()
+            if low is not None:
+                self.min[name] = low if name not in self.min else min(self.min[name], low)
+            if high is not None:
+                self.max[name] = high if name not in self.max else max(self.max[name], high)
+
+    def to_dict(self) -> dict[str, dict]:
+        """
+        Statistics with min and max as strings, parsed back with the manifest schema
+        """
+        result = {}
+        for name in self.names:
+            dtype = self.schema.field(name).type
+            if pa.types.is_dictionary(dtype):
+                dtype = dtype.value_type
+            column = {"null_count": self.null_count[name]}
+            for key, values in (("min", self.min), ("max", self.max)):
+                if name in values:
+                    column[key] = pc.cast(pa.scalar(values[name], dtype), pa.string()).as_py()
+            result[name] = column
+        return result
+
+
+def partition_strings(partition_values: Optional[dict] = None) -> dict[str, Optional[str]]:
+    # as DFSWriter.folder formats them
+    return {
+        k: None if v is None else (v.decode() if isinstance(v, bytes) else str(v))
+        for k, v in (partition_values or {}).items()
+    }
+
+
+def manifest_entry(
+    path: str,
+    rows: int,
+    size: int,
+    partition_values: Optional[dict] = None,
+    statistics: Optional[ColumnStatistics] = None
+) -> dict:
+    """
+    :param path: file path relative to base directory, / separated
+    """
+    return {
+        "path": path,
+        "rows": rows,
+        "bytes": size,
+        "partition": partition_strings(partition_values),
+        "columns": statistics.to_dict() if statistics is not None else {}
+    }
+
+
+def serialize_schema(schema: Schema) -> str:
+    return base64.b64encode(schema.serialize().to_pybytes()).decode()
+
+
+def deserialize_schema(data: str) -> Schema:
+    return pa.ipc.read_schema(pa.py_buffer(base64.b64decode(data)))
+
+
+def read_manifest(fs: FileSystem, base_dir: str) -> Optional[dict]:
+    """
+    :return: manifest dict with 'format', 'schema' and 'files', None if base_dir has no manifest
+    """
+    try:
+        with fs.open_input_stream(base_dir + "/" + MANIFEST_NAME) as stream:
+            manifest = json.loads(stream.read().decode())
+    except FileNotFoundError:
+        return None
+    manifest["schema"] = deserialize_schema(manifest["schema"])
+    return manifest
+
+
+def write_manifest(fs: FileSystem, base_dir: str, file_format: str, schema: Schema, files: list[dict]):
+    """
+    Publish manifest atomically: written in a hidden temporary file, then moved
+    """
+    tmp = base_dir + "/" + MANIFEST_NAME + "." + os.urandom(8).hex()
+    with fs.open_output_stream(tmp) as stream:
+        stream.write(json.dumps({
+            "version": MANIFEST_VERSION,
+            "format": file_format,
+            "schema": serialize_schema(schema),
+            "files": files
+        }).encode())
+    fs.move(tmp, base_dir + "/" + MANIFEST_NAME)
+
+
+def update_manifest(
+    fs: FileSystem,
+    base_dir: str,
+    file_format: Optional[str] = None,
+    schema: Optional[Schema] = None,
+    add: Iterable[dict] = (),
+    remove: Iterable[str] = (),
+    remove_partitions: Iterable[dict] = (),
+    create: bool = True
+) -> bool:
+    """
+    Replace manifest entries
+
+    Read, modify and write back, serialized by MANIFEST_LOCK in this process only: one writer process per base_dir
+    :param file_format: manifest file format, default keep current one
+    :param schema: manifest schema, default keep current one
+    :param add: new manifest entries
+    :param remove: relative paths to remove
+    :param remove_partitions: partition values whose entries are replaced
+    :param create: create manifest if missing
+    :return: manifest written
+    """
+    with MANIFEST_LOCK:
+        manifest = read_manifest(fs, base_dir)
+        if manifest is None and not create:
+            return False
+        remove = set(remove)
+        remove_partitions = [partition_strings(_) for _ in remove_partitions]
+        files = [
+            entry for entry in (manifest["files"] if manifest else [])
+            if entry["path"] not in remove and entry["partition"] not in remove_partitions
+        ]
+        write_manifest(
+            fs, base_dir,
+            file_format if file_format is not None else manifest["format"],
+            schema if schema is not None else manifest["schema"],
+            files + list(add)
+        )
+        return True
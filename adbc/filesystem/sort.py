@@ -0,0 +1,177 @@
+import os
+import tempfile
+from typing import Optional, Union, Iterator, Generator
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import Table, RecordBatch
+
+from adbc.memory import MemoryBudget
+from adbc.reader import BatchReader
+
+__all__ = [
+    "sort_keys",
+    "external_sort"
+]
+
+# merge row sequence column, unique over all runs
+SEQUENCE_COLUMN = "__adbc_sequence"
+
+
+def sort_keys(sort_by: list[Union[str, tuple[str, str]]]) -> list[tuple[str, str]]:
+    """
+    :param sort_by: column names or (name, 'ascending' | 'descending')
+    """
+    return [(_, "ascending") if isinstance(_, str) else (_[0], _[1]) for _ in sort_by]
+
+
+def sort_table(table: Table, keys: list[tuple[str, str]]) -> Table:
+    return table.take(pc.sort_indices(table, sort_keys=keys))
+
+
+def write_run(table: Table, spill_dir: str, batch_size: int) -> str:
+    fd, path = tempfile.mkstemp(dir=spill_dir, suffix=".arrow")
+    os.close(fd)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            for batch in table.to_batches(batch_size):
+                writer.write_batch(batch)
+    return path
+
+
+def read_run(path: str, start: int) -> Generator[Table, None, None]:
+    """
+    Yield run chunks with a global sequence column, starting at start
+    """
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            yield Table.from_batches([batch]).append_column(
+                SEQUENCE_COLUMN, pa.array(range(start, start + batch.num_rows), pa.int64())
+            )
+            start += batch.num_rows
+
+
+def merge_runs(runs: list[Iterator[Table]], keys: list[tuple[str, str]]) -> Generator[Table, None, None]:
+    """
+    Merge sorted runs chunk by chunk
+
+    Rows up to the smallest last key of the runs current chunks are emitted, they are lower or equal
+    than every row not read yet. The run holding this key is read next
+    """
+    carry: Optional[Table] = None
+    lasts: dict[int, Table] = {}
+
+    def pull(index: int):
+        nonlocal carry
+        chunk = next(runs[index], None)
+        if chunk is None or chunk.num_rows == 0:
+            lasts.pop(index, None)
+            return
+        lasts[index] = chunk.slice(chunk.num_rows - 1)
+        carry = chunk if carry is None else pa.concat_tables([carry, chunk])
+
+    for index in range(len(runs)):
+        pull(index)
+
+    while lasts:
+        indices = list(lasts)
+        bounds = pa.concat_tables([lasts[_] for _ in indices])
+        first = pc.sort_indices(bounds, sort_keys=keys)[0].as_py()
+        bound_run = indices[first]
+        bound_sequence = bounds[SEQUENCE_COLUMN][first]
+
+        carry = sort_table(carry, keys)
+        position = pc.index(carry[SEQUENCE_COLUMN], bound_sequence).as_py()
+        yield carry.slice(0, position + 1).drop_columns([SEQUENCE_COLUMN])
+        carry = carry.slice(position + 1)
+        pull(bound_run)
+
+    if carry is not None and carry.num_rows:
+        yield sort_table(carry, keys).drop_columns([SEQUENCE_COLUMN])
+
+
+def external_sort(
+    batches: BatchReader,
+    sort_by: list[Union[str, tuple[str, str]]],
+    memory_bytes: int = 256 * 1024 * 1024,
+    spill_dir: Optional[str] = None,
+    batch_size: int = 65536,
+    memory_budget: Optional[MemoryBudget] = None
+) -> BatchReader:
+    """
+    Sort batches, spilling sorted runs of memory_bytes in spill_dir when input does not fit in memory
+
+    :param batches: BatchReader
+    :param sort_by: column names or (name, 'ascending' | 'descending')
+    :param memory_bytes: in memory rows budget, runs are about this size
+    :param spill_dir: local folder for runs, default system temp folder
+    :param batch_size: output and run batches rows, merge memory is about runs * batch_size rows
+    :param memory_budget: buffered rows are reserved in this budget, runs are also spilled when it is full
+    """
+    keys = sort_keys(sort_by)
+    schema = batches.schema
+
+    def spill(buffer: list[RecordBatch], tmp: str) -> tuple[str, int]:
+        table = sort_table(Table.from_batches(buffer, schema), keys)
+        return write_run(table, tmp, batch_size), table.num_rows
+
+    def release(nbytes: int):
+        if memory_budget is not None:
+            memory_budget.release(nbytes)
+
+    def sorted_batches() -> Generator[RecordBatch, None, None]:
+        buffer: list[RecordBatch] = []
+        # buffered bytes, reserved in memory_budget
+        nbytes = 0
+        # run paths and rows
+        runs: list[tuple[str, int]] = []
+        with tempfile.TemporaryDirectory(dir=spill_dir, prefix="adbc-sort-") as tmp:
+            try:
+                for batch in batches:
+                    if memory_budget is not None and not memory_budget.try_reserve(batch.nbytes):
+                        if buffer:
+                            runs.append(spill(buffer, tmp))
+                            release(nbytes)
+                            buffer, nbytes = [], 0
+                        # one batch always flows
+                        memory_budget.force(batch.nbytes)
+                    buffer.append(batch)
+                    nbytes += batch.nbytes
+                    if nbytes >= memory_bytes:
+                        runs.append(spill(buffer, tmp))
+                        release(nbytes)
+                        buffer, nbytes = [], 0
+            except BaseException as e:
+                release(nbytes)
+                raise e
+
+            if not runs:
+                # fits in memory
+                try:
+                    for batch in sort_table(Table.from_batches(buffer, schema), keys).to_batches(batch_size):
+                        yield batch
+                finally:
+                    release(nbytes)
+                return
+
+            if buffer:
+                runs.append(spill(buffer, tmp))
+                buffer = []
+            release(nbytes)
+
+            # sequences unique over runs
+            readers, start = [], 0
+            for path, rows in runs:
+                readers.append(read_run(path, start))
+                start += rows
+            try:
+                for table in merge_runs(readers, keys):
+                    for batch in table.to_batches(batch_size):
+                        yield batch
+            finally:
+                for reader in readers:
+                    reader.close()
+
+    return BatchReader(schema, sorted_batches(), persisted=False)
@@ -0,0 +1,157 @@
+from itertools import chain
+from typing import Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import Table, ChunkedArray, DataType
+
+from adbc.reader import BatchReader
+
+__all__ = [
+    "sample_batches",
+    "ColumnProfile",
+    "parquet_options"
+]
+
+# dictionary encode columns with less distinct values than this ratio of rows
+DICTIONARY_RATIO = 0.5
+# delta encode columns with at least this ratio of non decreasing consecutive values
+SORTED_RATIO = 0.9
+# no statistics for columns with values wider than this, min/max would bloat the footer
+MAX_STATISTICS_WIDTH = 256
+# bloom filters on high cardinality columns, min/max cannot prune them
+BLOOM_FILTER_RATIO = 0.5
+MAX_BLOOM_FILTER_NDV = 1024 * 1024
+# ParquetWriter bloom_filter_options since pyarrow 24
+BLOOM_FILTERS = int(pa.__version__.split(".", 1)[0]) >= 24
+
+DEFAULT_PAGE_SIZE = 1024 * 1024
+MAX_PAGE_SIZE = 8 * 1024 * 1024
+
+
+def sample_batches(batches: BatchReader, rows: int = 65536) -> tuple[BatchReader, Table]:
+    """
+    Read first batches up to rows
+    :return: BatchReader with all batches, sampled table
+    """
+    iterator = iter(batches)
+    sampled, nrows = [], 0
+    for batch in iterator:
+        sampled.append(batch)
+        nrows += batch.num_rows
+        if nrows >= rows:
+            break
+    return (
+        BatchReader(batches.schema, chain(sampled, iterator), persisted=False),
+        Table.from_batches(sampled, batches.schema)
+    )
+
+
+def is_integer_like(dtype: DataType) -> bool:
+    return pa.types.is_integer(dtype) or pa.types.is_temporal(dtype) and not pa.types.is_interval(dtype)
+
+
+def is_binary_like(dtype: DataType) -> bool:
+    return (
+        pa.types.is_string(dtype) or pa.types.is_large_string(dtype)
+        or pa.types.is_binary(dtype) or pa.types.is_large_binary(dtype)
+    )
+
+
+def is_primitive(dtype: DataType) -> bool:
+    return is_integer_like(dtype) or pa.types.is_floating(dtype) or is_binary_like(dtype) \
+        or pa.types.is_boolean(dtype) or pa.types.is_decimal(dtype)
+
+
+class ColumnProfile:
+    """
+    Cardinality, sortedness and width of a sampled column
+    """
+
+    def __init__(self, name: str, column: ChunkedArray):
+        self.name = name
+        self.dtype = column.type
+        self.rows = len(column)
+        values = column.drop_null()
+        self.distinct = pc.count_distinct(values).as_py() if len(values) else 0
+        self.distinct_ratio = self.distinct / len(values) if len(values) else 0.
+        self.width = column.nbytes / self.rows if self.rows else 0.
+        self.sorted_ratio = self.compute_sorted_ratio(values)
+
+    @staticmethod
+    def compute_sorted_ratio(values: ChunkedArray) -> float:
+        if len(values) < 2:
+            return 1.
+        values = values.combine_chunks()
+        try:
+            ordered = pc.less_equal(values.slice(0, len(values) - 1), values.slice(1))
+        except pa.ArrowNotImplementedError:
+            return 0.
+        return pc.sum(ordered.cast(pa.int64())).as_py() / (len(values) - 1)
+
+    @property
+    def dictionary(self) -> bool:
+        return self.distinct_ratio < DICTIONARY_RATIO and not pa.types.is_boolean(self.dtype)
+
+    @property
+    def sorted(self) -> bool:
+        return self.sorted_ratio >= SORTED_RATIO
+
+    def encoding(self) -> Optional[str]:
+        """
+        Encoding of plain (not dictionary) columns, None for default
+        """
+        if is_integer_like(self.dtype) and self.dtype.bit_width in (32, 64) and self.sorted:
+            return "DELTA_BINARY_PACKED"
+        if is_binary_like(self.dtype):
+            return "DELTA_BYTE_ARRAY" if self.sorted else "DELTA_LENGTH_BYTE_ARRAY"
+        if pa.types.is_floating(self.dtype) and not pa.types.is_float16(self.dtype):
+            return "BYTE_STREAM_SPLIT"
+        return None
+
+    def statistics(self) -> bool:
+        return self.width <= MAX_STATISTICS_WIDTH
+
+    def bloom_filter(self) -> bool:
+        return (is_integer_like(self.dtype) or is_binary_like(self.dtype)) \
+            and self.distinct_ratio >= BLOOM_FILTER_RATIO and not self.sorted
+
+
+def parquet_options(sample: Table, file_rows: int = 4 * 1024 * 1024, bloom_filters: bool = True) -> dict:
+    """
+    ParquetWriter options tuned per column from sampled rows
+    - dictionary for low cardinality columns
+    - delta encodings for sorted integers and strings, byte stream split for floats
+    - no statistics for wide values
+    - bloom filters for high cardinality unsorted columns, sized to file_rows
+    - data pages holding at least 64 values of the widest column
+
+    :param sample: first written rows
+    :param file_rows: expected rows per file
+    :param bloom_filters: write bloom filters, ignored before pyarrow 24
+    """
+    profiles = [ColumnProfile(f.name, sample[f.name]) for f in sample.schema if is_primitive(f.type)]
+    if not sample.num_rows or not profiles:
+        return {}
+    # nested columns keep defaults
+    others = [f.name for f in sample.schema if not is_primitive(f.type)]
+
+    use_dictionary = [_.name for _ in profiles if _.dictionary]
+    column_encoding = {
+        _.name: _.encoding() for _ in profiles
+        if not _.dictionary and _.encoding() is not None
+    }
+    options = {
+        "use_dictionary": use_dictionary + others,
+        "column_encoding": column_encoding,
+        "write_statistics": [_.name for _ in profiles if _.statistics()] + others,
+        "data_page_size": int(min(max(DEFAULT_PAGE_SIZE, 64 * max(_.width for _ in profiles)), MAX_PAGE_SIZE))
+    }
+    if bloom_filters and BLOOM_FILTERS:
+        bloom_filter_options = {
+            _.name: {"ndv": max(1, min(int(_.distinct_ratio * file_rows), MAX_BLOOM_FILTER_NDV)), "fpp": 0.05}
+            for _ in profiles if _.bloom_filter()
+        }
+        if bloom_filter_options:
+            options["bloom_filter_options"] = bloom_filter_options
+    return options
@@ -0,0 +1,336 @@
+import io
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from threading import Condition, Lock
+from typing import Optional, Iterable, Generator
+
+from pyarrow import NativeFile, PythonFile
+from pyarrow.fs import FileSystem
+
+__all__ = [
+    "MultipartUploader",
+    "SpoolFileSystem"
+]
+
+# S3 minimum size of all parts but the last one
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class SpoolFile:
+    """
+    Local file or memory buffer of the part being written: full parts are uploaded while the file is written,
+    the last one when closed
+    """
+
+    def __init__(self, uploader: "MultipartUploader", path: str, metadata: Optional[dict] = None):
+        self.uploader = uploader
+        self.path = path
+        self.metadata = metadata
+        self.closed = False
+        self.aborted = False
+        self.size = 0
+        self.buffered = 0
+        # multipart upload, started by the first full part
+        self.upload_id: Optional[str] = None
+        self.parts: list[Future] = []
+        if uploader.spool_dir is None:
+            self.file, self.filename = io.BytesIO(), None
+        else:
+            fd, self.filename = tempfile.mkstemp(dir=uploader.spool_dir, suffix=".spool")
+            self.file = os.fdopen(fd, "w+b")
+        uploader.open(self)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        size = len(data)
+        if self.aborted:
+            return size
+        self.uploader.reserve(size)
+        self.size += size
+        self.buffered += size
+        self.file.write(data)
+        if self.buffered >= self.uploader.part_size:
+            self.uploader.submit_part(self, self.take())
+        return size
+
+    def tell(self) -> int:
+        return self.size
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        """
+        Buffered bytes, buffer is emptied
+        """
+        if self.filename is None:
+            data, self.file = self.file.getvalue(), io.BytesIO()
+        else:
+            self.file.seek(0)
+            data = self.file.read()
+            self.file.seek(0)
+            self.file.truncate()
+        self.buffered = 0
+        return data
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if not self.aborted:
+            self.uploader.submit(self)
+
+    def release(self):
+        self.file.close()
+        if self.filename is not None:
+            os.remove(self.filename)
+
+
+class SpoolFileSystem:
+    """
+    FileSystem proxy used by file writers: output streams are spooled, then uploaded by MultipartUploader
+    """
+
+    def __init__(self, fs: FileSystem, uploader: "MultipartUploader"):
+        self.fs = fs
+        self.uploader = uploader
+
+    def open_output_stream(self, path: str, compression=None, buffer_size=None, metadata=None) -> NativeFile:
+        return PythonFile(SpoolFile(self.uploader, path, metadata), mode="w")
+
+    def create_dir(self, path: str, recursive: bool = True):
+        # object stores have no folders
+        pass
+
+    def delete_dir_contents(self, path: str, missing_dir_ok: bool = False):
+        self.fs.delete_dir_contents(path, missing_dir_ok=missing_dir_ok)
+
+    def delete_file(self, path: str):
+        self.uploader.discard(path)
+
+
+class MultipartUploader:
+    """
+    Upload files written by DFSWriter to S3 with concurrent multipart uploads
+
+    Files are encoded in a memory or local disk spool, parts are uploaded by max_concurrency threads
+    as soon as they are full, while the file and the next files are encoded.
+    Writers block while spooled bytes exceed max_spool_bytes and uploads are pending: spooled bytes are bounded by
+    max_spool_bytes plus one part per open file
+    """
+
+    def __init__(
+        self,
+        client,
+        part_size: int = 16 * 1024 * 1024,
+        max_concurrency: int = 8,
+        max_spool_bytes: int = 512 * 1024 * 1024,
+        spool_dir: Optional[str] = None
+    ):
+        """
+        :param client: boto3 s3 client
+        :param part_size: multipart upload part size, at least 5 MiB, smaller files are uploaded in one request
+        :param max_concurrency: parts uploaded in parallel
+        :param max_spool_bytes: spooled bytes limit
+        :param spool_dir: spool files in this local folder, default in memory
+        """
+        if part_size < MIN_PART_SIZE:
+            raise ValueError("part_size must be at least %s bytes, got %s" % (MIN_PART_SIZE, part_size))
+        self.client = client
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self.max_spool_bytes = max_spool_bytes
+        self.spool_dir = spool_dir
+
+        self.part_executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix="upload-part")
+        # file uploads wait for their parts on a distinct pool
+        self.file_executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix="upload-file")
+        self.futures: dict[str, Future] = {}
+        # spools being written, by path
+        self.spools: dict[str, SpoolFile] = {}
+        self.lock = Lock()
+        self.spool_condition = Condition()
+        self.spooled_bytes = 0
+        self.uploading = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.file_executor.shutdown(wait=True)
+        self.part_executor.shutdown(wait=True)
+
+    def spool_fs(self, fs: FileSystem) -> SpoolFileSystem:
+        return SpoolFileSystem(fs, self)
+
+    @staticmethod
+    def split_path(path: str) -> tuple[str, str]:
+        bucket, key = path.lstrip("/").split("/", 1)
+        return bucket, key
+
+    def reserve(self, size: int):
+        with self.spool_condition:
+            # backpressure only while uploads can free spool space
+            while self.uploading and self.spooled_bytes + size > self.max_spool_bytes:
+                self.spool_condition.wait()
+            self.spooled_bytes += size
+
+    def free(self, size: int, uploading: bool = True):
+        with self.spool_condition:
+            self.spooled_bytes -= size
+            if uploading:
+                self.uploading -= 1
+            self.spool_condition.notify_all()
+
+    def open(self, spool: SpoolFile):
+        with self.lock:
+            self.spools[spool.path] = spool
+
+    def submit_part(self, spool: SpoolFile, data: bytes):
+        """
+        Upload next part of spool, its bytes are freed once uploaded
+        """
+        bucket, key = self.split_path(spool.path)
+        if spool.upload_id is None:
+            spool.upload_id = self.client.create_multipart_upload(
+                Bucket=bucket, Key=key, **self.extra_args(spool)
+            )["UploadId"]
+        with self.spool_condition:
+            self.uploading += 1
+        future = self.part_executor.submit(
+            self.upload_part, bucket, key, spool.upload_id, len(spool.parts) + 1, data
+        )
+        future.add_done_callback(lambda _, size=len(data): self.free(size))
+        spool.parts.append(future)
+
+    def submit(self, spool: SpoolFile) -> Future:
+        with self.lock:
+            self.spools.pop(spool.path, None)
+        if spool.upload_id is not None and spool.buffered:
+            # last part, may be smaller than part_size
+            self.submit_part(spool, spool.take())
+        with self.spool_condition:
+            self.uploading += 1
+        future = self.file_executor.submit(self.upload, spool)
+        with self.lock:
+            self.futures[spool.path] = future
+        return future
+
+    @staticmethod
+    def extra_args(spool: SpoolFile) -> dict:
+        return {"ContentType": spool.metadata["Content-Type"]} \
+            if spool.metadata and "Content-Type" in spool.metadata else {}
+
+    def upload(self, spool: SpoolFile) -> str:
+        size = spool.buffered
+        try:
+            bucket, key = self.split_path(spool.path)
+            if spool.upload_id is None:
+                self.client.put_object(Bucket=bucket, Key=key, Body=spool.take(), **self.extra_args(spool))
+                return spool.path
+
+            try:
+                parts = [future.result() for future in spool.parts]
+                self.client.complete_multipart_upload(
+                    Bucket=bucket, Key=key, UploadId=spool.upload_id,
+                    MultipartUpload={"Parts": parts}
+                )
+            except BaseException as e:
+                self.abort_parts(spool)
+                raise e
+            return spool.path
+        finally:
+            spool.release()
+            self.free(size)
+
+    def upload_part(self, bucket: str, key: str, upload_id: str, number: int, data: bytes) -> dict:
+        response = self.client.upload_part(
+            Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=data
+        )
+        return {"PartNumber": number, "ETag": response["ETag"]}
+
+    def abort_parts(self, spool: SpoolFile):
+        """
+        Cancel pending parts and abort spool multipart upload
+        """
+        for future in spool.parts:
+            future.cancel()
+        wait(spool.parts)
+        if spool.upload_id is not None:
+            bucket, key = self.split_path(spool.path)
+            self.client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=spool.upload_id)
+
+    def abort(self, path: str) -> bool:
+        """
+        Drop file being written: nothing more is spooled or uploaded, its multipart upload is aborted
+        :return: True if path was being written, else it may be uploaded and must be discarded
+        """
+        with self.lock:
+            spool = self.spools.pop(path, None)
+        if spool is None:
+            return False
+        spool.aborted = True
+        self.free(spool.buffered, uploading=False)
+        spool.buffered = 0
+        try:
+            self.abort_parts(spool)
+        finally:
+            spool.release()
+        return True
+
+    def pop(self, path: str) -> Optional[Future]:
+        with self.lock:
+            return self.futures.pop(path, None)
+
+    def result(self, path: str) -> str:
+        """
+        Wait file upload
+        :return: uploaded path
+        """
+        future = self.pop(path)
+        return future.result() if future is not None else path
+
+    def done(self, path: str) -> bool:
+        with self.lock:
+            future = self.futures.get(path)
+        return future is None or future.done()
+
+    def discard(self, path: str):
+        """
+        Delete spooled or uploaded file
+        """
+        future = self.pop(path)
+        if future is not None:
+            try:
+                future.result()
+            except BaseException:
+                return
+        bucket, key = self.split_path(path)
+        self.client.delete_object(Bucket=bucket, Key=key)
+
+    def uploaded(self, paths: Iterable[str]) -> Generator[str, None, None]:
+        """
+        Yield written paths once uploaded, in order, while next files are written
+        """
+        pending = deque()
+        try:
+            for path in paths:
+                pending.append(path)
+                while pending and self.done(pending[0]):
+                    yield self.result(pending.popleft())
+            while pending:
+                yield self.result(pending.popleft())
+        except BaseException as e:
+            for path in pending:
+                try:
+                    self.discard(path)
+                except BaseException:
+                    pass
+            raise e
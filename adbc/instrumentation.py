@@ -0,0 +1,289 @@
+import logging
+import time
+from threading import Lock, local
+from typing import Callable, Optional, Iterable, Generator, Any, Union
+
+from pyarrow import RecordBatch, Table
+
+__all__ = [
+    "Event",
+    "Hook",
+    "CallbackHook",
+    "LoggingHook",
+    "Aggregator",
+    "Stage",
+    "add_hook",
+    "remove_hook",
+    "instrument",
+    "enabled",
+    "emit"
+]
+
+# registered hooks, replaced not mutated: emitters read it without lock
+HOOKS: tuple["Hook", ...] = ()
+HOOKS_LOCK = Lock()
+# per thread stack of stages pulling items, nested stages add their time to the puller
+PULLS = local()
+
+
+class Event:
+    """
+    Structured instrumentation event
+
+    :param stage: pipeline stage, like 'odbc.fetch', 'cast', 'partition', 'write'
+    :param name: 'batch', 'end' (stage totals), 'wait', 'file_open', 'file_close' or 'connect'
+    :param rows: rows
+    :param bytes: in memory bytes of batches, written bytes for file_close
+    :param wall: seconds spent in the stage
+    :param wait: seconds the stage waited for its input or for backpressure
+    :param attributes: path, query, batches ...
+    """
+
+    __slots__ = ("stage", "name", "rows", "bytes", "wall", "wait", "attributes", "timestamp")
+
+    def __init__(
+        self,
+        stage: str,
+        name: str,
+        rows: int = 0,
+        bytes: int = 0,
+        wall: float = 0.,
+        wait: float = 0.,
+        attributes: Optional[dict] = None
+    ):
+        self.stage = stage
+        self.name = name
+        self.rows = rows
+        self.bytes = bytes
+        self.wall = wall
+        self.wait = wait
+        self.attributes = attributes or {}
+        self.timestamp = time.time()
+
+    def __repr__(self):
+        return "Event(%s)" % ", ".join("%s=%r" % (k, v) for k, v in self.to_dict().items())
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class Hook:
+
+    def __call__(self, event: Event):
+        raise NotImplementedError("%s.__call__ not implemented" % repr(self))
+
+
+class CallbackHook(Hook):
+    """
+    Forward events to callable(event), like a metrics client
+    """
+
+    def __init__(self, callback: Callable[[Event], Any]):
+        self.callback = callback
+
+    def __call__(self, event: Event):
+        self.callback(event)
+
+
+class LoggingHook(Hook):
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG):
+        self.logger = logger if logger is not None else logging.getLogger("adbc.instrumentation")
+        self.level = level
+
+    def __call__(self, event: Event):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(
+                self.level, "%s %s rows=%s bytes=%s wall=%.6fs wait=%.6fs %s",
+                event.stage, event.name, event.rows, event.bytes, event.wall, event.wait, event.attributes
+            )
+
+
+class Aggregator(Hook):
+    """
+    In memory totals by stage and event name, thread safe
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.totals: dict[tuple[str, str], dict[str, Union[int, float]]] = {}
+
+    def __call__(self, event: Event):
+        with self.lock:
+            total = self.totals.get((event.stage, event.name))
+            if total is None:
+                total = self.totals[(event.stage, event.name)] = {
+                    "count": 0, "rows": 0, "bytes": 0, "wall": 0., "wait": 0.
+                }
+            total["count"] += 1
+            total["rows"] += event.rows
+            total["bytes"] += event.bytes
+            total["wall"] += event.wall
+            total["wait"] += event.wait
+
+    def get(self, stage: str, name: str = "batch") -> dict[str, Union[int, float]]:
+        with self.lock:
+            return dict(self.totals.get((stage, name), {"count": 0, "rows": 0, "bytes": 0, "wall": 0., "wait": 0.}))
+
+    def reset(self):
+        with self.lock:
+            self.totals = {}
+
+    def report(self) -> str:
+        with self.lock:
+            lines = ["%-24s %-12s %8s %12s %14s %10s %10s" % (
+                "stage", "event", "count", "rows", "bytes", "wall", "wait"
+            )]
+            for (stage, name), total in sorted(self.totals.items()):
+                lines.append("%-24s %-12s %8d %12d %14d %10.4f %10.4f" % (
+                    stage, name, total["count"], total["rows"], total["bytes"], total["wall"], total["wait"]
+                ))
+            return "\n".join(lines)
+
+
+def add_hook(hook: Union[Hook, Callable[[Event], Any]]) -> Hook:
+    """
+    Register hook, plain callables are wrapped in CallbackHook
+    """
+    global HOOKS
+    if not isinstance(hook, Hook):
+        hook = CallbackHook(hook)
+    with HOOKS_LOCK:
+        HOOKS = HOOKS + (hook,)
+    return hook
+
+
+def remove_hook(hook: Hook):
+    global HOOKS
+    with HOOKS_LOCK:
+        HOOKS = tuple(_ for _ in HOOKS if _ is not hook)
+
+
+class instrument:
+    """
+    Register hook in with block
+
+    with instrument(Aggregator()) as aggregator:
+        ...
+    """
+
+    def __init__(self, hook: Union[Hook, Callable[[Event], Any]]):
+        self.hook = hook
+
+    def __enter__(self) -> Hook:
+        self.hook = add_hook(self.hook)
+        return self.hook
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        remove_hook(self.hook)
+
+
+def enabled() -> bool:
+    return bool(HOOKS)
+
+
+def emit(
+    stage: str,
+    name: str,
+    rows: int = 0,
+    bytes: int = 0,
+    wall: float = 0.,
+    wait: float = 0.,
+    **attributes
+):
+    """
+    Send event to hooks, no op without hooks
+    """
+    hooks = HOOKS
+    if not hooks:
+        return
+    event = Event(stage, name, rows, bytes, wall, wait, attributes)
+    for hook in hooks:
+        hook(event)
+
+
+def pull_frames() -> list[float]:
+    frames = getattr(PULLS, "frames", None)
+    if frames is None:
+        frames = PULLS.frames = []
+    return frames
+
+
+class Stage:
+    """
+    Batch counters of a pipeline stage, emitting one 'batch' event per batch and an 'end' event with totals
+    """
+
+    def __init__(self, stage: str, **attributes):
+        self.stage = stage
+        self.attributes = attributes
+        self.batches = 0
+        self.rows = 0
+        self.bytes = 0
+        self.wall = 0.
+        self.wait = 0.
+        self.closed = False
+
+    def add(self, batch: Union[RecordBatch, Table, None], wall: float = 0., wait: float = 0., **attributes):
+        rows, nbytes = (batch.num_rows, batch.nbytes) if batch is not None else (0, 0)
+        self.batches += 1
+        self.rows += rows
+        self.bytes += nbytes
+        self.wall += wall
+        self.wait += wait
+        emit(self.stage, "batch", rows, nbytes, wall, wait, **self.attributes, **attributes)
+
+    def iterate(
+        self,
+        batches: Iterable,
+        function: Optional[Callable[[Any], Any]] = None,
+        source: bool = False,
+        batch_of: Optional[Callable[[Any], Union[RecordBatch, Table]]] = None,
+        close: bool = True
+    ) -> Generator[Any, None, None]:
+        """
+        Yield items of batches, timed
+        :param function: stage work applied on each item, its time is the stage wall time,
+            time pulling items from batches is wait time
+        :param source: time pulling items is the stage wall time, like a driver fetch, less the time of
+            instrumented stages pulled from it in the same thread, counted as wait
+        :param batch_of: RecordBatch of item, default item itself
+        :param close: emit 'end' event when exhausted or closed
+        """
+        iterator = iter(batches)
+        try:
+            while True:
+                frames = pull_frames()
+                start = time.perf_counter()
+                frames.append(0.)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    upstream = frames.pop()
+                pulled = time.perf_counter()
+                if function is not None:
+                    item = function(item)
+                end = time.perf_counter()
+                if source:
+                    wall, wait = pulled - start - upstream, upstream
+                else:
+                    wall, wait = end - pulled, pulled - start
+                if frames:
+                    # pulled by an outer stage
+                    frames[-1] += end - start
+                self.add(batch_of(item) if batch_of is not None else item, wall, wait)
+                yield item
+        finally:
+            if close:
+                self.close()
+
+    def close(self, **attributes):
+        if self.closed:
+            return
+        self.closed = True
+        emit(
+            self.stage, "end", self.rows, self.bytes, self.wall, self.wait,
+            batches=self.batches, **self.attributes, **attributes
+        )
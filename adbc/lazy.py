@@ -0,0 +1,24 @@
+import sys
+from typing import Any
+
+__all__ = [
+    "loaded",
+    "is_instance"
+]
+
+# backend dependencies imported on first use, never at adbc import
+HEAVY_MODULES = ("arrow_odbc", "pyodbc", "boto3", "botocore", "pandas", "polars")
+
+
+def loaded(module: str) -> bool:
+    return module in sys.modules
+
+
+def is_instance(obj: Any, module: str, name: str) -> bool:
+    """
+    isinstance(obj, module.name) without importing module: no instance exists before its module is imported
+    """
+    if module not in sys.modules:
+        return False
+    cls = getattr(sys.modules[module], name, None)
+    return cls is not None and isinstance(obj, cls)
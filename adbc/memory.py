@@ -0,0 +1,150 @@
+import time
+import weakref
+from threading import Condition
+from typing import Optional, Iterable, Generator, Union
+
+import pyarrow as pa
+from pyarrow import MemoryPool, RecordBatch
+
+from adbc.exception import MemoryBudgetExceeded
+
+__all__ = [
+    "MemoryBudget",
+    "set_memory_budget",
+    "get_memory_budget",
+    "resolve_budget"
+]
+
+
+class MemoryBudget:
+    """
+    Bytes budget of in flight Arrow data, shared by readers, casts and writers of a pipeline or process
+
+    Components reserve the bytes of batches they hold and release them when done. Blocking reservations wait
+    for releases of other threads (backpressure), a single reservation larger than the limit is granted when
+    nothing else is reserved, so one batch always flows. Arrow memory pool usage is reported along with
+    reservations and, with track_pool, counts in over_limit
+    """
+
+    def __init__(self, limit: int, pool: Optional[MemoryPool] = None, track_pool: bool = False):
+        """
+        :param limit: max reserved bytes
+        :param pool: pyarrow.MemoryPool, default pyarrow.default_memory_pool()
+        :param track_pool: over_limit also when pool allocated bytes exceed limit
+        """
+        if limit <= 0:
+            raise ValueError("MemoryBudget limit must be positive, got %s" % limit)
+        self.limit = limit
+        self.pool = pool if pool is not None else pa.default_memory_pool()
+        self.track_pool = track_pool
+        self.condition = Condition()
+        self.current = 0
+        self.peak = 0
+
+    def __repr__(self):
+        return "MemoryBudget(limit=%s, current=%s, peak=%s)" % (self.limit, self.current, self.peak)
+
+    def add(self, nbytes: int):
+        self.current += nbytes
+        self.peak = max(self.peak, self.current)
+
+    def fits(self, nbytes: int) -> bool:
+        return self.current == 0 or self.current + nbytes <= self.limit
+
+    def reserve(self, nbytes: int, block: bool = True, timeout: Optional[float] = None):
+        """
+        :param nbytes: reserved bytes
+        :param block: wait releases, else raise MemoryBudgetExceeded
+        :param timeout: raise MemoryBudgetExceeded after waiting this number of seconds
+        """
+        with self.condition:
+            if not self.fits(nbytes):
+                if not block:
+                    raise MemoryBudgetExceeded("%s: cannot reserve %s bytes" % (repr(self), nbytes))
+                deadline = time.monotonic() + timeout if timeout is not None else None
+                while not self.fits(nbytes):
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise MemoryBudgetExceeded("%s: cannot reserve %s bytes after %ss" % (
+                            repr(self), nbytes, timeout
+                        ))
+                    self.condition.wait(remaining)
+            self.add(nbytes)
+
+    def try_reserve(self, nbytes: int) -> bool:
+        with self.condition:
+            if not self.fits(nbytes):
+                return False
+            self.add(nbytes)
+            return True
+
+    def force(self, nbytes: int):
+        """
+        Reserve without limit, holder must free memory when over_limit
+        """
+        with self.condition:
+            self.add(nbytes)
+
+    def release(self, nbytes: int):
+        with self.condition:
+            self.current = max(self.current - nbytes, 0)
+            self.condition.notify_all()
+
+    def over_limit(self) -> bool:
+        return self.current > self.limit or (self.track_pool and self.pool.bytes_allocated() > self.limit)
+
+    def hold(self, obj, nbytes: int):
+        """
+        Release nbytes once obj, like a Table, is garbage collected
+        """
+        weakref.finalize(obj, self.release, nbytes)
+
+    def stream(self, batches: Iterable[RecordBatch], block: bool = False) -> Generator[RecordBatch, None, None]:
+        """
+        Account each batch while the consumer holds it, the previous one is released before reserving the next
+        :param block: wait releases of other threads, the consumer thread must not hold reservations
+        """
+        held = 0
+        try:
+            for batch in batches:
+                self.release(held)
+                held = batch.nbytes
+                if block:
+                    self.reserve(held)
+                else:
+                    self.force(held)
+                yield batch
+        finally:
+            self.release(held)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "current": self.current,
+            "peak": self.peak,
+            "pool_bytes": self.pool.bytes_allocated(),
+            "pool_peak": self.pool.max_memory(),
+            "pool_backend": self.pool.backend_name
+        }
+
+
+# process wide default budget
+DEFAULT_BUDGET: Optional[MemoryBudget] = None
+
+
+def set_memory_budget(budget: Union[MemoryBudget, int, None]) -> Optional[MemoryBudget]:
+    """
+    Set process default budget, used by components without explicit memory_budget
+    :param budget: MemoryBudget, bytes limit or None to disable
+    """
+    global DEFAULT_BUDGET
+    DEFAULT_BUDGET = MemoryBudget(budget) if isinstance(budget, int) else budget
+    return DEFAULT_BUDGET
+
+
+def get_memory_budget() -> Optional[MemoryBudget]:
+    return DEFAULT_BUDGET
+
+
+def resolve_budget(budget: Optional[MemoryBudget] = None) -> Optional[MemoryBudget]:
+    return budget if budget is not None else DEFAULT_BUDGET
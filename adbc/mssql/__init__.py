@@ -5,7 +5,7 @@ from pyarrow import schema as schema_builder, Schema
 
 from adbc.enums import Protocol
 from adbc.exception import TableNotFound
-from adbc.mssql.dtype import mssql_column_to_pyarrow_field
+from adbc.mssql.dtype import mssql_column_to_pyarrow_field, MSSQL_DIALECT
 from adbc.odbc import ODBC
 
 __all__ = [
@@ -14,6 +14,7 @@ __all__ = [
 
 
 class MSSQL(ODBC):
+    DIALECT = MSSQL_DIALECT.name
 
     def __init__(self, uri: str):
         super(MSSQL, self).__init__(protocol=Protocol.mssql, uri=uri)
@@ -1,5 +1,6 @@
 __all__ = [
-    "mssql_column_to_pyarrow_field"
+    "mssql_column_to_pyarrow_field",
+    "MSSQL_DIALECT"
 ]
 
 import datetime
@@ -7,8 +8,10 @@ import decimal
 from typing import Optional
 
 import pyarrow as pa
-from adbc.dtype import INT32, INT16, INT8, FLOAT32, FLOAT64, STRING, int_to_timeunit
-from pyarrow import field
+from adbc.dialect import Dialect, register_dialect, time_precision
+from adbc.dtype import INT32, INT16, INT8, INT64, UINT8, UINT16, UINT32, UINT64, FLOAT16, FLOAT32, FLOAT64, STRING, \
+    LARGE_STRING, BINARY, LARGE_BINARY, BOOL, DATE32, DATE64, int_to_timeunit
+from pyarrow import field, DataType
 
 from adbc.odbc.dtype import DATATYPES
 
@@ -42,6 +45,35 @@ STRING_DATATYPES = {
 }
 
 
+def mssql_sqltype(dialect: Dialect, dtype: DataType) -> Optional[str]:
+    if pa.types.is_decimal(dtype):
+        return "decimal(%s,%s)" % (dtype.precision, dtype.scale) if dtype.precision <= 38 else None
+    if pa.types.is_timestamp(dtype):
+        # 7 fractional digits at most, 100ns
+        return "%s(%s)" % ("datetimeoffset" if dtype.tz else "datetime2", min(time_precision(dtype), 7))
+    if pa.types.is_time(dtype):
+        return "time(%s)" % min(time_precision(dtype), 7)
+    if pa.types.is_fixed_size_binary(dtype):
+        return "binary(%s)" % dtype.byte_width
+    return None
+
+
+MSSQL_DIALECT = register_dialect(Dialect(
+    "mssql",
+    STRING_DATATYPES,
+    {
+        BOOL: "bit", INT8: "smallint", INT16: "smallint", INT32: "int", INT64: "bigint",
+        UINT8: "tinyint", UINT16: "int", UINT32: "bigint", UINT64: "decimal(20,0)",
+        FLOAT16: "real", FLOAT32: "real", FLOAT64: "float",
+        STRING: "nvarchar(max)", LARGE_STRING: "nvarchar(max)",
+        BINARY: "varbinary(max)", LARGE_BINARY: "varbinary(max)",
+        DATE32: "date", DATE64: "date"
+    },
+    mssql_sqltype,
+    quote="[%s]"
+))
+
+
 def mssql_column_to_pyarrow_field(
     catalog: str, schema: str, table: str, name: str, nullable: bool, dtype: str,
     precision: Optional[int] = None,
@@ -51,7 +83,7 @@ def mssql_column_to_pyarrow_field(
     try:
         return field(
             name,
-            STRING_DATATYPES[dtype](precision=precision, scale=scale),
+            MSSQL_DIALECT.to_arrow(dtype, precision, scale),
             nullable,
             {
                 b"catalog": catalog,
@@ -1,4 +1,10 @@
-from arrow_odbc import read_arrow_batches_from_odbc
+import time
+
+from pyarrow import RecordBatchReader, Schema
+
+from adbc import instrumentation
+from adbc.memory import MemoryBudget, resolve_budget
+from adbc.odbc.dtype import ODBC_DIALECT
 
 from adbc.odbc.writer import ODBCWriter
 from adbc.reader import LazyReader
@@ -23,6 +29,7 @@ class ODBCConnection(Connection):
 
 
 class ODBC(Server):
+    DIALECT = ODBC_DIALECT.name
 
     def __init__(self, protocol: str, uri: str):
         super(ODBC, self).__init__(protocol=protocol)
@@ -30,7 +37,32 @@ class ODBC(Server):
 
     def connect(self):
         from pyodbc import connect
-        return ODBCConnection(self, connect(self.uri))
+        start = time.perf_counter()
+        connection = ODBCConnection(self, connect(self.uri))
+        instrumentation.emit("odbc", "connect", wall=time.perf_counter() - start)
+        return connection
+
+    def read_odbc_batches(self, *args, **kwargs):
+        """
+        arrow_odbc.read_arrow_batches_from_odbc, driver entry point of arrow_batches
+        """
+        from arrow_odbc import read_arrow_batches_from_odbc
+        return read_arrow_batches_from_odbc(*args, **kwargs)
+
+    def fetch_odbc_batches(self, query: str, *args, **kwargs):
+        """
+        read_odbc_batches, timed as connect event and odbc.fetch stage when instrumented
+        """
+        if not instrumentation.enabled():
+            return self.read_odbc_batches(query, *args, **kwargs)
+        start = time.perf_counter()
+        reader = self.read_odbc_batches(query, *args, **kwargs)
+        # connection and query execution
+        instrumentation.emit("odbc", "connect", wall=time.perf_counter() - start, query=query)
+        return RecordBatchReader.from_batches(
+            reader.schema,
+            instrumentation.Stage("odbc.fetch", query=query).iterate(reader, source=True)
+        )
 
     def arrow_batches(
         self,
@@ -42,9 +74,15 @@ class ODBC(Server):
         max_text_size: Optional[int] = None,
         max_binary_size: Optional[int] = None,
         falliable_allocations: bool = True,
-        lazy: bool = False
+        lazy: bool = False,
+        memory_budget: Optional[MemoryBudget] = None
     ):
-        reader = read_arrow_batches_from_odbc(
+        """
+        :param memory_budget: adbc.memory.MemoryBudget, default process budget: fetched batches are reserved
+            while consumed, so writers and sorts sharing the budget flush or spill. Use BatchReader.prefetch
+            to fetch in background, waiting when the budget is used
+        """
+        reader = self.fetch_odbc_batches(
             query,
             batch_size,
             self.uri,
@@ -56,7 +94,7 @@ class ODBC(Server):
             falliable_allocations
         )
         return LazyReader(
-            read_arrow_batches_from_odbc,
+            self.fetch_odbc_batches,
             reader.schema,
             False,
             query,
@@ -68,7 +106,33 @@ class ODBC(Server):
             max_text_size,
             max_binary_size,
             falliable_allocations
-        ) if lazy else BatchReader(reader.schema, reader, persisted=False)
+        ) if lazy else BatchReader(
+            reader.schema,
+            reader if resolve_budget(memory_budget) is None else resolve_budget(memory_budget).stream(reader),
+            persisted=False
+        )
+
+    def create_table(
+        self,
+        name: str,
+        arrow_schema: Schema,
+        schema: Optional[str] = None,
+        catalog: Optional[str] = None
+    ):
+        """
+        Create table with columns typed by dialect DDL mapping
+        :param name: table name
+        :param arrow_schema: pyarrow.Schema of the columns
+        :param schema: database schema
+        :param catalog: unused, connection database
+        """
+        with self.connect() as connection:
+            cursor = connection.client.cursor()
+            try:
+                cursor.execute(self.dialect.create_table(name, arrow_schema, schema))
+                connection.client.commit()
+            finally:
+                cursor.close()
 
     def write(self, table: str, schema: Optional[str] = None, catalog: Optional[str] = None):
         return ODBCWriter(self, table, schema, catalog)
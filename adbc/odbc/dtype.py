@@ -1,6 +1,7 @@
 __all__ = [
     "pyodbc_description_to_pyarrow_field",
-    "DATATYPES"
+    "DATATYPES",
+    "ODBC_DIALECT"
 ]
 
 import decimal
@@ -8,7 +9,8 @@ import datetime
 from typing import Optional
 
 from adbc.dtype import BINARY, UTCTIMESTAMP, TIMESTAMP, TIMESTAMPMS, STRING, LARGE_STRING, BOOL, fine_float, fine_int, \
-    DATE, TIMETYPES, fine_decimal, int_to_timeunit, LARGE_BINARY
+    DATE, TIMETYPES, fine_decimal, int_to_timeunit, LARGE_BINARY, ANSI, ansi_sqltype
+from adbc.dialect import Dialect, register_dialect
 import pyarrow as pa
 from pyarrow import Field, field
 
@@ -45,6 +47,9 @@ DATATYPES = {
     datetime.datetime: lambda scale=None, *args, **kwargs: pa.timestamp(int_to_timeunit(scale))
 }
 
+# keyed by pyodbc cursor.description type codes, ANSI DDL
+ODBC_DIALECT = register_dialect(Dialect("odbc", DATATYPES, ANSI.sqltypes, ansi_sqltype))
+
 
 def pyodbc_description_to_pyarrow_field(description: tuple, metadata: Optional[dict] = None) -> Field:
     """
@@ -56,7 +61,7 @@ def pyodbc_description_to_pyarrow_field(description: tuple, metadata: Optional[d
     name, type_code, _, _, precision, scale, null_ok = description
     return field(
         name,
-        DATATYPES[type_code](precision=precision, scale=scale),
+        ODBC_DIALECT.to_arrow(type_code, precision, scale),
         null_ok,
         metadata
     )
@@ -1,7 +1,7 @@
+import time
 from typing import Optional
 
-from arrow_odbc import insert_into_table
-
+from adbc import instrumentation
 from adbc.exception import TableNotFound
 from adbc.reader import BatchReader
 from adbc.writer.batchwriter import BatchWriter
@@ -22,17 +22,48 @@ class ODBCWriter(BatchWriter):
         cast: bool = True,
         safe: bool = True,
         append: bool = True,
+        create: bool = False,
         **kwargs
     ):
-        if cast:
+        """
+        :param create: create missing table from batches schema with the server dialect DDL,
+            else raise TableNotFound
+        """
+        if cast or create:
             try:
                 table_schema = self.server.table_schema(self.table, schema=self.schema, catalog=self.catalog)
             except TableNotFound as e:
-                # TODO should create table from schema
-                raise e
-            batches = batches.cast(table_schema, safe=safe, fill_empty=False, drop=True)
+                if not create:
+                    raise e
+                # columns typed from batches, no cast needed
+                self.server.create_table(self.table, batches.schema, schema=self.schema, catalog=self.catalog)
+            else:
+                if cast:
+                    batches = batches.cast(table_schema, safe=safe, fill_empty=False, drop=True)
+        if not instrumentation.enabled():
+            self.insert(batches, chunk_size, **kwargs)
+            return
+
+        stage = instrumentation.Stage("odbc.insert", table=self.table)
+        start = time.perf_counter()
+        try:
+            self.insert(
+                BatchReader(batches.schema, stage.iterate(batches.batches, close=False)),
+                chunk_size, **kwargs
+            )
+        finally:
+            # driver time, without waiting input batches
+            stage.wall = time.perf_counter() - start - stage.wait
+            stage.close()
+
+    def insert(self, batches: BatchReader, chunk_size: int = 65536, **kwargs):
+        """
+        arrow_odbc.insert_into_table, driver entry point of write_batches
+        """
+        from arrow_odbc import insert_into_table
         insert_into_table(
-            batches,
+            # exported through the Arrow C stream interface
+            batches.to_reader(),
             chunk_size,
             self.table,
             self.server.uri,
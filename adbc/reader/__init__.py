@@ -1,2 +1,3 @@
 from .batchreader import *
 from .lazyreader import *
+from .compaction import *
@@ -1,6 +1,9 @@
-from typing import Generator, Any, Iterable, Union, Optional
+from functools import partial
+from itertools import chain
+from queue import Queue, Empty, Full
+from threading import Thread, Event
+from typing import Generator, Any, Iterable, Union, Optional, Callable
 
-from arrow_odbc import BatchReader as _BatchReader
 from pyarrow import RecordBatchReader, Schema, RecordBatch, Table, DataType,\
     schema as schema_builder, field as field_builder
 
@@ -8,7 +11,80 @@ __all__ = [
     "BatchReader"
 ]
 
+from adbc import instrumentation
+from adbc.lazy import is_instance
 from adbc.dtype import cast_batch, intersect_schemas, safe_datatype
+from adbc.memory import MemoryBudget, resolve_budget
+
+# prefetch queue end marker
+END = object()
+
+
+def prefetch_batches(
+    batches: Iterable[RecordBatch],
+    buffer_size: int,
+    budget: Optional[MemoryBudget] = None,
+    poll_interval: float = 0.1
+) -> Generator[RecordBatch, None, None]:
+    """
+    Read batches in a background thread, at most buffer_size ahead,
+    each batch reserved in budget until the consumer asks for the next one
+    """
+    queue, stop = Queue(buffer_size), Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=poll_interval)
+                return True
+            except Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for batch in batches:
+                if budget is not None:
+                    # backpressure: wait consumer releases
+                    while not stop.is_set() and not budget.try_reserve(batch.nbytes):
+                        with budget.condition:
+                            budget.condition.wait(poll_interval)
+                if stop.is_set() or not put(batch):
+                    if budget is not None:
+                        budget.release(batch.nbytes)
+                    return
+            put(END)
+        except BaseException as e:
+            put(e)
+
+    thread = Thread(target=produce, name="adbc-prefetch", daemon=True)
+    thread.start()
+    held = 0
+    try:
+        while True:
+            # asking the next batch releases the previous one
+            if budget is not None:
+                budget.release(held)
+                held = 0
+            item = queue.get()
+            if item is END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            held = item.nbytes
+            yield item
+    finally:
+        stop.set()
+        if budget is not None:
+            budget.release(held)
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except Empty:
+                    break
+                if isinstance(item, RecordBatch):
+                    budget.release(item.nbytes)
+        thread.join()
 
 
 class BatchReader:
@@ -16,10 +92,15 @@ class BatchReader:
     @classmethod
     def from_arrow(
         cls,
-        batches: Union[RecordBatchReader, _BatchReader, RecordBatch, Table],
+        batches: Union[RecordBatchReader, "arrow_odbc.BatchReader", RecordBatch, Table, Any],
         chunk_size: Optional[int] = None
     ):
-        if isinstance(batches, _BatchReader):
+        """
+        :param batches: pyarrow or arrow_odbc reader, RecordBatch, Table or any object exporting
+            the Arrow PyCapsule stream protocol (__arrow_c_stream__), like polars or duckdb results
+        :param chunk_size: max rows of RecordBatch and Table batches
+        """
+        if is_instance(batches, "arrow_odbc", "BatchReader"):
             return BatchReader(batches.schema, batches, persisted=False)
         elif isinstance(batches, RecordBatch):
             if chunk_size:
@@ -33,6 +114,9 @@ class BatchReader:
             return BatchReader(batches.schema, batches.to_batches(chunk_size), persisted=True)
         elif isinstance(batches, RecordBatchReader):
             return BatchReader(batches.schema, batches, persisted=False)
+        elif hasattr(batches, "__arrow_c_stream__"):
+            reader = RecordBatchReader.from_stream(batches)
+            return BatchReader(reader.schema, reader, persisted=False)
         else:
             raise TypeError("Cannot build BatchReader from object.__class__=%s" % batches.__class__)
 
@@ -49,7 +133,23 @@ class BatchReader:
     def __call__(self, *args, **kwargs):
         return self.batches
 
+    def __arrow_c_stream__(self, requested_schema: Optional[Any] = None):
+        """
+        Arrow PyCapsule stream protocol, consumers like duckdb, polars or pyarrow pull batches lazily
+        through the C stream interface, without copies
+        """
+        return self.to_reader().__arrow_c_stream__(requested_schema)
+
+    def to_reader(self) -> RecordBatchReader:
+        """
+        pyarrow.RecordBatchReader pulling batches from this reader on demand
+        """
+        return RecordBatchReader.from_batches(self.schema, iter(self))
+
     def __iter__(self):
+        if instrumentation.enabled():
+            # time of instrumented upstream readers and stages is wait, not counted twice
+            return instrumentation.Stage(self.__class__.__name__).iterate(self.batches, source=True)
         return (_ for _ in self.batches)
 
     @property
@@ -61,22 +161,93 @@ class BatchReader:
     def batches(self, batches):
         self._batches = batches
 
-    def persist(self):
+    def persist(self, memory_budget: Optional[MemoryBudget] = None):
+        """
+        :param memory_budget: account copied batches while the returned reader lives,
+            default process budget, raise MemoryBudgetExceeded over limit
+        """
         if self.persisted:
-            return BatchReader(self.schema, list(self.batches))
+            budget = resolve_budget(memory_budget)
+            batches, nbytes = self.budgeted_batches(budget)
+            reader = BatchReader(self.schema, batches)
+            if budget is not None:
+                budget.hold(reader, nbytes)
+            return reader
         return self
 
+    def budgeted_batches(self, budget: Optional[MemoryBudget] = None) -> tuple[list[RecordBatch], int]:
+        """
+        Read all batches, each reserved in budget without waiting
+        :return: batches, reserved bytes
+        """
+        if budget is None:
+            return list(iter(self)), 0
+        batches, nbytes = [], 0
+        try:
+            for batch in self:
+                budget.reserve(batch.nbytes, block=False)
+                nbytes += batch.nbytes
+                batches.append(batch)
+        except BaseException as e:
+            budget.release(nbytes)
+            raise e
+        return batches, nbytes
+
+    def prefetch(
+        self,
+        buffer_size: int = 2,
+        memory_budget: Optional[MemoryBudget] = None
+    ) -> "BatchReader":
+        """
+        Read next batches in a background thread while current ones are processed
+        :param buffer_size: max batches read ahead
+        :param memory_budget: prefetch blocks while the budget is used, default process budget
+        """
+        return BatchReader(
+            self.schema,
+            prefetch_batches(self.batches, buffer_size, resolve_budget(memory_budget)),
+            persisted=False
+        )
+
     def close(self):
         pass
 
-    def cast(self, schema: Schema, safe: bool = True, fill_empty: bool = True, drop: bool = False):
+    def cast(
+        self,
+        schema: Schema,
+        safe: bool = True,
+        fill_empty: bool = True,
+        drop: bool = False,
+        processes: Optional[int] = None
+    ):
+        """
+        :param processes: cast in this number of worker processes, for python bound casts
+            like safe string to date, see process_map
+        """
         _schema = schema if (fill_empty and not drop) else intersect_schemas(self.schema, schema, True)
+        if processes:
+            return self.process_map(
+                partial(cast_batch, schema=_schema, safe=safe, fill_empty=fill_empty, drop=drop),
+                _schema, processes
+            )
+        if instrumentation.enabled():
+            return BatchReader(
+                _schema,
+                instrumentation.Stage("cast").iterate(
+                    self.batches, lambda _: cast_batch(_, _schema, safe, fill_empty, drop)
+                )
+            )
         return BatchReader(
             _schema,
             (cast_batch(_, _schema, safe, fill_empty, drop) for _ in self.batches)
         )
 
-    def cast_columns(self, columns: dict[str, Union[DataType, str]], safe: bool = True):
+    def cast_columns(
+        self,
+        columns: dict[str, Union[DataType, str]],
+        safe: bool = True,
+        processes: Optional[int] = None
+    ):
         columns = {
             k: safe_datatype(v)
             for k, v in columns.items()
@@ -88,14 +259,127 @@ class BatchReader:
                     for field in self.schema
                 ]
             ),
-            safe=safe, fill_empty=True, drop=False
+            safe=safe, fill_empty=True, drop=False, processes=processes
         )
 
+    def process_map(
+        self,
+        function: Callable[[RecordBatch], Union[RecordBatch, Table]],
+        schema: Optional[Schema] = None,
+        processes: Optional[int] = None,
+        in_flight: Optional[int] = None,
+        mp_context: Optional[str] = "spawn"
+    ) -> "BatchReader":
+        """
+        Apply function on batches in worker processes, exchanged as Arrow IPC in shared memory, in order
+        :param function: picklable callable(RecordBatch) -> RecordBatch or Table, like a module function
+            or functools.partial of one
+        :param schema: output schema, default schema of the first output, processed on call
+        :param processes: worker processes, default os.cpu_count()
+        :param in_flight: max batches in workers and not yet read, default 2 * processes
+        :param mp_context: multiprocessing start method
+        """
+        from adbc.reader.parallel import process_batches
+
+        batches = process_batches(self.batches, function, processes, in_flight, mp_context)
+        if instrumentation.enabled():
+            batches = instrumentation.Stage("process", processes=processes).iterate(batches, source=True)
+        if schema is None:
+            first = next(batches, None)
+            if first is None:
+                return BatchReader(self.schema, [], persisted=False)
+            schema, batches = first.schema, chain([first], batches)
+        return BatchReader(schema, batches, persisted=False)
+
+    def compact(
+        self,
+        dictionary_ratio: float = 0.1,
+        narrow_integers: bool = False,
+        sample_rows: int = 65536,
+        integer_bounds: Optional[dict[str, tuple[int, int]]] = None
+    ) -> "BatchReader":
+        """
+        Dictionary encode low cardinality strings and narrow integers, see adbc.reader.CompactReader
+        :param dictionary_ratio: max distinct values / rows of dictionary encoded columns
+        :param narrow_integers: narrow integer columns to their integer_bounds, or persisted batches values range
+        :param sample_rows: first rows read to plan columns
+        :param integer_bounds: {column: (min, max)} known from the source, like table statistics or constraints
+        """
+        from adbc.reader.compaction import CompactReader
+
+        return CompactReader(self, dictionary_ratio, narrow_integers, sample_rows, integer_bounds)
+
+    def iter_pandas(self, **kwargs) -> Generator["pandas.DataFrame", None, None]:
+        """
+        One pandas.DataFrame per batch
+        :param kwargs: pyarrow.RecordBatch.to_pandas options
+        """
+        for batch in self:
+            yield batch.to_pandas(**kwargs)
+
+    def to_pandas(self, memory_budget: Optional[MemoryBudget] = None, **kwargs) -> "pandas.DataFrame":
+        """
+        Convert batch by batch, arrow batches are released once converted: no whole Table next to its DataFrame
+        :param memory_budget: account converted frames, default process budget, raise MemoryBudgetExceeded over limit
+        :param kwargs: pyarrow.RecordBatch.to_pandas options
+        """
+        import pandas
+
+        budget = resolve_budget(memory_budget)
+        frames, nbytes = [], 0
+        try:
+            for frame in self.iter_pandas(**kwargs):
+                size = int(frame.memory_usage(index=True, deep=False).sum())
+                if budget is not None:
+                    budget.reserve(size, block=False)
+                nbytes += size
+                frames.append(frame)
+        except BaseException as e:
+            if budget is not None:
+                budget.release(nbytes)
+            raise e
+        if not frames:
+            frame = self.schema.empty_table().to_pandas(**kwargs)
+        else:
+            frame = frames[0] if len(frames) == 1 else pandas.concat(frames, ignore_index=True)
+        if budget is not None:
+            budget.hold(frame, nbytes)
+        return frame
+
+    def to_polars(self, memory_budget: Optional[MemoryBudget] = None, rechunk: bool = False) -> "polars.DataFrame":
+        """
+        polars.DataFrame sharing batches buffers, without copies unless rechunk
+        :param memory_budget: account batches while the frame lives, default process budget,
+            raise MemoryBudgetExceeded over limit
+        :param rechunk: contiguous columns, copied
+        """
+        import polars
+
+        budget = resolve_budget(memory_budget)
+        batches, nbytes = self.budgeted_batches(budget)
+        if batches:
+            frame = polars.concat([polars.from_arrow(_) for _ in batches], rechunk=rechunk)
+        else:
+            frame = polars.from_arrow(self.schema.empty_table())
+        if budget is not None:
+            budget.hold(frame, nbytes)
+        return frame
+
     def rows(self) -> Generator[tuple[Any], None, None]:
         for batch in self.batches:
             batch = batch.to_pydict()
             for row in zip(*(batch[k] for k in batch)):
                 yield row
 
-    def read_all(self):
-        return Table.from_batches(self.batches, self.schema)
+    def read_all(self, memory_budget: Optional[MemoryBudget] = None) -> Table:
+        """
+        :param memory_budget: account table bytes while it lives, default process budget,
+            raise MemoryBudgetExceeded over limit
+        """
+        budget = resolve_budget(memory_budget)
+        if budget is None:
+            return Table.from_batches(iter(self), self.schema)
+        batches, nbytes = self.budgeted_batches(budget)
+        table = Table.from_batches(batches, self.schema)
+        budget.hold(table, nbytes)
+        return table
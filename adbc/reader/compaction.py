@@ -0,0 +1,196 @@
+from typing import Optional, Generator
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import Schema, RecordBatch, Table, DataType, Array, schema as schema_builder, field as field_builder
+
+from adbc import instrumentation
+from adbc.reader import BatchReader
+
+__all__ = [
+    "CompactReader"
+]
+
+# dictionary encode columns with less distinct values than this ratio of rows
+DICTIONARY_RATIO = 0.1
+SIGNED_INTEGERS = (pa.int8(), pa.int16(), pa.int32(), pa.int64())
+UNSIGNED_INTEGERS = (pa.uint8(), pa.uint16(), pa.uint32(), pa.uint64())
+
+
+def is_dictionary_candidate(dtype: DataType) -> bool:
+    return (
+        pa.types.is_string(dtype) or pa.types.is_large_string(dtype)
+        or pa.types.is_binary(dtype) or pa.types.is_large_binary(dtype)
+    )
+
+
+def integer_bounds(dtype: DataType) -> tuple[int, int]:
+    if pa.types.is_signed_integer(dtype):
+        return -2 ** (dtype.bit_width - 1), 2 ** (dtype.bit_width - 1) - 1
+    return 0, 2 ** dtype.bit_width - 1
+
+
+def narrowest_integer(dtype: DataType, low: Optional[int], high: Optional[int]) -> DataType:
+    """
+    Smallest integer type of dtype signedness holding [low, high], dtype at most
+    """
+    if low is None:
+        return dtype
+    for candidate in SIGNED_INTEGERS if pa.types.is_signed_integer(dtype) else UNSIGNED_INTEGERS:
+        if candidate.bit_width >= dtype.bit_width:
+            break
+        lower, upper = integer_bounds(candidate)
+        if lower <= low and high <= upper:
+            return candidate
+    return dtype
+
+
+def integer_range(array: Array) -> tuple[Optional[int], Optional[int]]:
+    min_max = pc.min_max(array)
+    return min_max["min"].as_py(), min_max["max"].as_py()
+
+
+class CompactReader(BatchReader):
+    """
+    Memory compacting stage, planned on the first batches
+    - string and binary columns with less distinct values than dictionary_ratio are dictionary encoded
+    - integers narrowed to the smallest type holding their guaranteed range, if narrow_integers: integer_bounds,
+      else the values of all batches of a persisted source. Streamed columns without bounds keep their type
+
+    Every batch has the planned schema: dictionary columns stay encoded past the sample, even when later
+    batches bring more distinct values.
+    Planning reads the first batches on first schema access or iteration
+    """
+
+    def __init__(
+        self,
+        reader: BatchReader,
+        dictionary_ratio: float = DICTIONARY_RATIO,
+        narrow_integers: bool = False,
+        sample_rows: int = 65536,
+        integer_bounds: Optional[dict[str, tuple[int, int]]] = None
+    ):
+        """
+        :param reader: source BatchReader
+        :param dictionary_ratio: max distinct values / rows of dictionary encoded columns
+        :param narrow_integers: narrow integer columns to their guaranteed values range
+        :param sample_rows: rows read to plan columns
+        :param integer_bounds: {column: (min, max)} known from the source, like table statistics or constraints
+        """
+        self.source = reader
+        self.dictionary_ratio = dictionary_ratio
+        self.narrow_integers = narrow_integers
+        self.integer_bounds = integer_bounds or {}
+        self.sample_rows = sample_rows
+        self.persisted = False
+        # set by plan
+        self.types: dict[str, DataType] = {}
+        self.planned_schema: Optional[Schema] = None
+        self.sampled: list[RecordBatch] = []
+        self.iterator = None
+
+    @property
+    def schema(self) -> Schema:
+        if self.planned_schema is None:
+            self.plan()
+        return self.planned_schema
+
+    @property
+    def batches(self) -> Generator[RecordBatch, None, None]:
+        return self.compact_batches()
+
+    def plan(self):
+        """
+        Read first batches up to sample_rows and plan compact types
+        """
+        self.iterator = iter(self.source)
+        rows = 0
+        for batch in self.iterator:
+            self.sampled.append(batch)
+            rows += batch.num_rows
+            if rows >= self.sample_rows:
+                break
+        self.types = self.plan_types(Table.from_batches(self.sampled, self.source.schema))
+        self.planned_schema = schema_builder(
+            [
+                field_builder(f.name, self.types[f.name], f.nullable, f.metadata) if f.name in self.types else f
+                for f in self.source.schema
+            ],
+            self.source.schema.metadata
+        )
+
+    def plan_types(self, sample: Table) -> dict[str, DataType]:
+        """
+        Compact types of sampled columns, by name
+        """
+        types = {}
+        for f in sample.schema:
+            column = sample[f.name]
+            values = len(column) - column.null_count
+            if not values:
+                continue
+            if is_dictionary_candidate(f.type):
+                if pc.count_distinct(column).as_py() / values < self.dictionary_ratio:
+                    types[f.name] = pa.dictionary(pa.int32(), f.type)
+            elif self.narrow_integers and pa.types.is_integer(f.type):
+                bounds = self.bounds(f.name)
+                narrowed = narrowest_integer(f.type, *bounds) if bounds is not None else f.type
+                if narrowed != f.type:
+                    types[f.name] = narrowed
+        return types
+
+    def bounds(self, name: str) -> Optional[tuple[Optional[int], Optional[int]]]:
+        """
+        Guaranteed values range of integer column, None if only sampled values are known
+        """
+        if name in self.integer_bounds:
+            return self.integer_bounds[name]
+        if not self.source.persisted:
+            return None
+        # in memory batches, all values are known
+        ranges = [integer_range(batch.column(name)) for batch in self.source.batches if batch.num_rows]
+        ranges = [_ for _ in ranges if _[0] is not None]
+        if not ranges:
+            return None, None
+        return min(_[0] for _ in ranges), max(_[1] for _ in ranges)
+
+    def compact_array(self, name: str, array: Array) -> Array:
+        dtype = self.types[name]
+        if pa.types.is_dictionary(dtype):
+            # int32 indices, any batch cardinality fits
+            return pc.dictionary_encode(array)
+        try:
+            return array.cast(dtype)
+        except pa.ArrowInvalid:
+            raise pa.ArrowInvalid(
+                "CompactReader: column '%s' values %s out of integer_bounds %s" % (
+                    name, integer_range(array), self.integer_bounds.get(name)
+                )
+            )
+
+    def compact_batch(self, batch: RecordBatch) -> RecordBatch:
+        if not self.types:
+            return batch
+        return RecordBatch.from_arrays(
+            [
+                self.compact_array(name, batch.column(i)) if name in self.types else batch.column(i)
+                for i, name in enumerate(batch.schema.names)
+            ],
+            schema=self.planned_schema
+        )
+
+    def compact_batches(self) -> Generator[RecordBatch, None, None]:
+        if self.planned_schema is None:
+            self.plan()
+        sampled, self.sampled = self.sampled, []
+
+        def batches():
+            yield from sampled
+            sampled.clear()
+            yield from self.iterator
+
+        if instrumentation.enabled():
+            yield from instrumentation.Stage("compact").iterate(batches(), self.compact_batch)
+        else:
+            for batch in batches():
+                yield self.compact_batch(batch)
@@ -2,6 +2,7 @@ from typing import Callable, Optional, Generator, Iterable, Any
 
 from pyarrow import Schema, RecordBatch
 
+from adbc import instrumentation
 from adbc.dtype import cast_batch
 from adbc.reader import BatchReader
 
@@ -36,6 +37,10 @@ class LazyReader(BatchReader):
 
     @property
     def batches(self) -> Generator[RecordBatch, None, None]:
+        if self.safe_cast and instrumentation.enabled():
+            return instrumentation.Stage("cast").iterate(
+                self.method(*self.args, **self.kwargs), lambda _: cast_batch(_, self.schema)
+            )
         return (
             cast_batch(_, self.schema) if self.safe_cast else _
             for _ in self.method(*self.args, **self.kwargs)
@@ -0,0 +1,94 @@
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from multiprocessing import get_context
+from typing import Callable, Optional, Iterable, Generator, Union
+
+import pyarrow as pa
+from pyarrow import RecordBatch, Table
+
+__all__ = [
+    "SHARED_MEMORY_DIR",
+    "process_batches"
+]
+
+# tmpfs, IPC files are shared memory pages between processes
+SHARED_MEMORY_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def write_ipc(data: Union[RecordBatch, Table], directory: str) -> str:
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".arrow")
+    os.close(fd)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, data.schema) as writer:
+            if isinstance(data, RecordBatch):
+                writer.write_batch(data)
+            else:
+                writer.write_table(data)
+    return path
+
+
+def read_ipc(path: str) -> Table:
+    """
+    Memory mapped, zero copy: buffers keep the mapping alive after the file is unlinked
+    """
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    try:
+        os.unlink(path)
+    except OSError:
+        # mapped files cannot be removed on windows
+        pass
+    return table
+
+
+def run_transform(
+    function: Callable[[RecordBatch], Union[RecordBatch, Table]],
+    path: str,
+    directory: str
+) -> str:
+    """
+    Worker entry point: read input IPC file, apply function, write output IPC file
+    :return: output file path
+    """
+    table = read_ipc(path)
+    batch = table.to_batches()[0] if table.num_rows else RecordBatch.from_pylist([], table.schema)
+    return write_ipc(function(batch), directory)
+
+
+def process_batches(
+    batches: Iterable[RecordBatch],
+    function: Callable[[RecordBatch], Union[RecordBatch, Table]],
+    processes: Optional[int] = None,
+    in_flight: Optional[int] = None,
+    mp_context: Optional[str] = "spawn"
+) -> Generator[RecordBatch, None, None]:
+    """
+    Apply function on batches in a process pool, in input order
+
+    Batches are exchanged as Arrow IPC files in shared memory, only their paths are pickled
+    :param batches: input batches
+    :param function: picklable callable(RecordBatch) -> RecordBatch or Table, like a module function
+        or functools.partial of one
+    :param processes: worker processes, default os.cpu_count()
+    :param in_flight: max batches sent and not yet yielded, default 2 * processes
+    :param mp_context: multiprocessing start method, spawn does not inherit arrow threads
+    """
+    processes = processes or os.cpu_count() or 1
+    in_flight = in_flight or 2 * processes
+    pending: deque[Future] = deque()
+
+    with tempfile.TemporaryDirectory(dir=SHARED_MEMORY_DIR, prefix="adbc-process-") as directory:
+        executor = ProcessPoolExecutor(processes, mp_context=get_context(mp_context) if mp_context else None)
+        try:
+            for batch in batches:
+                pending.append(executor.submit(run_transform, function, write_ipc(batch, directory), directory))
+                if len(pending) >= in_flight:
+                    yield from read_ipc(pending.popleft().result()).to_batches()
+            while pending:
+                yield from read_ipc(pending.popleft().result()).to_batches()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -8,6 +8,7 @@ from typing import Optional
 
 from pyarrow import Schema
 
+from adbc.dialect import Dialect, get_dialect
 from adbc.reader import BatchReader
 
 
@@ -30,10 +31,16 @@ class Connection:
 
 
 class Server:
+    # registered adbc.dialect.Dialect name
+    DIALECT = "ansi"
 
     def __init__(self, protocol: str):
         self.protocol = protocol
 
+    @property
+    def dialect(self) -> Dialect:
+        return get_dialect(self.DIALECT)
+
     @abstractmethod
     def connect(self) -> Connection:
         raise NotImplementedError(f"{self}.connect not implemented")
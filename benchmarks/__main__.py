@@ -0,0 +1,39 @@
+import argparse
+import sys
+
+from benchmarks.suite import run_benchmarks, write_results, read_results, compare_results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="adbc hot path benchmarks")
+    parser.add_argument("patterns", nargs="*", help="benchmark name patterns, like 'cast.*', default all")
+    parser.add_argument("--rows", type=int, default=100000, help="generated rows per benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="measured repetitions")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured first repetitions")
+    parser.add_argument("--output", help="write JSON results to this path")
+    parser.add_argument("--baseline", help="compare with JSON results of a previous run")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change reported as slower or faster")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with 1 if a benchmark is slower")
+    args = parser.parse_args(argv)
+
+    def progress(name: str, result: dict):
+        print("%-56s %10.4fs %14.0f rows/s" % (name, result["median"], result["rows_per_second"] or 0))
+
+    results = run_benchmarks(args.patterns, args.rows, args.repeat, args.warmup, progress)
+    if args.output:
+        write_results(results, args.output)
+
+    if args.baseline:
+        comparison = compare_results(results, read_results(args.baseline), args.threshold)
+        print()
+        for _ in comparison:
+            print("%-56s %10.4fs -> %10.4fs x%.2f %s" % (
+                _["name"], _["baseline"], _["current"], _["ratio"], _["status"]
+            ))
+        if args.fail_on_regression and any(_["status"] == "slower" for _ in comparison):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Hot path benchmarks: casts, partitioning, local file writers, readers, ODBC paths and import time
+"""
+import os
+import subprocess
+import sys
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import Table, DataType, Decimal128Type, Decimal256Type, TimestampType
+
+from adbc.arrow import partitions
+from adbc.dtype import TYPE_CASTS, STRING, cast_array, cast_batch
+from adbc.enums import FileFormat
+from adbc.filesystem.local import LocalDataFileSystem
+from adbc.reader import BatchReader, LazyReader
+from benchmarks.data import dataset
+from benchmarks.odbc import LocalODBC
+from benchmarks.suite import benchmark
+
+# concrete types of TYPE_CASTS type classes
+CONCRETE_TYPES = {
+    Decimal128Type: pa.decimal128(18, 4),
+    Decimal256Type: pa.decimal256(40, 4),
+    TimestampType: pa.timestamp("ns", "Europe/Paris")
+}
+
+
+# naive timestamps, localized by timestamp_to_timestamp
+SOURCE_TYPES = {
+    TimestampType: pa.timestamp("us")
+}
+
+
+def concrete(dtype) -> DataType:
+    return CONCRETE_TYPES.get(dtype, dtype)
+
+
+def cast_source(source, target: DataType, rows: int) -> pa.Array:
+    """
+    Input array castable by TYPE_CASTS[(source, target)]
+    """
+    if source is TimestampType:
+        return dataset("temporal", rows)["timestamp"].combine_chunks()
+    if pa.types.is_integer(target):
+        # string digits, in target range
+        return pc.cast(pc.bit_wise_and(dataset("narrow", rows)["id"], 63), STRING).combine_chunks()
+    if pa.types.is_decimal(target):
+        return dataset("strings", rows)["amount"].combine_chunks()
+    if pa.types.is_date(target):
+        return dataset("temporal", rows)["date_string"].combine_chunks()
+    return dataset("temporal", rows)["timestamp_string"].combine_chunks()
+
+
+def register_cast(source, target):
+    target = concrete(target)
+
+    def setup(rows: int, tmp: str):
+        array = cast_source(source, target, rows)
+        return lambda: cast_array(array, target, safe=False)
+
+    benchmark("cast.%s->%s" % (SOURCE_TYPES.get(source, source), target), "cast")(setup)
+
+
+for _source, _target in TYPE_CASTS:
+    register_cast(_source, _target)
+
+
+@benchmark("cast.batch.wide")
+def cast_batch_wide(rows: int, tmp: str):
+    table = dataset("wide", rows)
+    schema = pa.schema([
+        pa.field(f.name, pa.int32() if f.name.startswith("string") else f.type) for f in table.schema
+    ])
+    return lambda: [cast_batch(_, schema, safe=False) for _ in table.to_batches(65536)]
+
+
+@benchmark("partitions.low_cardinality")
+def partitions_low(rows: int, tmp: str):
+    table = dataset("narrow", rows)
+    return lambda: sum(_[1].num_rows for _ in partitions(table, ["key"]))
+
+
+@benchmark("partitions.two_keys")
+def partitions_two_keys(rows: int, tmp: str):
+    table = dataset("strings", rows).select(["code", "amount"]).append_column(
+        "key", dataset("narrow", rows)["key"]
+    )
+    return lambda: sum(_[1].num_rows for _ in partitions(table, ["key", "code"]))
+
+
+@benchmark("partitions.high_cardinality")
+def partitions_high(rows: int, tmp: str):
+    table = dataset("high_cardinality", rows)
+    return lambda: sum(_[1].num_rows for _ in partitions(table, ["key"]))
+
+
+def register_write(name: str, data: str, file_format: str, **options):
+    def setup(rows: int, tmp: str):
+        table = dataset(data, rows)
+        writer = LocalDataFileSystem().write(
+            "bench", os.path.join(tmp, "bench"), file_format,
+            partition_by=options.pop("partition_by", ()), **options
+        )
+        return lambda: list(writer.write_batches(BatchReader.from_arrow(table, 65536)))
+
+    benchmark("write.%s" % name, "write")(setup)
+
+
+register_write("parquet.narrow", "narrow", FileFormat.parquet)
+register_write("parquet.wide", "wide", FileFormat.parquet)
+register_write("parquet.strings", "strings", FileFormat.parquet)
+register_write("parquet.partitioned", "narrow", FileFormat.parquet, partition_by=["key"])
+register_write("csv.narrow", "narrow", FileFormat.csv)
+register_write("csv.temporal", "temporal", FileFormat.csv)
+
+
+@benchmark("reader.rechunk")
+def reader_rechunk(rows: int, tmp: str):
+    table = dataset("narrow", rows)
+    return lambda: sum(_.num_rows for _ in BatchReader.from_arrow(table, 1024))
+
+
+@benchmark("reader.cast")
+def reader_cast(rows: int, tmp: str):
+    table = dataset("temporal", rows)
+    schema = pa.schema([
+        pa.field(f.name, pa.timestamp("ns", "UTC") if pa.types.is_timestamp(f.type) else f.type)
+        for f in table.schema
+    ])
+    return lambda: BatchReader.from_arrow(table, 65536).cast(schema, safe=False).read_all()
+
+
+@benchmark("reader.lazy")
+def reader_lazy(rows: int, tmp: str):
+    table = dataset("narrow", rows)
+    return lambda: LazyReader(lambda: table.to_batches(1024), table.schema, True).read_all()
+
+
+@benchmark("reader.compact")
+def reader_compact(rows: int, tmp: str):
+    table = dataset("strings", rows)
+    return lambda: BatchReader.from_arrow(table, 65536).compact(narrow_integers=True).read_all()
+
+
+@benchmark("odbc.read")
+def odbc_read(rows: int, tmp: str):
+    server = LocalODBC({"strings": dataset("strings", rows)})
+    return lambda: server.arrow_batches("SELECT * FROM strings").read_all()
+
+
+@benchmark("odbc.read_lazy")
+def odbc_read_lazy(rows: int, tmp: str):
+    server = LocalODBC({"narrow": dataset("narrow", rows)})
+    return lambda: server.arrow_batches("SELECT * FROM narrow", lazy=True).read_all()
+
+
+@benchmark("odbc.insert")
+def odbc_insert(rows: int, tmp: str):
+    table = dataset("narrow", rows)
+    server = LocalODBC({"narrow": Table.from_batches([], table.schema)})
+    # inserted with reordered columns, cast to the table schema
+    batches = table.select(list(reversed(table.schema.names)))
+    return lambda: server.write("narrow").write_batches(BatchReader.from_arrow(batches, 65536))
+
+
+def register_import(module: str):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def setup(rows: int, tmp: str):
+        # fresh interpreter, module caches do not hide import time
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get("PYTHONPATH", "")]))
+        return lambda: subprocess.run([sys.executable, "-c", "import %s" % module], env=env, check=True)
+
+    benchmark("import.%s" % module, "import")(setup)
+
+
+# pyarrow is the floor of adbc import time
+for _module in ("pyarrow", "adbc.reader", "adbc.filesystem.local", "adbc.odbc", "adbc.mssql", "adbc.athena"):
+    register_import(_module)
@@ -0,0 +1,116 @@
+import datetime
+from functools import lru_cache
+from typing import Callable
+
+import numpy
+import pyarrow as pa
+from pyarrow import Table
+
+__all__ = [
+    "narrow",
+    "wide",
+    "strings",
+    "temporal",
+    "high_cardinality",
+    "GENERATORS",
+    "dataset"
+]
+
+SEED = 42
+EPOCH = datetime.datetime(2020, 1, 1)
+
+
+def random(seed: int = SEED) -> numpy.random.Generator:
+    return numpy.random.default_rng(seed)
+
+
+def narrow(rows: int, seed: int = SEED) -> Table:
+    """
+    Few fixed width columns, low cardinality key
+    """
+    rng = random(seed)
+    return Table.from_pydict({
+        "id": pa.array(numpy.arange(rows, dtype=numpy.int64)),
+        "key": pa.array(rng.integers(0, 10, rows, dtype=numpy.int32)),
+        "value": pa.array(rng.random(rows)),
+        "flag": pa.array(rng.random(rows) < 0.5)
+    })
+
+
+def wide(rows: int, columns: int = 100, seed: int = SEED) -> Table:
+    """
+    Many int, float and short string columns
+    """
+    rng = random(seed)
+    data = {}
+    for i in range(columns):
+        if i % 3 == 0:
+            data["int_%s" % i] = pa.array(rng.integers(0, 1 << 31, rows, dtype=numpy.int64))
+        elif i % 3 == 1:
+            data["float_%s" % i] = pa.array(rng.random(rows))
+        else:
+            data["string_%s" % i] = pa.array(rng.integers(0, 1000, rows)).cast(pa.string())
+    return Table.from_pydict(data)
+
+
+def strings(rows: int, seed: int = SEED) -> Table:
+    """
+    String heavy: low cardinality codes, medium and long texts, numbers as text
+    """
+    rng = random(seed)
+    codes = numpy.array(["code_%s" % i for i in range(20)])
+    words = numpy.array(["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit"])
+    return Table.from_pydict({
+        "code": pa.array(codes[rng.integers(0, len(codes), rows)]),
+        "name": pa.array([" ".join(_) for _ in words[rng.integers(0, len(words), (rows, 4))]]),
+        "text": pa.array([" ".join(_) for _ in words[rng.integers(0, len(words), (rows, 32))]]),
+        "number": pa.array(rng.integers(-1 << 40, 1 << 40, rows)).cast(pa.string()),
+        "amount": pa.array(numpy.round(rng.random(rows) * 1e6, 4)).cast(pa.string())
+    })
+
+
+def temporal(rows: int, seed: int = SEED) -> Table:
+    """
+    Naive and zoned timestamps, dates, times and their ISO strings
+    """
+    rng = random(seed)
+    offsets = rng.integers(0, 5 * 365 * 86400 * 10 ** 6, rows)
+    timestamps = pa.array(numpy.datetime64(EPOCH, "us") + offsets.astype("timedelta64[us]"))
+    return Table.from_pydict({
+        "timestamp": timestamps,
+        "timestamp_utc": timestamps.cast(pa.timestamp("us", "UTC")),
+        "date": timestamps.cast(pa.date32(), safe=False),
+        "time": pa.array(offsets % (86400 * 10 ** 6), pa.int64()).cast(pa.time64("us")),
+        "timestamp_string": timestamps.cast(pa.timestamp("s"), safe=False).cast(pa.string()),
+        "date_string": timestamps.cast(pa.date32(), safe=False).cast(pa.string())
+    })
+
+
+def high_cardinality(rows: int, seed: int = SEED) -> Table:
+    """
+    Unique keys, partitioning worst case
+    """
+    rng = random(seed)
+    ids = rng.permutation(rows).astype(numpy.int64)
+    return Table.from_pydict({
+        "id": pa.array(ids),
+        "key": pa.array(ids % max(1, rows // 10)).cast(pa.string()),
+        "value": pa.array(rng.random(rows))
+    })
+
+
+GENERATORS: dict[str, Callable[[int], Table]] = {
+    "narrow": narrow,
+    "wide": wide,
+    "strings": strings,
+    "temporal": temporal,
+    "high_cardinality": high_cardinality
+}
+
+
+@lru_cache(maxsize=16)
+def dataset(name: str, rows: int) -> Table:
+    """
+    Generated table, shared between benchmarks: pyarrow tables are immutable
+    """
+    return GENERATORS[name](rows)
@@ -0,0 +1,60 @@
+import re
+from typing import Optional, Generator
+
+import pyarrow as pa
+from pyarrow import Schema, Table, RecordBatch, RecordBatchReader
+
+from adbc.exception import TableNotFound
+from adbc.odbc import ODBC
+from adbc.odbc.writer import ODBCWriter
+from adbc.reader import BatchReader
+
+__all__ = [
+    "LocalODBC"
+]
+
+
+def driver_copy(batch: RecordBatch) -> RecordBatch:
+    # drivers fill their own buffers, batches are copied once through IPC like a fetch
+    return pa.ipc.read_record_batch(batch.serialize(), batch.schema)
+
+
+class LocalODBCWriter(ODBCWriter):
+
+    def insert(self, batches: BatchReader, chunk_size: int = 65536, **kwargs):
+        inserted = [driver_copy(_) for _ in Table.from_batches(batches, batches.schema).to_batches(chunk_size)]
+        self.server.tables[self.table] = pa.concat_tables([
+            self.server.tables[self.table],
+            Table.from_batches(inserted, batches.schema).cast(self.server.tables[self.table].schema)
+        ])
+
+
+class LocalODBC(ODBC):
+    """
+    In memory ODBC stand-in: same arrow_batches and write code paths, driver calls served from tables
+    """
+
+    def __init__(self, tables: Optional[dict[str, Table]] = None):
+        super().__init__(protocol="odbc", uri="local")
+        self.tables = dict(tables or {})
+
+    def table_schema(self, name: str, schema: Optional[str] = None, catalog: Optional[str] = None) -> Schema:
+        try:
+            return self.tables[name].schema
+        except KeyError:
+            raise TableNotFound("%s: Table '%s'" % (repr(self), name))
+
+    def read_odbc_batches(self, query: str, batch_size: int = 65536, *args, **kwargs) -> RecordBatchReader:
+        match = re.match(r"SELECT \* FROM (\w+)", query, re.I)
+        table = self.tables[match.group(1)] if match else None
+        if table is None:
+            raise ValueError("%s: unsupported query '%s'" % (repr(self), query))
+
+        def batches() -> Generator[RecordBatch, None, None]:
+            for batch in table.to_batches(batch_size):
+                yield driver_copy(batch)
+
+        return RecordBatchReader.from_batches(table.schema, batches())
+
+    def write(self, table: str, schema: Optional[str] = None, catalog: Optional[str] = None):
+        return LocalODBCWriter(self, table, schema, catalog)
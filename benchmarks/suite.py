@@ -0,0 +1,151 @@
+import datetime
+import fnmatch
+import json
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Callable, Optional, Any
+
+import pyarrow as pa
+
+__all__ = [
+    "Benchmark",
+    "BENCHMARKS",
+    "benchmark",
+    "run_benchmarks",
+    "write_results",
+    "read_results",
+    "compare_results"
+]
+
+
+class Benchmark:
+    """
+    Named hot path measurement
+
+    setup(rows, tmp) builds inputs outside of timings and returns the measured callable,
+    called once per repetition with a fresh temporary folder
+    """
+
+    def __init__(self, name: str, setup: Callable[[int, str], Callable[[], Any]], group: str):
+        self.name = name
+        self.setup = setup
+        self.group = group
+
+    def measure(self, rows: int, repeat: int = 5, warmup: int = 1) -> dict:
+        times = []
+        for i in range(warmup + repeat):
+            tmp = tempfile.mkdtemp(prefix="adbc-bench-")
+            try:
+                run = self.setup(rows, tmp)
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+            finally:
+                shutil.rmtree(tmp, ignore_errors=True)
+            if i >= warmup:
+                times.append(elapsed)
+        median = statistics.median(times)
+        return {
+            "group": self.group,
+            "rows": rows,
+            "times": times,
+            "min": min(times),
+            "median": median,
+            "rows_per_second": rows / median if median else None
+        }
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, group: Optional[str] = None):
+    """
+    Register setup function as benchmark name
+    """
+    def register(setup: Callable[[int, str], Callable[[], Any]]):
+        BENCHMARKS[name] = Benchmark(name, setup, group or name.split(".", 1)[0])
+        return setup
+    return register
+
+
+def run_benchmarks(
+    patterns: Optional[list[str]] = None,
+    rows: int = 100000,
+    repeat: int = 5,
+    warmup: int = 1,
+    progress: Optional[Callable[[str, dict], None]] = None
+) -> dict:
+    """
+    :param patterns: fnmatch patterns of benchmark names, default all
+    :param rows: generated rows per benchmark
+    :param repeat: measured repetitions, results keep all timings, their min and median
+    :param warmup: unmeasured first repetitions
+    :param progress: callable(name, result) called after each benchmark
+    :return: machine readable results {"metadata": {...}, "results": {name: {...}}}
+    """
+    # registers benchmarks
+    import benchmarks.cases
+
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if patterns and not any(fnmatch.fnmatchcase(name, _) for _ in patterns):
+            continue
+        results[name] = bench.measure(rows, repeat, warmup)
+        if progress is not None:
+            progress(name, results[name])
+    return {
+        "metadata": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "pyarrow": pa.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": pa.cpu_count(),
+            "rows": rows,
+            "repeat": repeat,
+            "warmup": warmup
+        },
+        "results": results
+    }
+
+
+def write_results(results: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def read_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(results: dict, baseline: dict, threshold: float = 0.1) -> list[dict]:
+    """
+    Compare median time per row of benchmarks present in both results
+    :param threshold: relative change under which timings are unchanged
+    :return: [{"name", "baseline", "current", "ratio", "status": 'slower' | 'faster' | 'unchanged'}]
+    """
+    comparison = []
+    for name, current in results["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None or not previous["median"]:
+            continue
+        # per row, runs may use different row counts
+        ratio = (current["median"] / current["rows"]) / (previous["median"] / previous["rows"])
+        if ratio > 1 + threshold:
+            status = "slower"
+        elif ratio < 1 - threshold:
+            status = "faster"
+        else:
+            status = "unchanged"
+        comparison.append({
+            "name": name,
+            "baseline": previous["median"],
+            "current": current["median"],
+            "ratio": ratio,
+            "status": status
+        })
+    return comparison
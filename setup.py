@@ -10,7 +10,7 @@ def testsuite():
 setup(
     name='adbc',
     version='0.0.1',
-    packages=[_ for _ in find_packages() if _ != "tests"],
+    packages=[_ for _ in find_packages() if _.split(".")[0] not in ("tests", "benchmarks")],
     url='https://github.com/Platob/pyADBC.git',
     license='Apache',
     author='Platob',
@@ -0,0 +1,305 @@
+import re
+import unittest
+from typing import Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import Table
+
+from adbc.athena import Athena
+from adbc.exception import QueryFailed
+from adbc.filesystem import DataFileSystem
+
+try:
+    from moto.server import ThreadedMotoServer
+except ImportError:
+    ThreadedMotoServer = None
+
+
+class AthenaStandIn:
+    """
+    Local Athena API: UNLOAD queries write registered results as parquet files in S3
+    """
+
+    def __init__(self, fs, results: dict[str, Table], running_polls: int = 2, tables: Optional[list[dict]] = None):
+        self.fs = fs
+        self.results = results
+        self.tables = tables or []
+        self.running_polls = running_polls
+        self.executions = {}
+        self.calls = []
+        # query result columns, nested types are bare array, map or row
+        self.column_info = [
+            {"Name": "id", "Type": "bigint", "Precision": 19, "Scale": 0, "Nullable": "UNKNOWN"},
+            {"Name": "name", "Type": "varchar", "Precision": 2147483647, "Scale": 0, "Nullable": "UNKNOWN"}
+        ]
+
+    def start_query_execution(self, QueryString: str, **kwargs):
+        self.calls.append(("start_query_execution", QueryString, kwargs))
+        query_id = "q%s" % len(self.executions)
+        if QueryString.startswith("ALTER TABLE"):
+            self.executions[query_id] = {"State": "SUCCEEDED"}
+            return {"QueryExecutionId": query_id}
+        match = re.match(r"UNLOAD \((.*)\) TO 's3://([^']+)' WITH", QueryString, re.S)
+        if match is None or match.group(1) not in self.results:
+            self.executions[query_id] = {"State": "FAILED", "StateChangeReason": "SYNTAX_ERROR"}
+            return {"QueryExecutionId": query_id}
+        table = self.results[match.group(1)]
+        folder = match.group(2).rstrip("/")
+        for i, offset in enumerate(range(0, table.num_rows, 40)):
+            with self.fs.open_output_stream("%s/%s_%s" % (folder, query_id, i)) as stream:
+                pq.write_table(table.slice(offset, 40), stream)
+        self.executions[query_id] = {"State": "RUNNING", "polls": self.running_polls}
+        return {"QueryExecutionId": query_id}
+
+    def get_query_execution(self, QueryExecutionId: str):
+        status = self.executions[QueryExecutionId]
+        if status["State"] == "RUNNING":
+            status["polls"] -= 1
+            if status["polls"] < 0:
+                status["State"] = "SUCCEEDED"
+        return {"QueryExecution": {"QueryExecutionId": QueryExecutionId, "Status": dict(status)}}
+
+    def get_table_metadata(self, CatalogName: str, DatabaseName: str, TableName: str):
+        self.calls.append(("get_table_metadata", TableName, {}))
+        for meta in self.tables:
+            if meta["Name"] == TableName:
+                return {"TableMetadata": dict(meta)}
+        raise ValueError("An error occurred (MetadataException): EntityNotFoundException")
+
+    def get_paginator(self, operation: str):
+        stand_in = self
+
+        class Paginator:
+            def paginate(self, CatalogName: str, DatabaseName: str, **kwargs):
+                stand_in.calls.append(("list_table_metadata", DatabaseName, kwargs))
+                for i in range(0, len(stand_in.tables), 2):
+                    yield {"TableMetadataList": [dict(_) for _ in stand_in.tables[i:i + 2]]}
+
+        return Paginator()
+
+    def get_query_results(self, QueryExecutionId: str, **kwargs):
+        return {"ResultSet": {"Rows": [], "ResultSetMetadata": {"ColumnInfo": self.column_info}}}
+
+
+class LocalAthena(Athena):
+
+    def __init__(self, stand_in: AthenaStandIn, **kwargs):
+        super().__init__("us-east-1", **kwargs)
+        self.stand_in = stand_in
+
+    def client(self):
+        return self.stand_in
+
+
+@unittest.skipIf(ThreadedMotoServer is None, "moto[server] is required for local S3")
+class AthenaTest(unittest.TestCase):
+    port = 5078
+
+    @classmethod
+    def setUpClass(cls):
+        cls.moto = ThreadedMotoServer(port=cls.port, verbose=False)
+        cls.moto.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.moto.stop()
+
+    def setUp(self):
+        self.fs_builder = lambda region_name, profile_name: DataFileSystem.get_s3(
+            region_name,
+            access_key="testing",
+            secret_key="testing",
+            endpoint_override="http://127.0.0.1:%s" % self.port,
+            scheme="http",
+            allow_bucket_creation=True
+        )
+        self.fs = self.fs_builder("us-east-1", None)
+        self.fs.create_dir("results")
+        self.data = Table.from_pydict({
+            "id": pa.array(range(100), pa.int32()),
+            "name": [str(i) for i in range(100)]
+        })
+        self.stand_in = AthenaStandIn(self.fs, {"SELECT * FROM test": self.data}, tables=[
+            {
+                "Name": "table%s" % i,
+                "Columns": [{"Name": "name", "Type": "string"}],
+                "PartitionKeys": [{"Name": "id", "Type": "int"}],
+                "Parameters": {"classification": "parquet", "location": "s3://results/table%s" % i}
+            }
+            for i in range(3)
+        ])
+        self.server = LocalAthena(
+            self.stand_in, fs_builder=self.fs_builder, output_location="s3://results/athena"
+        )
+
+    def test_arrow_batches(self):
+        reader = self.server.arrow_batches("SELECT * FROM test", database="db", poll_interval=0.01)
+        result = reader.read_all()
+
+        # typed from query result columns
+        self.assertEqual(
+            pa.schema([("id", pa.int64()), ("name", pa.large_string())]), result.schema.remove_metadata()
+        )
+        self.assertEqual(list(range(100)), sorted(result["id"].to_pylist()))
+        self.assertEqual({"Database": "db"}, self.stand_in.calls[0][2]["QueryExecutionContext"])
+        # scratch files deleted once consumed
+        self.assertEqual([], [
+            _ for _ in self.fs.get_file_info(pa.fs.FileSelector("results/athena", recursive=True)) if _.is_file
+        ])
+
+    def test_arrow_batches_nested(self):
+        data = self.data.append_column("tags", pa.array([[i, i + 1] for i in range(100)], pa.list_(pa.int32())))
+        point = pa.struct([("x", pa.float64())])
+        data = data.append_column("point", pa.array([{"x": float(i)} for i in range(100)], point))
+        self.stand_in.results["SELECT * FROM nested"] = data
+        self.stand_in.column_info += [
+            {"Name": "tags", "Type": "array", "Precision": 0, "Scale": 0, "Nullable": "UNKNOWN"},
+            {"Name": "point", "Type": "row", "Precision": 0, "Scale": 0, "Nullable": "UNKNOWN"}
+        ]
+
+        result = self.server.arrow_batches("SELECT * FROM nested", database="db", poll_interval=0.01).read_all()
+        # primitive columns typed from query result columns, nested ones from files
+        self.assertEqual(pa.schema([
+            ("id", pa.int64()), ("name", pa.large_string()),
+            ("tags", pa.list_(pa.int32())), ("point", point)
+        ]), result.schema.remove_metadata())
+        self.assertEqual(data["tags"].to_pylist(), result.sort_by("id")["tags"].to_pylist())
+
+    def test_arrow_batches_failed(self):
+        with self.assertRaises(QueryFailed):
+            self.server.arrow_batches("SELECT * FROM missing", poll_interval=0.01)
+
+    def test_arrow_batches_timeout(self):
+        self.stand_in.running_polls = 1000
+        self.server.output_location = "s3://results/timeout"
+        self.stand_in.stop_query_execution = lambda QueryExecutionId: self.stand_in.executions[QueryExecutionId]\
+            .update(State="CANCELLED")
+        with self.assertRaises(TimeoutError):
+            self.server.arrow_batches("SELECT * FROM test", poll_interval=0.01, timeout=0.05)
+
+    def test_table_metadata_cache(self):
+        from adbc.reader import BatchReader
+
+        self.assertEqual(3, self.server.prefetch_metadata("db"))
+        for _ in range(3):
+            paths = list(
+                self.server.write("table1", "db")
+                .write_batches(BatchReader.from_arrow(self.data.slice(0, 10)))
+            )
+            self.assertEqual(10, len(paths))
+            self.assertTrue(all("/id=" in _ for _ in paths))
+        # partitions registered by first write only
+        self.assertEqual(["list_table_metadata", "start_query_execution"], [_[0] for _ in self.stand_in.calls])
+
+        self.server.invalidate_metadata("table1", "db")
+        self.server.table_schema("table1", "db")
+        self.server.table_schema("table2", "db")
+        self.assertEqual("get_table_metadata", self.stand_in.calls[-1][0])
+        self.assertEqual(3, len(self.stand_in.calls))
+        self.assertIs(self.server.client(), self.server.client())
+
+    def test_add_partitions(self):
+        from adbc.reader import BatchReader
+
+        paths = list(
+            self.server.write("table0", "db", partition_values={"id": "7"})
+            .write_batches(BatchReader.from_arrow(self.data.select(["name"]).slice(0, 5)))
+        )
+        self.assertEqual(1, len(paths))
+        self.assertEqual(
+            "ALTER TABLE `db`.`table0` ADD IF NOT EXISTS\n"
+            "PARTITION (`id` = '7') LOCATION 's3://results/table0/id=7/'",
+            self.stand_in.calls[-1][1]
+        )
+
+        list(
+            self.server.write("table0", "db")
+            .write_batches(BatchReader.from_arrow(self.data), register_partitions=False)
+        )
+        # get_table_metadata, first write partitions
+        self.assertEqual(2, len(self.stand_in.calls))
+        self.assertEqual(99, self.server.add_partitions(
+            "table0", [{"id": str(i)} for i in range(100)], "db", chunk_size=40
+        ))
+        statements = [_[1] for _ in self.stand_in.calls[2:]]
+        self.assertEqual([40, 40, 19], [_.count("PARTITION (") for _ in statements])
+
+    def test_read_table(self):
+        from adbc.reader import BatchReader
+
+        list(self.server.write("table2", "db").write_batches(BatchReader.from_arrow(self.data)))
+        # query engine files have no extension
+        with self.fs.open_output_stream("results/table2/id=100/20240101_0") as stream:
+            pq.write_table(Table.from_pydict({"name": ["100"]}), stream)
+        calls = len(self.stand_in.calls)
+
+        result = self.server.read_table(
+            "table2", "db", columns=["id", "name"], partition_filter={"id": [1, 2, 100]}
+        ).read_all()
+        self.assertEqual([(1, "1"), (2, "2"), (100, "100")], sorted(zip(*result.to_pydict().values())))
+        self.assertEqual(pa.int32(), result.schema.field("id").type)
+        # no query
+        self.assertEqual(calls, len(self.stand_in.calls))
+
+    def test_compact(self):
+        from adbc.reader import BatchReader
+
+        self.stand_in.tables.append({
+            "Name": "flat",
+            "Columns": [{"Name": "id", "Type": "int"}, {"Name": "name", "Type": "string"}],
+            "PartitionKeys": [],
+            "Parameters": {"classification": "parquet", "location": "s3://results/flat"}
+        })
+        writer = self.server.write("flat", "db")
+        for batch in self.data.to_batches(10):
+            list(writer.write_batches(BatchReader.from_arrow(batch)))
+        self.assertEqual(10, len(list(self.server.list_files("results/flat"))))
+
+        # Athena.write is a catalog table writer, compaction writes plain files
+        self.assertEqual(1, len(self.server.compact("results/flat")))
+        self.assertEqual(1, len(list(self.server.list_files("results/flat"))))
+        result = self.server.read_table("flat", "db").read_all()
+        self.assertEqual(self.data.to_pylist(), result.sort_by("id").to_pylist())
+
+    def test_read_table_fallback(self):
+        query = 'SELECT "id", "name" FROM "db"."table0" WHERE ("id" IN (CAST(\'1\' AS int))) AND (name > \'5\')'
+        self.stand_in.results[query] = self.data.filter(pa.compute.field("id") >= 95)
+
+        result = self.server.read_table(
+            "table0", "db", columns=["name"], partition_filter={"id": 1}, where="name > '5'",
+            filter=pa.compute.field("id") >= 98
+        ).read_all()
+        self.assertEqual(["98", "99"], sorted(result["name"].to_pylist()))
+        self.assertEqual(["name"], result.schema.names)
+
+        with self.assertRaises(ValueError):
+            self.server.read_table("table0", "db", partition_filter=lambda _: True, where="true")
+
+    def test_nested_columns(self):
+        from adbc.reader import BatchReader
+
+        self.stand_in.tables.append({
+            "Name": "nested",
+            "Columns": [
+                {"Name": "tags", "Type": "array<string>"},
+                {"Name": "point", "Type": "struct<x:double,y:double>"},
+                {"Name": "attributes", "Type": "map<string,int>"}
+            ],
+            "PartitionKeys": [],
+            "Parameters": {"classification": "parquet", "location": "s3://results/nested"}
+        })
+        data = Table.from_pydict({
+            "tags": pa.array([["a", "b"], []], pa.list_(pa.string())),
+            "point": pa.array([{"x": 1., "y": 2.}, None], pa.struct([("x", pa.float64()), ("y", pa.float64())])),
+            "attributes": pa.array([[("k", 1)], None], pa.map_(pa.string(), pa.int32()))
+        })
+        list(self.server.write("nested", "db").write_batches(BatchReader.from_arrow(data)))
+
+        result = self.server.read_table("nested", "db").read_all()
+        self.assertEqual(data.schema, result.schema.remove_metadata())
+        self.assertEqual(data.to_pylist(), result.to_pylist())
+
+
+if __name__ == '__main__':
+    unittest.main()
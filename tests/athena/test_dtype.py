@@ -0,0 +1,36 @@
+import unittest
+
+import pyarrow as pa
+
+from adbc.athena.dtype import parse_sqltype, sqltype_to_datatype
+
+
+class DtypeTest(unittest.TestCase):
+
+    def test_parameterized(self):
+        self.assertEqual(pa.decimal128(38, 6), parse_sqltype("decimal(38, 6)"))
+        self.assertEqual(pa.timestamp("ms", "UTC"), parse_sqltype("timestamp(3)"))
+        self.assertEqual(pa.int64(), parse_sqltype("BIGINT"))
+        self.assertEqual(pa.decimal128(12, 3), sqltype_to_datatype("decimal", precision=12, scale=3, tz=None))
+
+    def test_nested(self):
+        self.assertEqual(
+            pa.map_(pa.string(), pa.list_(pa.decimal128(10, 2))),
+            parse_sqltype("map<string,array<decimal(10,2)>>")
+        )
+        self.assertEqual(
+            pa.struct([("a", pa.int32()), ("b c", pa.struct([("d", pa.map_(pa.string(), pa.int32()))]))]),
+            parse_sqltype("struct<a:int,`b c`:struct<d:map<string,int>>>")
+        )
+        # trino syntax
+        self.assertEqual(
+            pa.struct([("a", pa.string()), ("b", pa.list_(pa.int32()))]),
+            parse_sqltype("row(a varchar, b array(integer))")
+        )
+
+    def test_unknown(self):
+        self.assertEqual(pa.string(), parse_sqltype("interval day to second"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,494 @@
+import os
+import tempfile
+import time
+import unittest
+
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pyarrow import Table
+
+from adbc.filesystem.local import LocalDataFileSystem
+from adbc.reader import BatchReader
+
+
+class LocalDataFileSystemTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base_dir = self.tmp.name
+        self.server = LocalDataFileSystem()
+        self.data = Table.from_pydict({
+            "key": [i % 10 for i in range(1000)],
+            "value": [str(i) for i in range(1000)]
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_files(self, paths):
+        return pq.ParquetDataset(paths).read().num_rows if paths else 0
+
+    def test_write_batches(self):
+        paths = list(
+            self.server.write("table", self.base_dir)
+            .write_batches(BatchReader.from_arrow(self.data, 100), max_file_rows=300)
+        )
+
+        self.assertEqual(4, len(paths))
+        self.assertEqual(1000, sum(pq.read_metadata(_).num_rows for _ in paths))
+
+    def test_write_batches_partitioned(self):
+        paths = list(
+            self.server.write("table", self.base_dir, partition_by=["key"])
+            .write_batches(BatchReader.from_arrow(self.data, 100))
+        )
+
+        self.assertEqual(10, len(paths))
+        self.assertEqual(10, len(os.listdir(self.base_dir)))
+        self.assertEqual(1000, sum(pq.read_metadata(_).num_rows for _ in paths))
+
+    def test_write_batches_max_open_files(self):
+        paths = list(
+            self.server.write("table", self.base_dir, partition_by=["key"])
+            .write_batches(BatchReader.from_arrow(self.data, 5), max_open_files=3, max_workers=2)
+        )
+
+        self.assertEqual(10, len(os.listdir(self.base_dir)))
+        self.assertEqual(1000, sum(pq.read_metadata(_).num_rows for _ in paths))
+        self.assertEqual(len(paths), sum(len(files) for _, _, files in os.walk(self.base_dir)))
+
+    def test_write_batches_max_file_bytes(self):
+        paths = list(
+            self.server.write("table", self.base_dir, file_format="csv")
+            .write_batches(BatchReader.from_arrow(self.data, 10), max_file_bytes=2048)
+        )
+
+        self.assertGreater(len(paths), 1)
+        for path in paths[:-1]:
+            self.assertGreaterEqual(os.path.getsize(path), 2048)
+            self.assertLess(os.path.getsize(path), 2048 + 1024)
+
+    def test_write_batches_max_file_bytes_parquet(self):
+        data = Table.from_pydict({"id": list(range(50000)), "name": ["name %d" % i for i in range(50000)]})
+        paths = list(
+            self.server.write("table", self.base_dir)
+            .write_batches(BatchReader.from_arrow(data, 5000), max_file_bytes=100000, row_group_rows=2000)
+        )
+
+        self.assertGreater(len(paths), 2)
+        self.assertEqual(50000, sum(pq.read_metadata(_).num_rows for _ in paths))
+        for path in paths:
+            # first file bounded by in memory size estimate, footer may exceed
+            self.assertLess(os.path.getsize(path), 100000 * 1.05)
+            metadata = pq.read_metadata(path)
+            sizes = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+            if path != paths[-1]:
+                self.assertGreaterEqual(min(sizes), 500, sizes)
+
+    def test_write_batches_row_groups(self):
+        paths = list(
+            self.server.write("table", self.base_dir)
+            .write_batches(BatchReader.from_arrow(self.data, 30), row_group_rows=200, max_file_rows=500)
+        )
+
+        self.assertEqual(2, len(paths))
+        for path in paths:
+            metadata = pq.read_metadata(path)
+            self.assertEqual(500, metadata.num_rows)
+            self.assertEqual(
+                [200, 200, 100],
+                [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+            )
+
+    def test_write_batches_compressed_csv(self):
+        import pyarrow.csv
+
+        paths = list(
+            self.server.write("table", self.base_dir, file_format="csv", compression="gzip")
+            .write_batches(BatchReader.from_arrow(self.data, 100))
+        )
+
+        self.assertEqual(1, len(paths))
+        self.assertTrue(paths[0].endswith(".csv.gz"))
+        self.assertEqual(self.data, pyarrow.csv.read_csv(
+            pyarrow.CompressedInputStream(pyarrow.OSFile(paths[0]), "gzip"),
+            convert_options=pyarrow.csv.ConvertOptions(column_types=self.data.schema)
+        ))
+
+    def test_write_batches_overwrite(self):
+        writer = self.server.write("table", self.base_dir, partition_by=["key"])
+        list(writer.write_batches(BatchReader.from_arrow(self.data, 100)))
+        paths = list(writer.write_batches(BatchReader.from_arrow(self.data, 5), append=False, max_open_files=2))
+
+        self.assertEqual(1000, sum(pq.read_metadata(_).num_rows for _ in paths))
+        self.assertEqual(len(paths), sum(len(files) for _, _, files in os.walk(self.base_dir)))
+
+    def test_write_batches_cleanup_on_error(self):
+        def batches():
+            for batch in self.data.to_batches(100):
+                yield batch
+            raise ValueError("source failure")
+
+        writer = self.server.write("table", self.base_dir, partition_by=["key"])
+        written = []
+        with self.assertRaises(ValueError):
+            for path in writer.write_batches(BatchReader(self.data.schema, batches()), max_file_rows=50):
+                written.append(path)
+
+        self.assertEqual(
+            sorted(written),
+            sorted(os.path.join(root, f) for root, _, files in os.walk(self.base_dir) for f in files)
+        )
+
+    def test_write_batches_auto_tune(self):
+        import pyarrow as pa
+
+        data = self.data.append_column("id", pa.array(range(1000), pa.int64()))
+        data = data.append_column("ratio", pa.array([i / 7 for i in range(1000)], pa.float64()))
+        paths = list(
+            self.server.write("table", self.base_dir)
+            .write_batches(BatchReader.from_arrow(data, 100), auto_tune=True, tune_rows=500)
+        )
+
+        metadata = pq.read_metadata(paths[0])
+        encodings = {
+            metadata.schema.column(i).name: metadata.row_group(0).column(i).encodings
+            for i in range(metadata.num_columns)
+        }
+        self.assertIn("RLE_DICTIONARY", encodings["key"])
+        self.assertIn("DELTA_BINARY_PACKED", encodings["id"])
+        # mostly sorted strings share prefixes
+        self.assertIn("DELTA_BYTE_ARRAY", encodings["value"])
+        self.assertIn("BYTE_STREAM_SPLIT", encodings["ratio"])
+        self.assertEqual(data, pq.read_table(paths[0]))
+
+    def test_write_batches_sort_by(self):
+        import pyarrow as pa
+
+        data = self.data.append_column("id", pa.array([(i * 7919) % 1000 for i in range(1000)], pa.int64()))
+        with tempfile.TemporaryDirectory() as spill_dir:
+            paths = list(
+                self.server.write("table", self.base_dir, partition_by=["key"])
+                .write_batches(
+                    BatchReader.from_arrow(data, 50), sort_by=[("id", "descending")], max_file_rows=40,
+                    sort_memory_bytes=2048, spill_dir=spill_dir
+                )
+            )
+            self.assertEqual([], os.listdir(spill_dir))
+
+        self.assertEqual(30, len(paths))
+        for path in paths:
+            ids = pq.read_table(path)["id"].to_pylist()
+            self.assertEqual(sorted(ids, reverse=True), ids)
+        self.assertEqual(1, len(pq.read_metadata(paths[0]).row_group(0).sorting_columns))
+        self.assertEqual(
+            data.sort_by("value"),
+            self.server.arrow_batches(self.base_dir).read_all().select(data.column_names).sort_by("value")
+        )
+
+    def test_write_batches_parallel_csv(self):
+        import gzip
+
+        for compression, extension in (("gzip", "gz"), ("zstd", "zst")):
+            base_dir = os.path.join(self.base_dir, compression)
+            paths = list(
+                self.server.write("table", base_dir, file_format="csv", compression=compression)
+                .write_batches(BatchReader.from_arrow(self.data, 300), threads=4, chunk_rows=64, max_pending_chunks=3)
+            )
+
+            self.assertEqual(1, len(paths))
+            self.assertTrue(paths[0].endswith(".csv." + extension))
+            result = self.server.arrow_batches(base_dir, schema=self.data.schema).read_all()
+            # chunks kept in order
+            self.assertEqual(self.data, result)
+
+        with gzip.open(os.path.join(self.base_dir, "gzip", os.listdir(os.path.join(self.base_dir, "gzip"))[0])) as f:
+            lines = f.read().decode().splitlines()
+        self.assertEqual(['"key","value"', '0,"0"'], lines[:2])
+        self.assertEqual(1001, len(lines))
+
+    def test_write_batches_parallel_csv_partitioned(self):
+        import threading
+
+        csv_threads = []
+
+        def batches():
+            for batch in self.data.to_batches(100):
+                csv_threads.append(len([_ for _ in threading.enumerate() if _.name.startswith("csv")]))
+                yield batch
+
+        paths = list(
+            self.server.write("table", self.base_dir, file_format="csv", compression="gzip", partition_by=["key"])
+            .write_batches(BatchReader(self.data.schema, batches()), threads=2, chunk_rows=16)
+        )
+        self.assertEqual(10, len(paths))
+        # one chunk pool shared by all open partition files
+        self.assertLessEqual(max(csv_threads), 2)
+        self.assertEqual(1000, self.server.arrow_batches(self.base_dir).read_all().num_rows)
+
+    def test_write_batches_ipc_orc(self):
+        import pyarrow as pa
+
+        for file_format, compression in (("arrow", "lz4"), ("feather", "zstd"), ("orc", "zstd")):
+            base_dir = os.path.join(self.base_dir, file_format)
+            paths = list(
+                self.server.write("table", base_dir, file_format=file_format, compression=compression,
+                                  partition_by=["key"])
+                .write_batches(BatchReader.from_arrow(self.data, 100), max_file_rows=60)
+            )
+
+            self.assertEqual(20, len(paths))
+            self.assertTrue(all(_.endswith(".%s.%s" % (compression, file_format)) for _ in paths))
+            result = self.server.arrow_batches(base_dir).read_all()
+            self.assertEqual(self.data.sort_by("value"), result.select(["key", "value"]).sort_by("value"))
+
+        with pa.memory_map(
+            next(_ for _ in self.server.list_files(os.path.join(self.base_dir, "arrow"))).path
+        ) as source:
+            self.assertIn(pa.ipc.open_file(source).read_all().num_rows, (40, 60))
+
+        paths = list(
+            self.server.write("table", os.path.join(self.base_dir, "stream"), file_format="arrows")
+            .write_batches(BatchReader.from_arrow(self.data, 100))
+        )
+        with pa.OSFile(paths[0]) as source:
+            self.assertEqual(self.data, pa.ipc.open_stream(source).read_all())
+
+    def test_arrow_batches(self):
+        list(
+            self.server.write("table", self.base_dir, partition_by=["key"])
+            .write_batches(BatchReader.from_arrow(self.data, 100))
+        )
+        result = self.server.arrow_batches(self.base_dir).read_all()
+
+        self.assertEqual(self.data.schema, result.schema)
+        self.assertEqual(self.data.sort_by("value"), result.sort_by("value"))
+
+    def test_arrow_batches_pruning(self):
+        list(
+            self.server.write("table", self.base_dir, partition_by=["key"])
+            .write_batches(BatchReader.from_arrow(self.data, 100), row_group_rows=10)
+        )
+
+        result = self.server.arrow_batches(
+            self.base_dir,
+            columns=["value"],
+            partition_filter={"key": [1, 2]},
+            filter=pc.field("key") == 2
+        ).read_all()
+        self.assertEqual(["value"], result.schema.names)
+        self.assertEqual(100, result.num_rows)
+
+        result = self.server.arrow_batches(
+            self.base_dir,
+            partition_filter=lambda values: values["key"] == "3",
+            filter=pc.field("value") == "13"
+        ).read_all()
+        self.assertEqual([{"key": 3, "value": "13"}], result.to_pylist())
+
+    def test_arrow_batches_stray_files(self):
+        list(self.server.write("table", self.base_dir).write_batches(BatchReader.from_arrow(self.data)))
+        for name in ("notes.txt", "schema.json", "_SUCCESS"):
+            with open(os.path.join(self.base_dir, name), "w") as f:
+                f.write("not data")
+        # query engine output, no extension
+        pq.write_table(self.data.slice(0, 10), os.path.join(self.base_dir, "20240101_0"))
+
+        self.assertEqual(1000, self.server.arrow_batches(self.base_dir, file_format="parquet").read_all().num_rows)
+        self.assertEqual(1010, self.server.arrow_batches(
+            self.base_dir, file_format="parquet", extensionless=True
+        ).read_all().num_rows)
+
+    def test_arrow_batches_csv(self):
+        list(
+            self.server.write("table", self.base_dir, file_format="csv", compression="gzip", partition_by=["key"])
+            .write_batches(BatchReader.from_arrow(self.data, 100))
+        )
+        result = self.server.arrow_batches(self.base_dir, schema=self.data.schema).read_all()
+
+        self.assertEqual(self.data.schema, result.schema)
+        self.assertEqual(self.data.sort_by("value"), result.sort_by("value"))
+
+    def test_iter_dir_files(self):
+        list(
+            self.server.write("table", self.base_dir, partition_by=["key"])
+            .write_batches(BatchReader.from_arrow(self.data, 100))
+        )
+        fs = self.server.fs()
+
+        self.assertEqual(10, len(list(self.server.iter_dir_files(fs, self.base_dir))))
+        self.assertEqual(10, len(list(self.server.iter_dir_files(fs, self.base_dir, recursive=False))))
+        self.assertEqual(
+            2, len(list(self.server.iter_dir_files(fs, self.base_dir, partition_filter={"key": ["1", 2]})))
+        )
+        self.assertEqual(1, len(list(self.server.iter_dir_files(fs, self.base_dir, prefix="key=1/"))))
+        self.assertEqual(
+            1, len(list(self.server.iter_dir_files(fs, self.base_dir, prefix="key=1/", recursive=False)))
+        )
+
+    def test_listing_cache(self):
+        server = LocalDataFileSystem(listing_ttl=3600)
+        writer = server.write("table", self.base_dir, partition_by=["key"])
+        list(writer.write_batches(BatchReader.from_arrow(self.data, 100)))
+
+        self.assertEqual(10, len(list(server.list_files(self.base_dir))))
+        with open(os.path.join(self.base_dir, "key=1", "external.parquet"), "wb"):
+            pass
+        # cached
+        self.assertEqual(10, len(list(server.list_files(self.base_dir))))
+
+        # invalidated by writer outputs
+        list(writer.write_batches(BatchReader.from_arrow(self.data.slice(0, 1))))
+        self.assertEqual(12, len(list(server.list_files(self.base_dir))))
+
+    def test_compact(self):
+        writer = self.server.write("table", self.base_dir, partition_by=["key"])
+        for batch in self.data.to_batches(100):
+            list(writer.write_batches(BatchReader.from_arrow(batch)))
+        self.assertEqual(100, len(list(self.server.list_files(self.base_dir))))
+
+        paths = self.server.compact(self.base_dir, min_file_bytes=1024 * 1024, partition_filter={"key": [1, 2]})
+
+        self.assertEqual(2, len(paths))
+        self.assertEqual(82, len(list(self.server.list_files(self.base_dir))))
+        self.assertEqual(
+            self.data.sort_by("value"),
+            self.server.arrow_batches(self.base_dir).read_all().sort_by("value")
+        )
+
+    def test_compaction_marker(self):
+        from adbc.filesystem.compaction import write_marker
+
+        writer = self.server.write("table", self.base_dir)
+        sources = [
+            path.rsplit(os.path.sep, 1)[-1]
+            for batch in self.data.to_batches(500)
+            for path in writer.write_batches(BatchReader.from_arrow(batch))
+        ]
+        target = list(writer.write_batches(BatchReader.from_arrow(self.data)))[0].rsplit(os.path.sep, 1)[-1]
+        marker = self.base_dir + "/_compaction-0.json"
+
+        # target published: sources hidden
+        write_marker(self.server.fs(), marker, sources, [target])
+        self.assertEqual(1000, self.server.arrow_batches(self.base_dir).read_all().num_rows)
+
+        # target not published yet: target hidden
+        write_marker(self.server.fs(), marker, sources, [target, "missing.parquet"])
+        self.assertEqual(1000, self.server.arrow_batches(self.base_dir).read_all().num_rows)
+
+        # next compaction rollbacks
+        self.server.compact(self.base_dir, min_file_bytes=0)
+        self.assertEqual(2, len(list(self.server.list_files(self.base_dir))))
+
+    def test_compaction_marker_vanished(self):
+        from unittest import mock
+        from adbc.filesystem import compaction
+
+        writer = self.server.write("table", self.base_dir)
+        sources = [
+            path for batch in self.data.to_batches(500)
+            for path in writer.write_batches(BatchReader.from_arrow(batch))
+        ]
+        target = list(writer.write_batches(BatchReader.from_arrow(self.data)))[0].rsplit(os.path.sep, 1)[-1]
+        marker = self.base_dir + "/_compaction-0.json"
+        compaction.write_marker(self.server.fs(), marker, [_.rsplit(os.path.sep, 1)[-1] for _ in sources], [target])
+
+        def finish(fs, path):
+            # compaction finishes between listing and marker read
+            for source in sources:
+                os.remove(source)
+            os.remove(marker)
+            raise FileNotFoundError(path)
+
+        with mock.patch.object(compaction, "read_marker", side_effect=finish):
+            self.assertEqual(1000, self.server.arrow_batches(self.base_dir).read_all().num_rows)
+
+    def test_commit_manifest(self):
+        from adbc.filesystem.manifest import read_manifest
+
+        writer = self.server.write("table", self.base_dir, partition_by=["key"])
+        paths = list(writer.write_batches(BatchReader.from_arrow(self.data, 100), commit=True))
+        paths += list(writer.write_batches(BatchReader.from_arrow(self.data.slice(0, 10)), commit=True))
+
+        manifest = read_manifest(self.server.fs(), self.base_dir)
+        self.assertEqual(20, len(manifest["files"]))
+        self.assertEqual(1010, sum(_["rows"] for _ in manifest["files"]))
+        self.assertEqual(sorted(paths), sorted(self.base_dir + "/" + _["path"] for _ in manifest["files"]))
+        self.assertEqual([], os.listdir(os.path.join(self.base_dir, "_staging")))
+
+        # files not in manifest are ignored
+        pq.write_table(self.data, os.path.join(self.base_dir, "key=1", "external.parquet"))
+        result = self.server.arrow_batches(self.base_dir, filter=pc.field("value") == "11").read_all()
+        self.assertEqual([{"key": 1, "value": "11"}], result.to_pylist())
+
+        paths = self.server.compact(self.base_dir, min_file_bytes=1024 * 1024, partition_filter={"key": 1})
+        self.assertEqual(1, len(paths))
+        self.assertEqual(19, len(read_manifest(self.server.fs(), self.base_dir)["files"]))
+        self.assertEqual(1010, self.server.arrow_batches(self.base_dir).read_all().num_rows)
+
+        # overwrite replaces written partitions entries
+        list(writer.write_batches(BatchReader.from_arrow(self.data.slice(0, 10)), commit=True, append=False))
+        self.assertEqual(10, self.server.arrow_batches(self.base_dir).read_all().num_rows)
+
+    def test_commit_failure(self):
+        def batches():
+            for batch in self.data.to_batches(100):
+                yield batch
+            raise ValueError("source failure")
+
+        writer = self.server.write("table", self.base_dir, partition_by=["key"])
+        with self.assertRaises(ValueError):
+            list(writer.write_batches(BatchReader(self.data.schema, batches()), commit=True))
+
+        self.assertEqual([], [_ for _ in os.listdir(self.base_dir) if _ != "_staging"])
+        self.assertEqual([], os.listdir(os.path.join(self.base_dir, "_staging")))
+        with self.assertRaises(FileNotFoundError):
+            self.server.arrow_batches(self.base_dir, manifest=True)
+
+    def test_commit_overwrite_failure(self):
+        from unittest import mock
+
+        writer = self.server.write("table", self.base_dir, partition_by=["key"])
+        list(writer.write_batches(BatchReader.from_arrow(self.data, 100), commit=True))
+
+        # replaced files are kept until the manifest lists the new ones
+        with mock.patch("adbc.filesystem.update_manifest", side_effect=OSError("manifest failure")):
+            with self.assertRaises(OSError):
+                list(writer.write_batches(BatchReader.from_arrow(self.data.slice(0, 10)), commit=True, append=False))
+        self.assertEqual(1000, self.server.arrow_batches(self.base_dir).read_all().num_rows)
+
+        list(writer.write_batches(BatchReader.from_arrow(self.data.slice(0, 10)), commit=True, append=False))
+        self.assertEqual(10, self.server.arrow_batches(self.base_dir).read_all().num_rows)
+        self.assertEqual(1, len(os.listdir(os.path.join(self.base_dir, "key=1"))))
+
+    def test_shared_fs(self):
+        from pyarrow.fs import LocalFileSystem
+
+        built = []
+
+        def builder(expiry=None):
+            built.append(LocalFileSystem())
+            return built[-1], expiry
+
+        server = LocalDataFileSystem(builder)
+        list(
+            server.write("table", self.base_dir, partition_by=["key"])
+            .write_batches(BatchReader.from_arrow(self.data, 100), max_file_rows=10)
+        )
+        self.assertEqual(1, len(built))
+        self.assertIs(built[0], server.fs())
+
+        server.reset_fs()
+        fs = server.fs()
+        self.assertIs(built[1], fs)
+
+        # credentials expiring within refresh margin
+        server.fs_options["expiry"] = time.time() + 10
+        server.reset_fs()
+        server.fs()
+        server.fs()
+        self.assertEqual(4, len(built))
+
+
+if __name__ == '__main__':
+    unittest.main()
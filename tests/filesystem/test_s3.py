@@ -0,0 +1,212 @@
+import unittest
+
+import pyarrow as pa
+from pyarrow import Table
+import pyarrow.compute as pc
+
+from adbc.filesystem import DataFileSystem
+from adbc.reader import BatchReader
+
+try:
+    from moto.server import ThreadedMotoServer
+except ImportError:
+    ThreadedMotoServer = None
+
+
+@unittest.skipIf(ThreadedMotoServer is None, "moto[server] is required for local S3")
+class S3DataFileSystemTest(unittest.TestCase):
+    port = 5077
+
+    @classmethod
+    def setUpClass(cls):
+        cls.moto = ThreadedMotoServer(port=cls.port, verbose=False)
+        cls.moto.start()
+        cls.server = DataFileSystem(
+            DataFileSystem.get_s3,
+            region_name="us-east-1",
+            access_key="testing",
+            secret_key="testing",
+            endpoint_override="http://127.0.0.1:%s" % cls.port,
+            scheme="http",
+            allow_bucket_creation=True
+        )
+        cls.server.fs().create_dir("bucket")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.moto.stop()
+
+    def setUp(self):
+        self.data = Table.from_pydict({
+            "key": [i % 4 for i in range(100)],
+            "value": [str(i) for i in range(100)]
+        })
+
+    def client(self):
+        import boto3
+
+        return boto3.client(
+            "s3", region_name="us-east-1", aws_access_key_id="testing", aws_secret_access_key="testing",
+            endpoint_url="http://127.0.0.1:%s" % self.port
+        )
+
+    def test_write_read_partitioned(self):
+        paths = list(
+            self.server.write("table", "bucket/write_read", partition_by=["key"])
+            .write_batches(BatchReader.from_arrow(self.data, 10))
+        )
+        self.assertEqual(4, len(paths))
+
+        result = self.server.arrow_batches(
+            "bucket/write_read", partition_filter={"key": 1}, filter=pc.field("value") != "1"
+        ).read_all()
+        self.assertEqual(24, result.num_rows)
+        self.assertEqual({1}, set(result["key"].to_pylist()))
+
+    def test_compact(self):
+        writer = self.server.write("table", "bucket/compact", partition_by=["key"])
+        for batch in self.data.to_batches(25):
+            list(writer.write_batches(BatchReader.from_arrow(batch)))
+
+        self.assertEqual(4, len(self.server.compact("bucket/compact")))
+        self.assertEqual(4, len(list(self.server.list_files("bucket/compact"))))
+        self.assertEqual(
+            self.data.sort_by("value"),
+            self.server.arrow_batches("bucket/compact").read_all().sort_by("value")
+        )
+
+    def test_multipart_upload(self):
+        import os
+        import tempfile
+
+        from adbc.filesystem.upload import MultipartUploader
+
+        client = self.client()
+        # incompressible 12 MiB per partition, uploaded in 3 parts
+        data = Table.from_pydict({
+            "key": [i // 12 for i in range(24)],
+            "value": [os.urandom(1024 * 1024) for _ in range(24)]
+        })
+
+        with tempfile.TemporaryDirectory() as spool_dir:
+            with MultipartUploader(
+                client, part_size=5 * 1024 * 1024, max_concurrency=4, max_spool_bytes=16 * 1024 * 1024,
+                spool_dir=spool_dir
+            ) as uploader:
+                paths = list(
+                    self.server.write("table", "bucket/multipart", partition_by=["key"])
+                    .write_batches(BatchReader.from_arrow(data, 2), uploader=uploader, max_open_files=1)
+                )
+                self.assertEqual([], os.listdir(spool_dir))
+
+        self.assertEqual(2, len(paths))
+        self.assertGreater(self.server.fs().get_file_info(paths[0]).size, 10 * 1024 * 1024)
+        self.assertEqual(
+            data.sort_by("value"),
+            self.server.arrow_batches("bucket/multipart").read_all().select(["key", "value"]).sort_by("value")
+        )
+
+    def test_multipart_spool_bound(self):
+        import os
+
+        from adbc.filesystem.upload import MultipartUploader
+
+        class Uploader(MultipartUploader):
+            peak = 0
+
+            def reserve(self, size: int):
+                super().reserve(size)
+                self.peak = max(self.peak, self.spooled_bytes)
+
+        # one 24 MiB file, larger than the spool
+        data = Table.from_pydict({"value": [os.urandom(1024 * 1024) for _ in range(24)]})
+        with Uploader(self.client(), part_size=5 * 1024 * 1024, max_spool_bytes=8 * 1024 * 1024) as uploader:
+            paths = list(
+                self.server.write("table", "bucket/spool_bound")
+                .write_batches(BatchReader.from_arrow(data, 2), uploader=uploader)
+            )
+            self.assertEqual(0, uploader.spooled_bytes)
+
+        # parts uploaded while the file is written
+        self.assertLess(uploader.peak, 16 * 1024 * 1024)
+        self.assertEqual(1, len(paths))
+        self.assertEqual(data, self.server.arrow_batches("bucket/spool_bound").read_all())
+
+    def test_multipart_abort(self):
+        import os
+
+        from adbc.filesystem.upload import MultipartUploader
+
+        client = self.client()
+        calls = []
+
+        class Client:
+            def __getattr__(self, name):
+                calls.append(name)
+                return getattr(client, name)
+
+        schema = pa.schema([pa.field("value", pa.binary())])
+
+        def batches():
+            for _ in range(12):
+                yield Table.from_pydict({"value": [os.urandom(1024 * 1024)]}).to_batches()[0]
+            raise ValueError("source failure")
+
+        with MultipartUploader(Client(), part_size=5 * 1024 * 1024) as uploader:
+            with self.assertRaises(ValueError):
+                list(
+                    self.server.write("table", "bucket/abort")
+                    .write_batches(BatchReader(schema, batches()), uploader=uploader)
+                )
+            self.assertEqual(0, uploader.spooled_bytes)
+
+        self.assertIn("abort_multipart_upload", calls)
+        self.assertNotIn("put_object", calls)
+        self.assertNotIn("complete_multipart_upload", calls)
+        self.assertEqual([], client.list_multipart_uploads(Bucket="bucket").get("Uploads", []))
+        self.assertEqual(0, client.list_objects_v2(Bucket="bucket", Prefix="abort/")["KeyCount"])
+
+
+class S3CredentialsTest(unittest.TestCase):
+
+    def test_refresh(self):
+        import datetime
+        import time
+        from unittest import mock
+
+        from botocore.credentials import RefreshableCredentials
+
+        refreshed = []
+
+        def refresh():
+            refreshed.append(time.time())
+            return {
+                "access_key": "key%d" % len(refreshed),
+                "secret_key": "secret",
+                "token": "token",
+                # expiring within botocore refresh window
+                "expiry_time": (
+                    datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=5)
+                ).isoformat()
+            }
+
+        credentials = RefreshableCredentials.create_from_metadata(refresh(), refresh, "test")
+        with mock.patch("boto3.Session") as session:
+            session.return_value.get_credentials.return_value = credentials
+            server = DataFileSystem(DataFileSystem.get_s3, region_name="us-east-1", profile_name="test")
+            server.fs()
+            # frozen credentials refreshed, shared fs rebuilt before they expire
+            self.assertEqual(2, len(refreshed))
+            self.assertLess(server.shared_fs_expiry, time.time() + 600)
+
+            server.shared_fs_expiry = time.time()
+            server.fs()
+            self.assertEqual(3, len(refreshed))
+
+            server = DataFileSystem(DataFileSystem.get_s3, region_name="us-east-1")
+            server.fs()
+            self.assertIsNone(server.shared_fs_expiry)
+
+
+if __name__ == '__main__':
+    unittest.main()
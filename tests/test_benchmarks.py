@@ -0,0 +1,30 @@
+import unittest
+
+from benchmarks import run_benchmarks, compare_results
+
+
+class BenchmarksTest(unittest.TestCase):
+
+    def test_run_and_compare(self):
+        results = run_benchmarks(["partitions.*", "odbc.*", "write.csv.narrow"], rows=1000, repeat=2, warmup=0)
+
+        self.assertEqual(1000, results["metadata"]["rows"])
+        self.assertIn("odbc.insert", results["results"])
+        self.assertIn("write.csv.narrow", results["results"])
+        self.assertTrue(all(len(_["times"]) == 2 for _ in results["results"].values()))
+
+        baseline = {"results": {
+            name: dict(result, median=result["median"] * 2, rows=2000)
+            for name, result in results["results"].items()
+        }}
+        self.assertEqual(
+            {"unchanged"}, {_["status"] for _ in compare_results(results, baseline)}
+        )
+        baseline["results"]["odbc.read"]["median"] *= 10
+        self.assertEqual(
+            "faster", {_["name"]: _["status"] for _ in compare_results(results, baseline)}["odbc.read"]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import tempfile
+import unittest
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import Table
+
+from adbc.filesystem.local import LocalDataFileSystem
+from adbc.reader import BatchReader, CompactReader
+
+
+class CompactReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = Table.from_pydict({
+            "status": [("open", "closed", "pending")[i % 3] for i in range(20000)],
+            "name": [str(i) for i in range(20000)],
+            "count": [i % 100 for i in range(20000)]
+        })
+
+    def test_dictionary(self):
+        reader = BatchReader.from_arrow(self.data, 1000).compact(sample_rows=5000)
+
+        self.assertIsInstance(reader, CompactReader)
+        self.assertEqual(pa.dictionary(pa.int32(), pa.string()), reader.schema.field("status").type)
+        self.assertEqual(pa.string(), reader.schema.field("name").type)
+        self.assertEqual(pa.int64(), reader.schema.field("count").type)
+
+        table = reader.read_all()
+        self.assertLess(table.nbytes, self.data.nbytes)
+        self.assertEqual(self.data.column("status").to_pylist(), table.column("status").to_pylist())
+
+    def test_narrow_integers(self):
+        data = self.data.append_column("id", pa.array(range(20000), pa.int64()))
+        reader = BatchReader.from_arrow(data, 1000).compact(narrow_integers=True, sample_rows=5000)
+
+        self.assertEqual(pa.int8(), reader.schema.field("count").type)
+        self.assertEqual(pa.int16(), reader.schema.field("id").type)
+
+        table = reader.read_all()
+        self.assertEqual(pa.int8(), table.schema.field("count").type)
+        self.assertEqual(data.column("id").to_pylist(), table.column("id").to_pylist())
+
+    def test_overflow(self):
+        data = Table.from_pydict({
+            "code": ["a"] * 5000 + [str(i) for i in range(15000)],
+            "value": [1] * 20000
+        })
+        reader = BatchReader.from_arrow(data, 1000).compact(sample_rows=5000)
+        schema = reader.schema
+        self.assertEqual(pa.dictionary(pa.int32(), pa.string()), schema.field("code").type)
+
+        # cardinality grows after the sample, batches keep the planned schema
+        batches = list(reader)
+        self.assertEqual({schema}, {_.schema for _ in batches})
+        self.assertEqual(schema, reader.schema)
+        self.assertEqual(data.column("code").to_pylist(), Table.from_batches(batches).column("code").to_pylist())
+
+        streamed = pa.RecordBatchReader.from_stream(BatchReader.from_arrow(data, 1000).compact(sample_rows=5000))
+        self.assertEqual(20000, streamed.read_all().num_rows)
+
+        with tempfile.TemporaryDirectory() as base_dir:
+            server = LocalDataFileSystem()
+            list(server.write("table", base_dir).write_batches(
+                BatchReader.from_arrow(data, 1000).compact(sample_rows=5000), commit=True
+            ))
+            self.assertEqual(20000, server.arrow_batches(base_dir).read_all().num_rows)
+
+    def test_integer_out_of_range(self):
+        # streamed: sampled range is not guaranteed, type is kept
+        schema = pa.schema([pa.field("value", pa.int64())])
+        batches = [
+            pa.record_batch([pa.array([1, 2, 3])], schema=schema),
+            pa.record_batch([pa.array([100000, 2, 3])], schema=schema)
+        ]
+        reader = BatchReader(schema, iter(batches)).compact(narrow_integers=True, sample_rows=3)
+        self.assertEqual(pa.int64(), reader.schema.field("value").type)
+        self.assertEqual([1, 2, 3, 100000, 2, 3], reader.read_all().column("value").to_pylist())
+
+        # persisted: all values known
+        reader = BatchReader(schema, batches, persisted=True).compact(narrow_integers=True, sample_rows=3)
+        self.assertEqual(pa.int32(), reader.schema.field("value").type)
+        self.assertEqual(6, reader.read_all().num_rows)
+
+        # source bounds
+        reader = BatchReader(schema, iter(batches)).compact(
+            narrow_integers=True, sample_rows=3, integer_bounds={"value": (0, 1000)}
+        )
+        self.assertEqual(pa.int16(), reader.schema.field("value").type)
+        with self.assertRaisesRegex(pa.ArrowInvalid, "CompactReader: column 'value'"):
+            reader.read_all()
+
+    def test_lazy_plan(self):
+        pulled = []
+
+        def batches():
+            for batch in self.data.to_batches(1000):
+                pulled.append(batch)
+                yield batch
+
+        reader = BatchReader(self.data.schema, batches()).compact(sample_rows=5000)
+        self.assertEqual([], pulled)
+        self.assertEqual(20000, reader.read_all().num_rows)
+        self.assertEqual(20, len(pulled))
+
+    def test_write_parquet(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            server = LocalDataFileSystem()
+            list(server.write("table", base_dir).write_batches(
+                BatchReader.from_arrow(self.data, 1000).compact(), commit=True
+            ))
+            table = server.arrow_batches(base_dir, filter=pc.field("status") == "open").read_all()
+
+        self.assertEqual(pa.dictionary(pa.int32(), pa.string()), table.schema.field("status").type)
+        self.assertEqual({"open"}, set(table.column("status").to_pylist()))
+        self.assertEqual(6667, table.num_rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
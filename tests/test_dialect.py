@@ -0,0 +1,92 @@
+import datetime
+import decimal
+import unittest
+
+import pyarrow as pa
+
+from adbc.athena.dtype import ATHENA_DIALECT
+from adbc.dialect import get_dialect
+from adbc.dtype import safe_datatype, ANSI
+from adbc.exception import TableNotFound
+from adbc.mssql.dtype import MSSQL_DIALECT
+from adbc.odbc.dtype import pyodbc_description_to_pyarrow_field
+from adbc.reader import BatchReader
+
+
+class DialectTest(unittest.TestCase):
+
+    def test_registry(self):
+        self.assertIs(get_dialect("ansi"), ANSI)
+        self.assertIs(get_dialect("mssql"), MSSQL_DIALECT)
+        self.assertIs(get_dialect("athena"), ATHENA_DIALECT)
+        self.assertRaises(KeyError, get_dialect, "unknown")
+
+    def test_safe_datatype(self):
+        self.assertEqual(pa.large_string(), safe_datatype("string"))
+        self.assertEqual(pa.string(), safe_datatype("varchar(10)"))
+        self.assertEqual(pa.decimal128(18, 4), safe_datatype("decimal(18,4)"))
+        self.assertEqual(pa.decimal256(40, 2), safe_datatype("DECIMAL(40, 2)"))
+        self.assertEqual(pa.timestamp("ns"), safe_datatype("timestamp"))
+        self.assertEqual(pa.timestamp("ms"), safe_datatype("timestamp(3)"))
+        self.assertEqual(pa.int64(), safe_datatype(int))
+        self.assertEqual(pa.decimal128(38, 18), safe_datatype(decimal.Decimal))
+        self.assertEqual(pa.int8(), safe_datatype(pa.field("a", pa.int8())))
+        self.assertRaises(KeyError, safe_datatype, "unknown")
+
+    def test_memoized(self):
+        self.assertIs(ANSI.to_arrow("decimal(18,4)"), ANSI.to_arrow("decimal(18,4)"))
+        self.assertIn(("decimal(18,4)", None, None, None, None), ANSI.cache)
+        self.assertEqual("decimal(18,4)", ANSI.to_sql(pa.decimal128(18, 4)))
+        self.assertIn(pa.decimal128(18, 4), ANSI.sqltypes)
+
+    def test_odbc_description(self):
+        f = pyodbc_description_to_pyarrow_field(("d", datetime.datetime, None, 27, 27, 7, True))
+        self.assertEqual(pa.field("d", pa.timestamp("ns"), True), f)
+        f = pyodbc_description_to_pyarrow_field(("s", str, None, 34, 34, 7, False))
+        self.assertEqual(pa.field("s", pa.timestamp("ns", "UTC"), False), f)
+
+    def test_mssql(self):
+        self.assertEqual(pa.timestamp("ns", "UTC"), MSSQL_DIALECT.to_arrow("datetimeoffset"))
+        self.assertEqual(pa.int8(), MSSQL_DIALECT.to_arrow("TINYINT"))
+        schema = pa.schema([
+            pa.field("id", pa.int64(), False),
+            pa.field("name", pa.dictionary(pa.int32(), pa.string())),
+            pa.field("created", pa.timestamp("ns", "UTC")),
+            pa.field("amount", pa.decimal128(18, 2))
+        ])
+        self.assertEqual(
+            "CREATE TABLE [dbo].[t] (\n  [id] bigint NOT NULL,\n  [name] nvarchar(max),\n"
+            "  [created] datetimeoffset(7),\n  [amount] decimal(18,2)\n)",
+            MSSQL_DIALECT.create_table("t", schema, "dbo")
+        )
+        self.assertRaises(NotImplementedError, MSSQL_DIALECT.to_sql, pa.list_(pa.int32()))
+
+    def test_odbc_writer_create(self):
+        from benchmarks.odbc import LocalODBC
+
+        class Server(LocalODBC):
+            def create_table(self, name, arrow_schema, schema=None, catalog=None):
+                self.tables[name] = arrow_schema.empty_table()
+
+        server = Server()
+        data = pa.table({"id": [1, 2, 3], "name": ["a", "b", "c"]})
+        with self.assertRaises(TableNotFound):
+            server.write("data").write_batches(BatchReader.from_arrow(data))
+        self.assertNotIn("data", server.tables)
+
+        server.write("data").write_batches(BatchReader.from_arrow(data), create=True)
+        self.assertEqual(data, server.tables["data"])
+
+    def test_athena_nested(self):
+        dtype = pa.struct([
+            pa.field("a", pa.list_(pa.int64())),
+            pa.field("b", pa.map_(pa.string(), pa.float64())),
+            pa.field("c", pa.decimal128(10, 2))
+        ])
+        sqltype = ATHENA_DIALECT.to_sql(dtype)
+        self.assertEqual("struct<a:array<bigint>,b:map<string,double>,c:decimal(10,2)>", sqltype)
+        self.assertEqual(dtype, ATHENA_DIALECT.to_arrow(sqltype))
+
+
+if __name__ == "__main__":
+    unittest.main()
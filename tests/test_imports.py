@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from adbc.lazy import HEAVY_MODULES, is_instance
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_modules(*modules: str) -> list[str]:
+    code = "import sys, json\n%s\nprint(json.dumps([_ for _ in %r if _ in sys.modules]))" % (
+        "\n".join("import %s" % _ for _ in modules), HEAVY_MODULES
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONPATH=ROOT)
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+class ImportsTest(unittest.TestCase):
+
+    def test_lazy_backends(self):
+        self.assertEqual([], imported_modules(
+            "adbc.reader", "adbc.filesystem.local", "adbc.odbc", "adbc.mssql", "adbc.athena"
+        ))
+
+    def test_is_instance(self):
+        self.assertFalse(is_instance(object(), "adbc_not_a_module", "Reader"))
+        self.assertTrue(is_instance(1.5, "builtins", "float"))
+        self.assertFalse(is_instance(1, "builtins", "float"))
+        self.assertFalse(is_instance(1, "builtins", "NotAClass"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import logging
+import tempfile
+import unittest
+
+import pyarrow as pa
+from pyarrow import Table
+
+from adbc import instrumentation
+from adbc.instrumentation import Aggregator, LoggingHook, instrument
+from adbc.filesystem.local import LocalDataFileSystem
+from adbc.reader import BatchReader
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = Table.from_pydict({
+            "key": [i % 4 for i in range(1000)],
+            "value": [str(i) for i in range(1000)]
+        })
+
+    def test_disabled(self):
+        self.assertFalse(instrumentation.enabled())
+        events = []
+        with instrument(events.append):
+            self.assertTrue(instrumentation.enabled())
+            BatchReader.from_arrow(self.data, 100).read_all()
+        self.assertFalse(instrumentation.enabled())
+        self.assertEqual(11, len(events))
+        BatchReader.from_arrow(self.data, 100).read_all()
+        self.assertEqual(11, len(events))
+
+    def test_cast_and_write(self):
+        with tempfile.TemporaryDirectory() as tmp, instrument(Aggregator()) as aggregator:
+            paths = list(
+                LocalDataFileSystem().write("table", tmp, partition_by=["key"])
+                .write_batches(BatchReader.from_arrow(self.data, 100).cast_columns({"value": pa.int64()}))
+            )
+
+        self.assertEqual(4, len(paths))
+        self.assertEqual({"count": 10, "rows": 1000}, {
+            k: v for k, v in aggregator.get("cast").items() if k in ("count", "rows")
+        })
+        self.assertEqual(1000, aggregator.get("cast", "end")["rows"])
+        self.assertEqual(40, aggregator.get("partition")["count"])
+        self.assertEqual(1000, aggregator.get("write")["rows"])
+        self.assertEqual(4, aggregator.get("write", "file_open")["count"])
+        close = aggregator.get("write", "file_close")
+        self.assertEqual((4, 1000), (close["count"], close["rows"]))
+        self.assertGreater(close["bytes"], 0)
+        self.assertIn("partition", aggregator.report())
+
+    def test_odbc(self):
+        from benchmarks.odbc import LocalODBC
+
+        server = LocalODBC({"data": self.data})
+        with instrument(Aggregator()) as aggregator:
+            server.arrow_batches("SELECT * FROM data", batch_size=100).read_all()
+            server.write("data").write_batches(BatchReader.from_arrow(self.data, 250))
+
+        self.assertEqual(1, aggregator.get("odbc", "connect")["count"])
+        self.assertEqual((10, 1000), tuple(aggregator.get("odbc.fetch")[_] for _ in ("count", "rows")))
+        self.assertEqual((4, 1000), tuple(aggregator.get("odbc.insert")[_] for _ in ("count", "rows")))
+        self.assertEqual(1000, aggregator.get("odbc.insert", "end")["rows"])
+        self.assertEqual(2000, server.tables["data"].num_rows)
+
+    def test_nested_readers(self):
+        import time
+
+        class Outer(BatchReader):
+            pass
+
+        def batches():
+            for batch in self.data.to_batches(100):
+                time.sleep(0.01)
+                yield batch
+
+        with instrument(Aggregator()) as aggregator:
+            Outer(self.data.schema, iter(BatchReader(self.data.schema, batches()))).read_all()
+
+        inner, outer = aggregator.get("BatchReader"), aggregator.get("Outer")
+        self.assertEqual((10, 10), (inner["count"], outer["count"]))
+        self.assertGreaterEqual(inner["wall"], 0.1)
+        # upstream time is wait, not counted twice
+        self.assertGreaterEqual(outer["wait"], 0.1)
+        self.assertLess(outer["wall"], 0.05)
+
+    def test_logging(self):
+        with self.assertLogs("adbc.instrumentation", logging.DEBUG) as logs, instrument(LoggingHook()):
+            BatchReader.from_arrow(self.data).read_all()
+        self.assertTrue(logs.output[0].startswith("DEBUG:adbc.instrumentation:BatchReader batch rows=1000"))
+
+
+if __name__ == '__main__':
+    unittest.main()
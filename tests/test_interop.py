@@ -0,0 +1,79 @@
+import gc
+import importlib.util
+import unittest
+
+import pyarrow as pa
+from pyarrow import Table
+
+from adbc.exception import MemoryBudgetExceeded
+from adbc.memory import MemoryBudget
+from adbc.reader import BatchReader
+
+
+class Stream:
+    """
+    Foreign object exporting the Arrow PyCapsule stream protocol
+    """
+
+    def __init__(self, table: Table):
+        self.table = table
+
+    def __arrow_c_stream__(self, requested_schema=None):
+        return self.table.__arrow_c_stream__(requested_schema)
+
+
+class InteropTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = Table.from_pydict({
+            "id": list(range(1000)),
+            "name": [str(i) for i in range(1000)]
+        })
+        self.pulled = 0
+
+    def batches(self):
+        for batch in self.data.to_batches(100):
+            self.pulled += 1
+            yield batch
+
+    def test_c_stream(self):
+        reader = pa.RecordBatchReader.from_stream(BatchReader(self.data.schema, self.batches()))
+        # pulled on demand
+        self.assertEqual(0, self.pulled)
+        self.assertEqual(100, reader.read_next_batch().num_rows)
+        self.assertEqual(1, self.pulled)
+        self.assertEqual(900, reader.read_all().num_rows)
+
+        self.assertTrue(self.data.equals(pa.table(BatchReader.from_arrow(self.data, 100))))
+        self.assertTrue(self.data.equals(BatchReader.from_arrow(Stream(self.data)).read_all()))
+
+    def test_to_reader(self):
+        reader = BatchReader(self.data.schema, self.batches()).to_reader()
+        self.assertIsInstance(reader, pa.RecordBatchReader)
+        self.assertEqual(0, self.pulled)
+        self.assertTrue(self.data.equals(reader.read_all()))
+
+    def test_to_pandas(self):
+        budget = MemoryBudget(10 * self.data.nbytes)
+        frame = BatchReader(self.data.schema, self.batches()).to_pandas(budget)
+        self.assertEqual(list(range(1000)), frame["id"].tolist())
+        self.assertGreater(budget.current, 0)
+        del frame
+        gc.collect()
+        self.assertEqual(0, budget.current)
+
+        budget = MemoryBudget(100)
+        self.assertRaises(MemoryBudgetExceeded, BatchReader(self.data.schema, self.batches()).to_pandas, budget)
+        self.assertEqual(0, budget.current)
+
+        self.assertEqual((0, 2), BatchReader(self.data.schema, []).to_pandas().shape)
+
+    @unittest.skipUnless(importlib.util.find_spec("polars"), "polars not installed")
+    def test_to_polars(self):
+        frame = BatchReader(self.data.schema, self.batches()).to_polars()
+        self.assertEqual((1000, 2), frame.shape)
+        self.assertEqual(list(range(1000)), frame["id"].to_list())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import tempfile
+import threading
+import time
+import unittest
+
+import pyarrow.parquet as pq
+from pyarrow import Table
+
+from adbc.exception import MemoryBudgetExceeded
+from adbc.filesystem.local import LocalDataFileSystem
+from adbc.memory import MemoryBudget, set_memory_budget
+from adbc.reader import BatchReader
+
+
+class MemoryBudgetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = Table.from_pydict({
+            "key": [i % 10 for i in range(10000)],
+            "value": [str(i) for i in range(10000)]
+        })
+        self.batch_bytes = self.data.slice(0, 1000).nbytes
+
+    def tearDown(self):
+        set_memory_budget(None)
+
+    def test_reserve(self):
+        budget = MemoryBudget(100)
+        budget.reserve(80)
+        self.assertFalse(budget.try_reserve(40))
+        with self.assertRaises(MemoryBudgetExceeded):
+            budget.reserve(40, block=False)
+        with self.assertRaises(MemoryBudgetExceeded):
+            budget.reserve(40, timeout=0.01)
+
+        threading.Timer(0.05, budget.release, (80,)).start()
+        budget.reserve(40)
+        self.assertEqual((40, 80), (budget.current, budget.peak))
+        budget.release(40)
+        # larger than limit, nothing reserved
+        budget.reserve(1000, block=False)
+        self.assertTrue(budget.over_limit())
+        self.assertIn("pool_bytes", budget.stats())
+
+    def test_read_all(self):
+        budget = MemoryBudget(self.data.nbytes * 2)
+        table = BatchReader.from_arrow(self.data, 1000).read_all(budget)
+        self.assertEqual(self.data.nbytes, budget.current)
+        del table
+        self.assertEqual(0, budget.current)
+
+        set_memory_budget(self.data.nbytes // 2)
+        with self.assertRaises(MemoryBudgetExceeded):
+            BatchReader.from_arrow(self.data, 1000).read_all()
+
+    def test_prefetch(self):
+        budget = MemoryBudget(self.batch_bytes * 2)
+        peaks = []
+        for batch in BatchReader.from_arrow(self.data, 1000).prefetch(8, budget):
+            time.sleep(0.005)
+            peaks.append(budget.current)
+        self.assertEqual(10, len(peaks))
+        self.assertLessEqual(budget.peak, self.batch_bytes * 2)
+        self.assertEqual(0, budget.current)
+
+    def test_write_batches(self):
+        budget = MemoryBudget(self.batch_bytes * 3)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = list(
+                LocalDataFileSystem().write("table", tmp, partition_by=["key"])
+                .write_batches(
+                    BatchReader.from_arrow(self.data, 1000),
+                    row_group_rows=5000, memory_budget=budget, max_workers=2
+                )
+            )
+            self.assertEqual(10000, sum(pq.read_metadata(_).num_rows for _ in paths))
+            # buffered row groups flushed before reaching 5000 rows
+            self.assertGreater(sum(pq.read_metadata(_).num_row_groups for _ in paths), 10)
+        self.assertEqual(0, budget.current)
+        self.assertLessEqual(budget.peak, self.batch_bytes * 4)
+
+    def test_sort_spill(self):
+        from adbc.filesystem.sort import external_sort
+
+        budget = MemoryBudget(self.batch_bytes * 3)
+        result = external_sort(
+            BatchReader.from_arrow(self.data, 1000), ["value"], memory_budget=budget, batch_size=1000
+        ).read_all()
+        self.assertEqual(sorted(self.data["value"].to_pylist()), result["value"].to_pylist())
+        self.assertEqual(0, budget.current)
+        self.assertLessEqual(budget.peak, self.batch_bytes * 3)
+
+    def test_shared_budget(self):
+        from benchmarks.odbc import LocalODBC
+
+        # fetched batches and writer buffers in one budget
+        set_memory_budget(self.batch_bytes * 2)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = list(
+                LocalDataFileSystem().write("table", tmp, partition_by=["key"]).write_batches(
+                    LocalODBC({"data": self.data}).arrow_batches("SELECT * FROM data", batch_size=1000),
+                    row_group_rows=5000
+                )
+            )
+            self.assertEqual(10000, sum(pq.read_metadata(_).num_rows for _ in paths))
+
+
+if __name__ == '__main__':
+    unittest.main()
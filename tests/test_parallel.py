@@ -0,0 +1,49 @@
+import os
+import unittest
+from functools import partial
+
+import pyarrow as pa
+from pyarrow import Table
+
+from adbc.dtype import cast_batch
+from adbc.reader import BatchReader
+from adbc.reader.parallel import SHARED_MEMORY_DIR
+
+
+class ProcessMapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = Table.from_pydict({
+            "date": ["2024-01-%02d" % (i % 28 + 1) for i in range(10000)],
+            "id": list(range(10000))
+        })
+        self.schema = pa.schema([pa.field("date", pa.date32()), pa.field("id", pa.int64())])
+
+    def test_cast(self):
+        expected = BatchReader.from_arrow(self.data, 1000).cast(self.schema).read_all()
+        table = BatchReader.from_arrow(self.data, 1000).cast(self.schema, processes=2).read_all()
+
+        self.assertEqual(self.schema, table.schema)
+        # ordered
+        self.assertEqual(expected.to_pydict(), table.to_pydict())
+
+    def test_process_map(self):
+        reader = BatchReader.from_arrow(self.data, 1000).process_map(
+            partial(cast_batch, schema=self.schema.remove(0)), processes=2, in_flight=2
+        )
+        self.assertEqual(pa.schema([pa.field("id", pa.int64())]), reader.schema)
+        self.assertEqual(list(range(10000)), reader.read_all().column("id").to_pylist())
+
+        empty = BatchReader(self.data.schema, []).process_map(partial(cast_batch, schema=self.schema), processes=1)
+        self.assertEqual(0, empty.read_all().num_rows)
+
+    def test_error(self):
+        data = Table.from_pydict({"date": ["2024-01-01"] * 10 + ["not a date"], "id": list(range(11))})
+        reader = BatchReader.from_arrow(data, 5).cast(self.schema, processes=2)
+        self.assertRaises(pa.ArrowInvalid, reader.read_all)
+        if SHARED_MEMORY_DIR:
+            self.assertFalse([_ for _ in os.listdir(SHARED_MEMORY_DIR) if _.startswith("adbc-process-")])
+
+
+if __name__ == "__main__":
+    unittest.main()